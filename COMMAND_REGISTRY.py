@@ -18,7 +18,7 @@ COMMANDS = {
     "help": {
         "enabled": True,
         "description": "Show all available commands",
-        "aliases": ["commands", "menu", "info"],
+        "aliases": ["commands", "info"],
         "admin_only": False,
         "group_only": False,
         "cooldown": 5,
@@ -90,6 +90,17 @@ COMMANDS = {
         "cooldown": 30,
         "category": "entertainment",
         "feature_dependency": "live_stream"
+    },
+    
+    "broadcast": {
+        "enabled": True,
+        "description": "Announce to every chat the bot knows",
+        "aliases": ["announce", "ঘোষণা"],
+        "admin_only": True,
+        "group_only": False,
+        "cooldown": 10,
+        "category": "admin",
+        "feature_dependency": "admin_controls"
     }
 }
 
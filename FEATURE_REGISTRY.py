@@ -15,7 +15,12 @@ FEATURES = {
             "inbox_first": True,
             "generate_image": True,
             "show_user_info": True,
-            "allow_admin_links": True
+            "allow_admin_links": True,
+            "join_batch_window": 5.0,
+            "join_batch_max": 50,
+            "collage_max": 16,
+            "dm_rate_limit": 20,
+            "auto_delete_after": 0
         }
     },
     
@@ -85,7 +90,10 @@ FEATURES = {
         "settings": {
             "can_manage_users": True,
             "can_manage_rules": True,
-            "can_manage_features": True
+            "can_manage_features": True,
+            "broadcast_rate": 25,
+            "broadcast_concurrency": 8,
+            "broadcast_page_size": 500
         }
     }
 }
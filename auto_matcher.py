@@ -0,0 +1,257 @@
+"""
+auto_matcher.py - Compiled Auto-Response Trigger Matcher
+Aho-Corasick automaton over normalized trigger words (Bangla safe, de-styled)
+"""
+
+import unicodedata
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from stylish_text import StylishText
+
+# (trigger, start, end) - offsets refer to the folded text
+Match = Tuple[str, int, int]
+
+def is_word_char(char: str) -> bool:
+    """Letter, digit, underscore or combining mark (Bangla vowel signs)"""
+    return char.isalnum() or char == "_" or unicodedata.category(char)[0] == "M"
+
+# Below this many triggers a str.find scan beats the automaton
+SMALL_SET = 48
+
+class TriggerMatcher:
+    """
+    Multi-pattern matcher for auto-response triggers
+
+    All triggers are compiled into one Aho-Corasick automaton, so a message
+    is scanned once no matter how many triggers exist (small sets fall back
+    to str.find, which is faster below a few dozen patterns). Adding
+    triggers only extends the trie; failure links are recomputed lazily on
+    the next match so a bulk load costs a single rebuild. Removing a trigger
+    just clears its output, and the trie is compacted once most nodes are
+    dead. Triggers and messages are folded with StylishText.normalize, so
+    styled look-alike letters and zero-width characters inside words do
+    not dodge a trigger.
+    """
+
+    def __init__(self, triggers: Optional[Dict[str, Any]] = None, whole_word: bool = True,
+                 fold: Callable[[str], str] = StylishText.normalize):
+        self.whole_word = whole_word
+        self.fold = fold
+        self._values: Dict[str, Any] = {}
+        self._originals: Dict[str, str] = {}
+        self._reset()
+
+        if triggers:
+            self.update(triggers)
+
+    def _reset(self):
+        """Empty trie with only the root node"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Optional[str]] = [None]
+        self._link: List[int] = [-1]
+        self._dead = 0
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, trigger: str) -> bool:
+        return self._key(trigger) in self._values
+
+    def _key(self, trigger: str) -> str:
+        """Normalized trie key for a trigger"""
+        return self.fold(trigger.strip())
+
+    def add(self, trigger: str, value: Any = True):
+        """Add or replace a trigger"""
+        key = self._key(trigger)
+        if not key:
+            raise ValueError("Trigger must not be empty")
+
+        self._values[key] = value
+        self._originals[key] = trigger
+
+        node = 0
+        for char in key:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+                self._link.append(-1)
+                self._dirty = True
+            node = nxt
+
+        if self._out[node] is None:
+            self._out[node] = key
+            self._dirty = True
+
+    def update(self, triggers: Dict[str, Any]):
+        """Add many triggers (one lazy rebuild)"""
+        for trigger, value in triggers.items():
+            self.add(trigger, value)
+
+    def remove(self, trigger: str) -> bool:
+        """Remove a trigger (no rebuild needed)"""
+        key = self._key(trigger)
+        if key not in self._values:
+            return False
+
+        del self._values[key]
+        del self._originals[key]
+
+        node = 0
+        for char in key:
+            node = self._goto[node][char]
+        self._out[node] = None
+        self._dead += len(key)
+
+        # Compact once dead paths dominate the trie
+        if self._dead > len(self._goto) // 2:
+            self._compact()
+        return True
+
+    def clear(self):
+        """Remove all triggers"""
+        self._values.clear()
+        self._originals.clear()
+        self._reset()
+
+    def get(self, trigger: str, default: Any = None) -> Any:
+        """Value stored for a trigger"""
+        return self._values.get(self._key(trigger), default)
+
+    def triggers(self) -> List[str]:
+        """Triggers as originally added"""
+        return list(self._originals.values())
+
+    def _compact(self):
+        """Rebuild trie from live triggers only"""
+        values = dict(self._values)
+        originals = dict(self._originals)
+        self._reset()
+        for key, value in values.items():
+            self.add(originals[key], value)
+
+    def _build_links(self):
+        """Compute failure and output links breadth-first"""
+        goto, fail, out, link = self._goto, self._fail, self._out, self._link
+        queue = deque()
+
+        for child in goto[0].values():
+            fail[child] = 0
+            link[child] = -1
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+
+                # Nearest proper suffix that is itself a trigger
+                suffix = fail[child]
+                link[child] = suffix if out[suffix] is not None else link[suffix]
+                queue.append(child)
+
+        self._dirty = False
+
+    def _scan_small(self, text: str) -> List[Tuple[str, int, int]]:
+        """Raw matches for small trigger sets via str.find"""
+        matches = []
+        for key in self._values:
+            start = text.find(key)
+            while start != -1:
+                matches.append((key, start, start + len(key)))
+                start = text.find(key, start + 1)
+
+        matches.sort(key=lambda m: (m[2], -m[1]))
+        return matches
+
+    def _scan(self, text: str) -> List[Tuple[str, int, int]]:
+        """Raw (key, start, end) matches in folded text"""
+        if len(self._values) <= SMALL_SET:
+            return self._scan_small(text)
+
+        if self._dirty:
+            self._build_links()
+
+        goto, fail, out, link = self._goto, self._fail, self._out, self._link
+        matches = []
+        node = 0
+
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not node:
+                continue
+
+            hit = node if out[node] is not None else link[node]
+            while hit > 0:
+                key = out[hit]
+                if key is not None:
+                    matches.append((key, end - len(key), end))
+                hit = link[hit]
+
+        return matches
+
+    def _is_whole_word(self, text: str, start: int, end: int) -> bool:
+        """True when the span is not glued to surrounding word characters"""
+        if start > 0 and is_word_char(text[start - 1]) and is_word_char(text[start]):
+            return False
+        if end < len(text) and is_word_char(text[end]) and is_word_char(text[end - 1]):
+            return False
+        return True
+
+    def find_all(self, text: str) -> List[Match]:
+        """All trigger occurrences in text"""
+        if not self._values or not text:
+            return []
+
+        folded = self.fold(text)
+        matches = self._scan(folded)
+        if self.whole_word:
+            matches = [m for m in matches if self._is_whole_word(folded, m[1], m[2])]
+
+        return [(self._originals[key], start, end) for key, start, end in matches]
+
+    def match(self, text: str) -> Optional[Tuple[str, Any]]:
+        """Leftmost-longest trigger and its value (or None)"""
+        best = None
+        for trigger, start, end in self.find_all(text):
+            if best is None or start < best[1] or (start == best[1] and end > best[2]):
+                best = (trigger, start, end)
+
+        if best is None:
+            return None
+        return best[0], self._values[self._key(best[0])]
+
+    def matches_any(self, text: str) -> bool:
+        """True if any trigger occurs in text"""
+        return bool(self.find_all(text))
+
+def build_matcher(triggers: Iterable[str], **kwargs) -> TriggerMatcher:
+    """Create a matcher from a plain list of trigger words"""
+    return TriggerMatcher({trigger: True for trigger in triggers}, **kwargs)
+
+if __name__ == "__main__":
+    # Quick self-check
+    matcher = TriggerMatcher({"hello": "👋 Hi!", "ভালো": "😊", "good morning": "☀️"})
+    assert matcher.match("HELLO there") == ("hello", "👋 Hi!")
+    assert matcher.match("সবাই ভালো আছো?") == ("ভালো", "😊")
+    assert matcher.match("othello") is None
+    assert matcher.match("Good Morning all!") == ("good morning", "☀️")
+
+    matcher.add("hell")
+    assert [m[0] for m in matcher.find_all("hell hello")] == ["hell", "hello"]
+    matcher.remove("hello")
+    assert matcher.match("hello") is None
+    print("✅ TriggerMatcher self-check passed")
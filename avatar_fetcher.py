@@ -0,0 +1,182 @@
+"""
+avatar_fetcher.py - Avatar Download Pool
+Profile photos over one pooled aiohttp session with an on-disk LRU cache
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import aiohttp
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class AvatarDiskCache:
+    """
+    Files under DATA_STORAGE/avatars named by file_unique_id
+
+    file_unique_id is stable across bots and file_id rotations, so it is
+    the cache key. Recency is kept in memory (seeded from mtimes at start)
+    and the least recently used files are deleted beyond max_bytes.
+    """
+
+    def __init__(self, directory: str = "DATA_STORAGE/avatars", max_bytes: int = 64 * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self.load()
+
+    def load(self):
+        """Index existing files, oldest first"""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        self._sizes.clear()
+        for _, name, size in sorted(entries):
+            self._sizes[name] = size
+        self.total_bytes = sum(self._sizes.values())
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached bytes or None"""
+        if key not in self._sizes:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            self.total_bytes -= self._sizes.pop(key)
+            return None
+
+        self._sizes.move_to_end(key)
+        try:
+            os.utime(self._path(key))  # keeps recency across restarts
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store atomically and evict beyond max_bytes"""
+        tmp_path = self._path(key) + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.error(f"❌ Failed to cache avatar {key}: {e}")
+            return
+
+        self.total_bytes += len(data) - self._sizes.pop(key, 0)
+        self._sizes[key] = len(data)
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used files"""
+        while self.total_bytes > self.max_bytes and len(self._sizes) > 1:
+            key, size = self._sizes.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+class AvatarFetcher:
+    """
+    Fetch joining users' profile photos for welcome_pro
+
+    getUserProfilePhotos -> getFile -> download, where the download goes
+    through one shared session (keep-alive connection pool, so no TLS
+    handshake per join) under a semaphore. Cached avatars skip getFile and
+    the download; concurrent requests for one photo share a fetch.
+    File URLs come from the bot (base_file_url), so a local stub server
+    works the same as api.telegram.org.
+    """
+
+    def __init__(self, cache: Optional[AvatarDiskCache] = None, max_connections: int = 16,
+                 max_concurrency: int = 8, timeout: float = 20.0, min_size: int = 320):
+        self.cache = cache if cache is not None else AvatarDiskCache()
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.min_size = min_size
+        self.stats = {"requests": 0, "no_photo": 0, "cache_hits": 0, "downloads": 0, "errors": 0}
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._flight = SingleFlight("avatar", timeout=timeout * 2)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared session, created on first use inside the running loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    def pick_size(self, sizes):
+        """Smallest PhotoSize at least min_size wide (or the largest)"""
+        ordered = sorted(sizes, key=lambda size: size.width)
+        for size in ordered:
+            if size.width >= self.min_size:
+                return size
+        return ordered[-1]
+
+    async def fetch(self, bot, user_id: int) -> Optional[bytes]:
+        """Current profile photo of a user, None if hidden or missing"""
+        self.stats["requests"] += 1
+        try:
+            photos = await bot.get_user_profile_photos(user_id, limit=1)
+            if not photos.total_count or not photos.photos:
+                self.stats["no_photo"] += 1
+                return None
+            size = self.pick_size(photos.photos[0])
+            return await self.fetch_file(bot, size.file_id, size.file_unique_id)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Avatar fetch failed for user {user_id}: {e}")
+            return None
+
+    async def fetch_file(self, bot, file_id: str, file_unique_id: str) -> bytes:
+        """Photo bytes from disk cache or a single shared download"""
+        data = self.cache.get(file_unique_id)
+        if data is not None:
+            self.stats["cache_hits"] += 1
+            return data
+        return await self._flight.do(file_unique_id,
+                                     lambda: self._download(bot, file_id, file_unique_id))
+
+    async def _download(self, bot, file_id: str, file_unique_id: str) -> bytes:
+        """getFile and download over the pooled session"""
+        async with self._semaphore:
+            telegram_file = await bot.get_file(file_id)
+            async with self.session.get(telegram_file.file_path) as response:
+                response.raise_for_status()
+                data = await response.read()
+
+        self.stats["downloads"] += 1
+        self.cache.put(file_unique_id, data)
+        return data
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_auto_matcher.py - Auto-Response Matcher Benchmark
+Compiled automaton vs per-trigger scan for 10 to 10,000 triggers
+
+Usage:
+    python benchmarks/bench_auto_matcher.py -o matcher.json
+"""
+
+import random
+import time
+from typing import Dict, List
+
+from common import emit, make_parser
+
+from auto_matcher import TriggerMatcher
+
+LATIN = "abcdefghijklmnopqrstuvwxyz"
+BANGLA = "অআইউএওকখগঘচছজঝটঠডঢতথদধনপফবভমযরলশসহ"
+VOWEL_SIGNS = "ািীুূেো"
+
+def random_word(rng: random.Random) -> str:
+    """Random English or Bangla word"""
+    if rng.random() < 0.5:
+        return "".join(rng.choice(LATIN) for _ in range(rng.randint(3, 9)))
+
+    word = ""
+    for _ in range(rng.randint(2, 5)):
+        word += rng.choice(BANGLA)
+        if rng.random() < 0.5:
+            word += rng.choice(VOWEL_SIGNS)
+    return word
+
+def make_triggers(count: int, rng: random.Random) -> List[str]:
+    """Unique trigger words and short phrases"""
+    triggers = set()
+    while len(triggers) < count:
+        words = [random_word(rng) for _ in range(rng.choice((1, 1, 1, 2)))]
+        triggers.add(" ".join(words))
+    return sorted(triggers)
+
+def make_messages(count: int, triggers: List[str], rng: random.Random) -> List[str]:
+    """Chat messages, ~20% containing a trigger"""
+    messages = []
+    for _ in range(count):
+        words = [random_word(rng) for _ in range(rng.randint(4, 20))]
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(triggers).upper())
+        messages.append(" ".join(words))
+    return messages
+
+def naive_scan(triggers: List[str], text: str) -> List[str]:
+    """Reference: fold text and test every trigger"""
+    folded = text.casefold()
+    return [t for t in triggers if t in folded]
+
+def bench_size(count: int, messages_count: int, rng: random.Random) -> Dict:
+    """Measure build, incremental add and match throughput for one size"""
+    triggers = make_triggers(count, rng)
+    messages = make_messages(messages_count, triggers, rng)
+
+    started = time.perf_counter()
+    matcher = TriggerMatcher({t: True for t in triggers}, whole_word=False)
+    matcher.find_all("warm")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    hits = sum(1 for text in messages if matcher.find_all(text))
+    automaton_s = time.perf_counter() - started
+
+    folded = [t.casefold() for t in triggers]
+    started = time.perf_counter()
+    naive_hits = sum(1 for text in messages if naive_scan(folded, text))
+    naive_s = time.perf_counter() - started
+
+    # Incremental change: one new trigger then the next match
+    started = time.perf_counter()
+    matcher.add("নতুন ট্রিগার")
+    matcher.find_all(messages[0])
+    incremental_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "triggers": count,
+        "messages": messages_count,
+        "build_ms": round(build_ms, 3),
+        "incremental_add_ms": round(incremental_ms, 3),
+        "automaton_msgs_per_s": round(messages_count / automaton_s, 1),
+        "naive_msgs_per_s": round(messages_count / naive_s, 1),
+        "speedup": round(naive_s / automaton_s, 2),
+        "hits": hits,
+        "hits_agree": hits == naive_hits
+    }
+
+def main():
+    parser = make_parser("Benchmark the auto-response trigger matcher")
+    parser.add_argument("--sizes", default="10,100,1000,10000")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    emit("auto_matcher", {"sizes": [bench_size(n, args.messages, rng) for n in sizes]}, args.output)
+
+if __name__ == "__main__":
+    main()
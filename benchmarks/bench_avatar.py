@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_avatar.py - Avatar Fetch Benchmark
+Join-time avatar fetches: fresh connection per download vs pooled fetcher with disk cache
+
+Usage:
+    python benchmarks/bench_avatar.py -o avatar.json
+"""
+
+import asyncio
+import io
+import random
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from common import BENCH_TOKEN, FakeBotAPI, emit, make_parser, percentiles
+
+import aiohttp
+from PIL import Image
+from telegram import Bot
+
+from avatar_fetcher import AvatarDiskCache, AvatarFetcher
+
+def make_photo(rng: random.Random) -> bytes:
+    """640px JPEG like a Telegram profile photo"""
+    image = Image.effect_noise((640, 640), rng.randrange(20, 80)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+def make_joins(api: FakeBotAPI, users: int, joins: int, seed: int) -> List[int]:
+    """Join sequence where some users rejoin (skewed towards a few)"""
+    rng = random.Random(seed)
+    for user_id in range(1, users + 1):
+        if rng.random() < 0.85:  # the rest hide their photo
+            file_id = f"avatar{user_id}"
+            api.files[file_id] = make_photo(rng)
+            api.profile_photos[user_id] = file_id
+    return [min(int(rng.paretovariate(1.2)), users) for _ in range(joins)]
+
+async def fetch_fresh(bot: Bot, user_id: int):
+    """Old path: new HTTP session (new connection) for every download"""
+    photos = await bot.get_user_profile_photos(user_id, limit=1)
+    if not photos.total_count:
+        return None
+    telegram_file = await bot.get_file(photos.photos[0][-1].file_id)
+    async with aiohttp.ClientSession() as session:
+        async with session.get(telegram_file.file_path) as response:
+            return await response.read()
+
+async def run_joins(fetch: Callable[[int], Awaitable], joins: List[int], burst: int) -> Dict:
+    """Fetch avatars for joins arriving in concurrent bursts"""
+    latencies = []
+
+    async def one(user_id):
+        started = time.perf_counter()
+        await fetch(user_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for i in range(0, len(joins), burst):
+        await asyncio.gather(*(one(user_id) for user_id in joins[i:i + burst]))
+    elapsed = time.perf_counter() - started
+    return {"total_s": round(elapsed, 3), "joins_per_s": round(len(joins) / elapsed, 1),
+            "latency_ms": percentiles(latencies)}
+
+async def run(args) -> Dict:
+    api = FakeBotAPI(delay=args.delay).start()
+    results: Dict = {"joins": args.joins, "users": args.users, "burst": args.burst}
+    try:
+        joins = make_joins(api, args.users, args.joins, args.seed)
+        bot = Bot(BENCH_TOKEN, base_url=api.base_url, base_file_url=api.base_file_url)
+        await bot.initialize()
+
+        connections = api.connections
+        results["fresh_connections"] = await run_joins(lambda u: fetch_fresh(bot, u), joins, args.burst)
+        results["fresh_connections"]["connections"] = api.connections - connections
+
+        with tempfile.TemporaryDirectory() as directory:
+            fetcher = AvatarFetcher(AvatarDiskCache(directory, max_bytes=args.cache_mb * 2 ** 20))
+            for label in ("pooled_cold", "pooled_warm"):
+                connections = api.connections
+                results[label] = await run_joins(lambda u: fetcher.fetch(bot, u), joins, args.burst)
+                results[label]["connections"] = api.connections - connections
+            results["fetcher_stats"] = dict(fetcher.stats, cached_files=len(fetcher.cache),
+                                            cached_mb=round(fetcher.cache.total_bytes / 2 ** 20, 2))
+            await fetcher.close()
+
+        await bot.shutdown()
+    finally:
+        api.stop()
+    return results
+
+def main():
+    parser = make_parser("Benchmark avatar fetching with and without the pooled fetcher")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--joins", type=int, default=600)
+    parser.add_argument("--burst", type=int, default=20, help="concurrent joins per burst")
+    parser.add_argument("--delay", type=float, default=0.0, help="stub API latency in seconds")
+    parser.add_argument("--cache-mb", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    emit("avatar", asyncio.run(run(args)), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_broadcast.py - Broadcast Benchmark
+Throughput of a sequential send loop vs the Broadcaster, plus crash/resume and flood waits
+
+Usage:
+    python benchmarks/bench_broadcast.py --recipients 1000 --delay 0.02 -o broadcast.json
+"""
+
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import time
+from typing import Dict, Set
+
+from common import BENCH_TOKEN, FakeBotAPI, emit, make_parser
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from broadcast import Broadcaster, RecipientStore
+
+def make_store(path: str, recipients: int, seed: int) -> RecipientStore:
+    """Mostly private chats plus some groups, ids spread like real ones"""
+    rng = random.Random(seed)
+    store = RecipientStore(path)
+    users = rng.sample(range(10_000, 10_000_000), recipients * 9 // 10)
+    groups = [-1001000000000 - i for i in range(recipients - len(users))]
+    store.add_many(users, "private")
+    store.add_many(groups, "group")
+    return store
+
+def flaky_send(api: FakeBotAPI, blocked: Set[int], flood_every: int):
+    """sendMessage override: 403 for blocked users, 429 every flood_every calls"""
+    counter = itertools.count(1)
+
+    def respond(params: Dict) -> Dict:
+        if int(params.get("chat_id", 0)) in blocked:
+            return {"ok": False, "error_code": 403,
+                    "description": "Forbidden: bot was blocked by the user"}
+        if flood_every and next(counter) % flood_every == 0:
+            return {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1}}
+        return {"ok": True, "result": api._result("sendMessage", params)}
+
+    return respond
+
+async def sequential(bot: Bot, store: RecipientStore) -> float:
+    """Baseline: one send after another"""
+    started = time.perf_counter()
+    for chat_id in store.iter_ids():
+        await bot.send_message(chat_id, "📣 Announcement")
+    return time.perf_counter() - started
+
+async def engine(bot: Bot, store: RecipientStore, directory: str, args) -> Dict:
+    """Broadcaster at the given rate and concurrency"""
+    broadcaster = Broadcaster(store, rate=args.rate, concurrency=args.concurrency,
+                              directory=directory, checkpoint_interval=0.5)
+    job = broadcaster.create({"text": "📣 Announcement"})
+    started = time.perf_counter()
+    await broadcaster.run(bot, job)
+    elapsed = time.perf_counter() - started
+    return {"seconds": round(elapsed, 3), "per_second": round(job.processed / elapsed, 1),
+            "sent": job.sent, "blocked": job.blocked, "failed": job.failed, "retries": job.retries}
+
+async def crash_and_resume(bot: Bot, api: FakeBotAPI, store: RecipientStore, directory: str,
+                           args) -> Dict:
+    """Kill a job halfway, resume from its checkpoint in a new Broadcaster"""
+    first = Broadcaster(store, rate=args.rate, concurrency=args.concurrency,
+                        directory=directory, checkpoint_interval=0.2)
+    job = first.create({"text": "📣 Announcement"})
+    task = first.start(bot, job)
+    while job.processed < job.total // 2:
+        await asyncio.sleep(0.01)
+    await first.close()
+    stopped_at = job.processed
+
+    second = Broadcaster(store, rate=args.rate, concurrency=args.concurrency, directory=directory)
+    resumed = second.jobs[job.job_id]
+    cursor_at = resumed.processed
+    skipped = len(resumed.done_ahead)
+    second.resume(bot)
+    await asyncio.gather(*second._tasks.values())
+    assert task.done()
+    return {"stopped_at": stopped_at, "checkpoint_at": cursor_at,
+            "done_ahead": skipped, "status": resumed.status,
+            "send_calls": api.calls.get("sendMessage", 0), "recipients": job.total,
+            "duplicates": api.calls.get("sendMessage", 0) - job.total}
+
+async def run(args) -> Dict:
+    api = FakeBotAPI(delay=args.delay).start()
+    results: Dict = {"recipients": args.recipients, "delay_s": args.delay,
+                     "rate": args.rate, "concurrency": args.concurrency}
+    try:
+        bot = Bot(BENCH_TOKEN, base_url=api.base_url,
+                  request=HTTPXRequest(connection_pool_size=args.concurrency))
+        await bot.initialize()
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = make_store(os.path.join(directory, "bot.db"), args.recipients, args.seed)
+
+            elapsed = await sequential(bot, store)
+            results["sequential"] = {"seconds": round(elapsed, 3),
+                                     "per_second": round(args.recipients / elapsed, 1)}
+
+            results["broadcaster"] = await engine(bot, store, os.path.join(directory, "a"), args)
+
+            api.calls.clear()
+            results["resume"] = await crash_and_resume(bot, api, store,
+                                                       os.path.join(directory, "b"), args)
+
+            # 2% blocked users and a flood wait every 500 sends
+            rng = random.Random(args.seed)
+            blocked = set(rng.sample(list(store.iter_ids()), args.recipients // 50))
+            api.overrides["sendMessage"] = flaky_send(api, blocked, 500)
+            results["flood_and_blocked"] = await engine(bot, store, os.path.join(directory, "c"), args)
+            results["flood_and_blocked"]["still_reachable"] = store.count()
+            api.overrides.clear()
+            await store.close()
+
+        await bot.shutdown()
+    finally:
+        api.stop()
+
+    results["speedup"] = round(results["sequential"]["seconds"]
+                               / results["broadcaster"]["seconds"], 1)
+    return results
+
+def main():
+    parser = make_parser("Benchmark resumable broadcasts against the fake Bot API")
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--delay", type=float, default=0.02, help="stub API latency in seconds")
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="messages per second (Telegram allows about 30)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    emit("broadcast", asyncio.run(run(args)), args.output)
+
+if __name__ == "__main__":
+    main()
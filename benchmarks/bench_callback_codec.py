@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_callback_codec.py - Callback Data Benchmark
+Packed codec vs delimited strings and JSON: size, encode/decode cost and routing over many handlers
+
+Usage:
+    python benchmarks/bench_callback_codec.py --presses 50000 --routes 40 -o callbacks.json
+"""
+
+import json
+import random
+import re
+import time
+from typing import Dict, List
+
+from common import emit, make_parser
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler
+
+from callback_codec import MAX_CALLBACK_BYTES, CallbackCodec
+
+FIELDS = [("chat_id", "q"), ("user_id", "Q"), ("item", "H"), ("label", "str")]
+
+def make_presses(args) -> List[Dict]:
+    """Button payloads like the bot's keyboards carry (ids, a page, a short label)"""
+    rng = random.Random(args.seed)
+    words = ["media", "rules", "welcome", "entertainment", "moderation", "সাধারণ", "বিনোদন"]
+    return [{"route": rng.randrange(args.routes), "chat_id": -1001000000000 - rng.randrange(10 ** 6),
+             "user_id": rng.randrange(10 ** 9, 8 * 10 ** 9), "item": rng.randrange(500),
+             "label": rng.choice(words)} for _ in range(args.presses)]
+
+def delimited(press: Dict) -> str:
+    return f"r{press['route']}|{press['chat_id']}|{press['user_id']}|{press['item']}|{press['label']}"
+
+def parse_delimited(data: str) -> Dict:
+    route, chat_id, user_id, item, label = data.split("|", 4)
+    return {"route": int(route[1:]), "chat_id": int(chat_id), "user_id": int(user_id),
+            "item": int(item), "label": label}
+
+def as_json(press: Dict) -> str:
+    return json.dumps(press, separators=(",", ":"), ensure_ascii=False)
+
+def timed(function, items) -> float:
+    started = time.perf_counter()
+    for item in items:
+        function(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+def size_stats(datas: List[str]) -> Dict:
+    sizes = [len(data.encode()) for data in datas]
+    return {"avg_bytes": round(sum(sizes) / len(sizes), 1), "max_bytes": max(sizes),
+            "over_limit": sum(size > MAX_CALLBACK_BYTES for size in sizes)}
+
+def main():
+    parser = make_parser("Benchmark packed callback data and O(1) routing")
+    parser.add_argument("--presses", type=int, default=50000)
+    parser.add_argument("--routes", type=int, default=40,
+                        help="button kinds, i.e. CallbackQueryHandlers without the codec")
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    presses = make_presses(args)
+    codec = CallbackCodec()
+    hits = [0] * args.routes
+
+    def make_handler(route_id):
+        async def handler(update, context, **values):
+            hits[route_id] += 1
+        return handler
+
+    for route_id in range(args.routes):
+        codec.route(route_id, f"r{route_id}", FIELDS, make_handler(route_id))
+
+    def encode(press):
+        return codec.encode(f"r{press['route']}", chat_id=press["chat_id"], user_id=press["user_id"],
+                            item=press["item"], label=press["label"])
+
+    packed = [encode(press) for press in presses]
+    strings = [delimited(press) for press in presses]
+    jsons = [as_json(press) for press in presses]
+    for press, data in zip(presses[:1000], packed):
+        route, values = codec.decode(data)
+        assert route.route_id == press["route"] and values == {
+            key: press[key] for key in ("chat_id", "user_id", "item", "label")}
+
+    results: Dict = {"presses": args.presses, "routes": args.routes}
+    results["size"] = {"codec": size_stats(packed), "delimited": size_stats(strings),
+                       "json": size_stats(jsons)}
+    results["encode_us"] = {"codec": round(timed(encode, presses), 3),
+                            "delimited": round(timed(delimited, presses), 3),
+                            "json": round(timed(as_json, presses), 3)}
+    results["decode_us"] = {"codec": round(timed(codec.decode, packed), 3),
+                            "delimited": round(timed(parse_delimited, strings), 3),
+                            "json": round(timed(json.loads, jsons), 3)}
+
+    # Routing: one regex CallbackQueryHandler per button kind, checked in order by the
+    # Application, vs the codec's single handler and route table
+    updates = {}
+    for kind, datas in (("codec", packed), ("delimited", strings)):
+        updates[kind] = [Update.de_json({"update_id": n, "callback_query": {
+            "id": str(n), "chat_instance": "1", "data": data,
+            "from": {"id": 1, "is_bot": False, "first_name": "User"}}}, None)
+            for n, data in enumerate(datas[:min(len(datas), 20000)])]
+    chain = [CallbackQueryHandler(make_handler(route_id), pattern=re.compile(rf"^r{route_id}\|"))
+             for route_id in range(args.routes)]
+
+    def route_chain(update):
+        for handler in chain:
+            if handler.check_update(update):
+                return handler
+        raise AssertionError(update.callback_query.data)
+
+    single = CallbackQueryHandler(codec.dispatch, pattern=codec.matches)
+
+    def route_codec(update):
+        assert single.check_update(update)
+        route, values = codec.decode(update.callback_query.data)
+        return route.handler
+
+    results["route_us"] = {"codec": round(timed(route_codec, updates["codec"]), 3),
+                           "handler_chain": round(timed(route_chain, updates["delimited"]), 3)}
+    results["route_speedup"] = round(results["route_us"]["handler_chain"]
+                                     / results["route_us"]["codec"], 1)
+    results["stats"] = codec.stats
+    emit("callback_codec", results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_chat_executor.py - Update Concurrency Benchmark
+Sequential vs fully concurrent vs per-chat ordered processing, through a real Application
+
+Usage:
+    python benchmarks/bench_chat_executor.py --updates 4000 --chats 200 -o executor.json
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from common import BENCH_TOKEN, FakeBotAPI, emit, make_parser, percentiles
+
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+
+from chat_executor import ChatExecutor
+
+def make_updates(args) -> List[Dict]:
+    """Group messages over many chats, one hot chat taking a share of the traffic"""
+    rng = random.Random(args.seed)
+    chats = [-1001000000000 - i for i in range(args.chats)]
+    updates = []
+    for n in range(1, args.updates + 1):
+        chat_id = chats[0] if n == 1 or rng.random() < args.hot_share else rng.choice(chats[1:])
+        updates.append({"update_id": n, "message": {
+            "message_id": n, "date": 0, "text": "/rules" if n % 3 else "/setrules",
+            "chat": {"id": chat_id, "type": "supergroup", "title": "Bench"},
+            "from": {"id": 1000 + n % 5000, "is_bot": False, "first_name": "User"}
+        }})
+    return updates
+
+class Workload:
+    """Handler doing read-modify-write on per-chat state around an API round trip"""
+
+    def __init__(self, latency: float, total: int, hot_chat: int):
+        self.latency = latency
+        self.total = total
+        self.hot_chat = hot_chat
+        self.queued_at: Dict[int, float] = {}
+        self.latencies: Dict[str, List[float]] = {"hot": [], "other": []}
+        self.state: Dict[int, int] = {}
+        self.expected: Dict[int, int] = {}
+        self.running: Dict[int, int] = {}
+        self.last_seen: Dict[int, int] = {}
+        self.overlaps = 0
+        self.out_of_order = 0
+        self.peak_tasks = 0
+        self.done = 0
+        self.finished = asyncio.Event()
+
+    async def handle(self, update, context):
+        chat_id, update_id = update.effective_chat.id, update.update_id
+        self.expected[chat_id] = self.expected.get(chat_id, 0) + 1
+        if self.running.get(chat_id):
+            self.overlaps += 1
+        if update_id < self.last_seen.get(chat_id, 0):
+            self.out_of_order += 1
+        self.last_seen[chat_id] = max(update_id, self.last_seen.get(chat_id, 0))
+        self.running[chat_id] = self.running.get(chat_id, 0) + 1
+        if update_id % 50 == 0:  # live tasks show whether admission is bounded
+            self.peak_tasks = max(self.peak_tasks, len(asyncio.all_tasks()))
+
+        value = self.state.get(chat_id, 0)
+        await asyncio.sleep(self.latency)  # e.g. getChat before saving the rules
+        self.state[chat_id] = value + 1
+
+        self.running[chat_id] -= 1
+        waited = (time.perf_counter() - self.queued_at[update_id]) * 1000
+        self.latencies["hot" if chat_id == self.hot_chat else "other"].append(waited)
+        self.done += 1
+        if self.done == self.total:
+            self.finished.set()
+
+    def lost_writes(self) -> int:
+        return sum(self.expected[chat] - self.state.get(chat, 0) for chat in self.expected)
+
+async def run_mode(api: FakeBotAPI, raw: List[Dict], mode, args) -> Dict:
+    builder = Application.builder().token(BENCH_TOKEN).base_url(api.base_url)
+    if mode is not None:
+        builder.concurrent_updates(mode)
+    if isinstance(mode, ChatExecutor):
+        builder.update_queue(mode.queue)
+    app = builder.build()
+    workload = Workload(args.latency, len(raw), raw[0]["message"]["chat"]["id"])
+    app.add_handler(MessageHandler(filters.TEXT, workload.handle))
+
+    await app.initialize()
+    await app.start()
+    updates = [Update.de_json(data, app.bot) for data in raw]
+    started = time.perf_counter()
+    for update in updates:
+        workload.queued_at[update.update_id] = time.perf_counter()
+        await app.update_queue.put(update)
+    await workload.finished.wait()
+    elapsed = time.perf_counter() - started
+    await app.stop()
+    await app.shutdown()
+
+    result = {"seconds": round(elapsed, 3), "updates_per_s": round(len(raw) / elapsed, 1),
+              "overlaps": workload.overlaps, "out_of_order": workload.out_of_order,
+              "lost_writes": workload.lost_writes(), "peak_tasks": workload.peak_tasks,
+              "other_chats_latency_ms": percentiles(workload.latencies["other"]),
+              "hot_chat_latency_ms": percentiles(workload.latencies["hot"])}
+    if isinstance(mode, ChatExecutor):
+        result["lanes"] = len(mode)
+        result["max_queued"] = mode.stats["max_queued"]
+
+        result["busiest"] = mode.busiest(3)
+        result["evicted_when_idle"] = mode.evict_idle(time.monotonic() + mode.idle_ttl + 1)
+    return result
+
+async def run(args) -> Dict:
+    api = FakeBotAPI().start()
+    raw = make_updates(args)
+    results: Dict = {"updates": args.updates, "chats": args.chats, "hot_share": args.hot_share,
+                     "latency_s": args.latency, "concurrency": args.concurrency}
+    try:
+        results["sequential"] = await run_mode(api, raw[:args.sequential_updates], None, args)
+        results["concurrent"] = await run_mode(api, raw, args.concurrency, args)
+        results["per_chat"] = await run_mode(api, raw, ChatExecutor(args.concurrency), args)
+        # Small admission window: tasks stay bounded, the producer's put() waits instead
+        results["per_chat_bounded"] = await run_mode(
+            api, raw, ChatExecutor(args.concurrency, max_pending=args.max_pending,
+                                   queue_size=args.max_pending), args)
+    finally:
+        api.stop()
+    results["speedup_vs_sequential"] = round(results["per_chat"]["updates_per_s"]
+                                             / results["sequential"]["updates_per_s"], 1)
+    return results
+
+def main():
+    parser = make_parser("Benchmark per-chat ordered update processing")
+    parser.add_argument("--updates", type=int, default=4000)
+    parser.add_argument("--sequential-updates", type=int, default=400,
+                        help="the sequential run is slow; it gets a prefix of the stream")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--hot-share", type=float, default=0.05,
+                        help="share of updates going to one busy chat")
+    parser.add_argument("--latency", type=float, default=0.01, help="handler await in seconds")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="admission limit of the bounded per-chat run")
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    emit("chat_executor", asyncio.run(run(args)), args.output)
+
+if __name__ == "__main__":
+    main()
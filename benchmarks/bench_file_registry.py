@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_file_registry.py - Media Upload Benchmark
+Uploading every send vs file_id reuse with coalesced concurrent uploads, through a local Bot API
+
+Usage:
+    python benchmarks/bench_file_registry.py --sends 2000 --distinct 40 -o file_ids.json
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from common import BENCH_TOKEN, FakeBotAPI, emit, make_parser, percentiles
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from file_registry import FileIdRegistry, MediaSender
+
+STALE_ERROR = {"ok": False, "error_code": 400,
+               "description": "Bad Request: wrong file identifier/HTTP URL specified"}
+
+def make_sends(args) -> Tuple[List[bytes], List[Tuple[int, int]]]:
+    """Distinct payloads and a popularity-skewed stream of (media index, chat id)"""
+    rng = random.Random(args.seed)
+    media = [rng.randbytes(rng.randrange(args.min_kb, args.max_kb) * 1024)
+             for _ in range(args.distinct)]
+    weights = [1 / (rank + 1) for rank in range(args.distinct)]
+    chats = [-1001000000000 - i for i in range(args.chats)]
+    sends = [(rng.choices(range(args.distinct), weights)[0], rng.choice(chats))
+             for _ in range(args.sends)]
+    return media, sends
+
+async def run_mode(api: FakeBotAPI, media: List[bytes], sends, sender, args) -> Dict:
+    bot = Bot(BENCH_TOKEN, base_url=api.base_url,
+              request=HTTPXRequest(connection_pool_size=args.concurrency))
+    await bot.initialize()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    uploaded = [0]
+
+    async def one(index: int, chat_id: int):
+        async with semaphore:
+            started = time.perf_counter()
+            if sender is None:
+                await bot.send_photo(chat_id, media[index], caption="Welcome!")
+                uploaded[0] += len(media[index])
+            else:
+                await sender.send(bot, "photo", chat_id, media[index], caption="Welcome!")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    calls_before = api.total_calls()
+    started = time.perf_counter()
+    for offset in range(0, len(sends), args.burst):
+        await asyncio.gather(*(one(index, chat_id)
+                               for index, chat_id in sends[offset:offset + args.burst]))
+    elapsed = time.perf_counter() - started
+    await bot.shutdown()
+
+    bytes_uploaded = sender.stats["bytes_uploaded"] if sender else uploaded[0]
+    result = {"seconds": round(elapsed, 3), "api_calls": api.total_calls() - calls_before,
+              "latency_ms": percentiles(latencies),
+              "mb_uploaded": round(bytes_uploaded / 2 ** 20, 2),
+              # Upload time on a slow uplink, which the local server cannot show
+              "modeled_upload_s": round(bytes_uploaded * 8 / (args.uplink_mbit * 1e6), 1)}
+    if sender is not None:
+        result["sender"] = sender.summary()
+    return result
+
+async def run(args) -> Dict:
+    media, sends = make_sends(args)
+    api = FakeBotAPI().start()
+    results: Dict = {"sends": args.sends, "distinct": args.distinct, "chats": args.chats,
+                     "burst": args.burst, "uplink_mbit": args.uplink_mbit,
+                     "total_mb": round(sum(len(media[index]) for index, _ in sends) / 2 ** 20, 2)}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "file_ids.jsonl")
+        try:
+            results["upload_every_time"] = await run_mode(api, media, sends, None, args)
+            sender = MediaSender(FileIdRegistry(path))
+            results["file_id_registry"] = await run_mode(api, media, sends, sender, args)
+
+            # Restart: the registry is replayed from disk, so nothing is uploaded again
+            restarted = MediaSender(FileIdRegistry(path))
+            results["after_restart"] = await run_mode(api, media, sends[:args.distinct * 4],
+                                                      restarted, args)
+
+            # Telegram rejecting stored ids: each is dropped and uploaded once more
+            stale = set(restarted.registry._ids.values())
+            api.overrides["sendPhoto"] = lambda params: (
+                STALE_ERROR if params.get("photo") in stale
+                else {"ok": True, "result": api._result("sendPhoto", params)})
+            rejected = MediaSender(restarted.registry)
+            results["stale_ids"] = await run_mode(api, media, sends[:args.distinct * 4],
+                                                  rejected, args)
+            results["log_lines"] = rejected.registry._lines
+        finally:
+            api.stop()
+
+    results["upload_reduction"] = round(results["upload_every_time"]["mb_uploaded"]
+                                        / max(results["file_id_registry"]["mb_uploaded"], 0.01), 1)
+    return results
+
+def main():
+    parser = make_parser("Benchmark file_id reuse for repeated media")
+    parser.add_argument("--sends", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=40, help="distinct media payloads")
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--min-kb", type=int, default=40)
+    parser.add_argument("--max-kb", type=int, default=240)
+    parser.add_argument("--burst", type=int, default=50, help="sends started together")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--uplink-mbit", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=23)
+    args = parser.parse_args()
+
+    emit("file_registry", asyncio.run(run(args)), args.output)
+
+if __name__ == "__main__":
+    main()
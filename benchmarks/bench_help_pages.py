@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_help_pages.py - Help Page Benchmark
+Rendering /help on every call vs serving prebuilt pages, plus invalidation cost
+
+Usage:
+    python benchmarks/bench_help_pages.py --calls 20000 -o help.json
+"""
+
+import random
+import time
+from typing import Dict
+
+from common import emit, make_parser
+
+from help_pages import ALL, LANGUAGES, HelpPages
+
+class BenchConfigFeatures:
+    """Feature switches as the vault would return them (each read costs a decrypt)"""
+
+    def __init__(self, read_cost: float):
+        self.read_cost = read_cost
+        self.features = {"admin_controls": True, "image_generator": True}
+
+    def get_features(self):
+        if self.read_cost:
+            time.sleep(self.read_cost)
+        return dict(self.features)
+
+    def is_admin(self, user_id):
+        return user_id == 1
+
+def main():
+    parser = make_parser("Benchmark prebuilt /help pages")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--vault-read-ms", type=float, default=0.0,
+                        help="simulated cost of one vault read")
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+
+    config = BenchConfigFeatures(args.vault_read_ms / 1000)
+    pages = HelpPages(config)
+    rng = random.Random(args.seed)
+    categories = [ALL] + pages.categories
+    requests = [(rng.choice(categories), rng.random() < 0.1, rng.random() < 0.7,
+                 rng.choice(LANGUAGES), rng.randrange(2)) for _ in range(args.calls)]
+
+    # Baseline: what a per-call /help does - filter, style and build the keyboard each time
+    started = time.perf_counter()
+    for category, is_admin, is_group, language, number in requests:
+        pages.invalidate()
+        pages.page(category, is_admin, is_group, language, number)
+    per_call_s = time.perf_counter() - started
+
+    pages.invalidate()
+    started = time.perf_counter()
+    pages.warm()
+    warm_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for category, is_admin, is_group, language, number in requests:
+        pages.page(category, is_admin, is_group, language, number)
+    cached_s = time.perf_counter() - started
+
+    callback_bytes = max(len(button.callback_data.encode())
+                         for key_pages in pages._pages.values() for page in key_pages
+                         for row in page.reply_markup.inline_keyboard for button in row)
+
+    results: Dict = {
+        "calls": args.calls, "combinations": len(pages._pages),
+        "pages": sum(len(key_pages) for key_pages in pages._pages.values()),
+        "render_per_call_us": round(per_call_s / args.calls * 1e6, 2),
+        "cached_us": round(cached_s / args.calls * 1e6, 3),
+        "speedup": round(per_call_s / cached_s, 1),
+        "warm_all_ms": round(warm_ms, 2),
+        "max_callback_bytes": callback_bytes,
+        "stats": pages.stats
+    }
+    emit("help_pages", results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_image_templates.py - Template Rendering Benchmark
+Renders per second per core: pre-rasterized templates vs cold rendering
+
+Usage:
+    python benchmarks/bench_image_templates.py -o templates.json
+"""
+
+import io
+import os
+import random
+import time
+from typing import Dict, List
+
+from common import emit, make_parser, peak_rss_mb
+
+from PIL import Image
+
+from image_templates import TEMPLATES, TemplateRenderer
+
+NAMES = ["Nila", "রাহাত", "Ayesha Khan", "সুমাইয়া", "John_99", "তানভীর আহমেদ"]
+
+def make_avatars(count: int, seed: int) -> List[bytes]:
+    """JPEG avatars like Telegram profile photos (640x640)"""
+    rng = random.Random(seed)
+    avatars = []
+    for _ in range(count):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        image = Image.new("RGB", (640, 640), color)
+        image.paste(tuple(255 - c for c in color), (160, 160, 480, 480))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        avatars.append(buffer.getvalue())
+    return avatars
+
+def measure(render, renders: int, avatars: List[bytes]) -> float:
+    """Renders per second of a single-threaded render callable"""
+    started = time.perf_counter()
+    for i in range(renders):
+        render(avatars[i % len(avatars)], NAMES[i % len(NAMES)])
+    return renders / (time.perf_counter() - started)
+
+def main():
+    parser = make_parser("Benchmark pre-rasterized vs cold template rendering")
+    parser.add_argument("--renders", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    avatars = make_avatars(8, args.seed)
+    renderer = TemplateRenderer()
+
+    started = time.perf_counter()
+    renderer.preload()
+    preload_ms = (time.perf_counter() - started) * 1000
+
+    results: Dict = {"preload_ms": round(preload_ms, 2), "cpu_count": os.cpu_count(), "templates": {}}
+    for name in TEMPLATES:
+        warm = measure(lambda a, n: renderer.render(name, a, n), args.renders, avatars)
+        cold = measure(lambda a, n: renderer.render_cold(name, a, n), args.renders, avatars)
+        results["templates"][name] = {
+            "warm_renders_per_s_per_core": round(warm, 1),
+            "cold_renders_per_s_per_core": round(cold, 1),
+            "speedup": round(warm / cold, 2)
+        }
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    emit("image_templates", results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_joins.py - Join Burst Benchmark
+API calls and drain time for a raid: per-join welcomes vs JoinBatcher windows
+
+Usage:
+    python benchmarks/bench_joins.py -o joins.json
+"""
+
+import asyncio
+import random
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from common import BENCH_GROUP_ID, BENCH_TOKEN, FakeBotAPI, emit, make_parser
+
+from telegram import Bot, Chat, User
+
+from avatar_fetcher import AvatarDiskCache, AvatarFetcher
+from bench_avatar import make_photo
+from join_batcher import JoinBatcher, render_collage
+
+def make_raid(api: FakeBotAPI, joins: int, seed: int) -> List[User]:
+    """Joining users, most with a profile photo"""
+    rng = random.Random(seed)
+    users = []
+    for i in range(joins):
+        user_id = 10_000 + i
+        if rng.random() < 0.7:
+            api.files[f"avatar{user_id}"] = make_photo(rng)
+            api.profile_photos[user_id] = f"avatar{user_id}"
+        users.append(User(user_id, f"Raider{i}", False))
+    return users
+
+async def arrive(users: List[User], duration: float, on_join):
+    """Deliver joins evenly over duration seconds"""
+    interval = duration / len(users)
+    for user in users:
+        on_join(user)
+        await asyncio.sleep(interval)
+
+async def per_join(bot: Bot, chat: Chat, users: List[User], duration: float,
+                   fetcher: AvatarFetcher) -> float:
+    """Baseline: DM, group message and generated image for every join"""
+    tasks = []
+
+    async def welcome(user: User):
+        await bot.send_message(user.id, f"👋 Welcome to {chat.title}!")
+        await bot.send_message(chat.id, f"Welcome {user.mention_html()}", parse_mode="HTML")
+        avatar = await fetcher.fetch(bot, user.id)
+        image = await asyncio.get_running_loop().run_in_executor(None, render_collage, [avatar])
+        await bot.send_photo(chat.id, image)
+
+    started = time.perf_counter()
+    await arrive(users, duration, lambda user: tasks.append(asyncio.ensure_future(welcome(user))))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+async def batched(bot: Bot, chat: Chat, users: List[User], duration: float,
+                  fetcher: AvatarFetcher, window: float, dm_rate: float) -> Tuple[float, Dict]:
+    """JoinBatcher: one welcome per window, rate-limited DMs"""
+    batcher = JoinBatcher(avatars=fetcher, window=window, dm_rate=dm_rate)
+    started = time.perf_counter()
+    await arrive(users, duration, lambda user: batcher.add(bot, chat, [user]))
+    await batcher.close()
+    return time.perf_counter() - started, batcher.stats
+
+async def run(args) -> Dict:
+    api = FakeBotAPI(delay=args.delay).start()
+    results: Dict = {"joins": args.joins, "duration_s": args.duration, "window_s": args.window}
+    try:
+        users = make_raid(api, args.joins, args.seed)
+        chat = Chat(BENCH_GROUP_ID, "supergroup", title="Nila Bench")
+        bot = Bot(BENCH_TOKEN, base_url=api.base_url, base_file_url=api.base_file_url)
+        await bot.initialize()
+
+        with tempfile.TemporaryDirectory() as directory:
+            api.calls.clear()
+            fetcher = AvatarFetcher(AvatarDiskCache(directory + "/a"))
+            elapsed = await per_join(bot, chat, users, args.duration, fetcher)
+            results["per_join"] = {"drain_s": round(elapsed, 3), "api_calls": dict(api.calls),
+                                   "group_posts": api.calls.get("sendMessage", 0) // 2
+                                   + api.calls.get("sendPhoto", 0)}
+            await fetcher.close()
+
+            api.calls.clear()
+            fetcher = AvatarFetcher(AvatarDiskCache(directory + "/b"))
+            elapsed, stats = await batched(bot, chat, users, args.duration, fetcher,
+                                           args.window, args.dm_rate)
+            results["batched"] = {"drain_s": round(elapsed, 3), "api_calls": dict(api.calls),
+                                  "group_posts": stats["group_messages"], "stats": stats}
+            await fetcher.close()
+
+        await bot.shutdown()
+    finally:
+        api.stop()
+
+    results["group_post_reduction"] = round(
+        results["per_join"]["group_posts"] / max(1, results["batched"]["group_posts"]), 1
+    )
+    return results
+
+def main():
+    parser = make_parser("Benchmark welcome traffic during a join raid")
+    parser.add_argument("--joins", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=3.0, help="raid length in seconds")
+    parser.add_argument("--window", type=float, default=0.5)
+    parser.add_argument("--dm-rate", type=float, default=200.0, help="DMs per second")
+    parser.add_argument("--delay", type=float, default=0.0, help="stub API latency in seconds")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    emit("joins", asyncio.run(run(args)), args.output)
+
+if __name__ == "__main__":
+    main()
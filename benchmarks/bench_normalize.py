@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_normalize.py - Text Normalization Benchmark
+StylishText.normalize vs per-message NFKC plus custom folding, on mixed Bangla/English/styled input
+
+Usage:
+    python benchmarks/bench_normalize.py --messages 20000 -o normalize.json
+"""
+
+import random
+import time
+import unicodedata
+from typing import Callable, Dict, List
+
+from common import emit, make_parser
+
+from stylish_text import ZERO_WIDTH, StylishText
+
+ENGLISH = [
+    "hello everyone, welcome to the group", "please read the rules before posting",
+    "anyone up for a match tonight?", "free bitcoin giveaway, click the link now",
+    "the meeting moved to 7pm", "check my channel for more updates"
+]
+BANGLA = [
+    "আসসালামু আলাইকুম সবাইকে", "গ্রুপের নিয়মগুলো পড়ে নিন", "আজকে খেলা হবে কি?",
+    "ফ্রি বিটকয়েন পেতে লিংকে ক্লিক করুন", "র‍্যাব এর খবর দেখেছেন?", "সবাই কেমন আছেন"
+]
+KEYWORD = "free bitcoin"
+
+def styled(text: str, rng: random.Random) -> str:
+    """English text in a random style, word by word"""
+    styles = StylishText.get_all_styles()
+    return " ".join(StylishText.generate(word, rng.choice(styles), add_emoji=False)
+                    for word in text.split())
+
+def evasive(text: str, rng: random.Random) -> str:
+    """Styled text with invisible characters between letters"""
+    return "".join(char + (rng.choice(ZERO_WIDTH) if rng.random() < 0.3 else "")
+                   for char in styled(text, rng))
+
+def evasive_spaces(text: str, rng: random.Random) -> str:
+    """Styled text whose spaces are replaced by invisible characters"""
+    return "".join(rng.choice(ZERO_WIDTH) if char == " " else char for char in styled(text, rng))
+
+def make_corpus(count: int, seed: int) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    return {
+        "english": [rng.choice(ENGLISH) for _ in range(count)],
+        "bangla": [rng.choice(BANGLA) for _ in range(count)],
+        "mixed": [rng.choice(ENGLISH) + " " + rng.choice(BANGLA) for _ in range(count)],
+        "styled": [styled(rng.choice(ENGLISH), rng) for _ in range(count)],
+        "evasive": [evasive(KEYWORD + " now", rng) for _ in range(count)],
+        "evasive_spaces": [evasive_spaces(KEYWORD + " now", rng) for _ in range(count)]
+    }
+
+def build_reverse_map() -> Dict[str, str]:
+    """What a filter would build by hand from STYLES"""
+    reverse = {}
+    for style in StylishText.STYLES.values():
+        for plain, glyph in style.items():
+            reverse[glyph] = plain
+    return reverse
+
+REVERSE = build_reverse_map()
+
+def per_message(text: str) -> str:
+    """Baseline: per-character reverse lookup, zero-width replace, NFKC, casefold"""
+    text = "".join(REVERSE.get(char, char) for char in text)
+    for char in ZERO_WIDTH:
+        text = text.replace(char, "")
+    return unicodedata.normalize("NFKC", text).casefold()
+
+def nfkc_only(text: str) -> str:
+    """NFKC + casefold without style folding"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+def measure(fold: Callable[[str], str], messages: List[str]) -> Dict:
+    started = time.perf_counter()
+    for text in messages:
+        fold(text)
+    elapsed = time.perf_counter() - started
+    chars = sum(len(text) for text in messages)
+    return {"msgs_per_s": round(len(messages) / elapsed), "mchars_per_s": round(chars / elapsed / 1e6, 2)}
+
+def main():
+    parser = make_parser("Benchmark StylishText.normalize")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages, args.seed)
+    started = time.perf_counter()
+    StylishText.normalize("𝗪𝗮𝗿𝗺 𝘂𝗽")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results: Dict = {"messages": args.messages, "table_entries": len(StylishText._fold_table),
+                     "table_build_ms": round(build_ms, 2), "kinds": {}}
+    folds = {"normalize": StylishText.normalize, "per_message": per_message, "nfkc_only": nfkc_only}
+    for kind, messages in corpus.items():
+        row = {name: measure(fold, messages) for name, fold in folds.items()}
+        row["speedup"] = round(row["normalize"]["msgs_per_s"] / row["per_message"]["msgs_per_s"], 1)
+        results["kinds"][kind] = row
+
+    # Keyword recall on evasive spam. Invisible characters standing in for the space
+    # join the words, so that case only matches a space-free keyword
+    joined = KEYWORD.replace(" ", "")
+    for kind, keyword in (("evasive", KEYWORD), ("evasive_spaces", KEYWORD),
+                          ("evasive_spaces", joined)):
+        label = f"{kind}_recall" if keyword == KEYWORD else f"{kind}_recall_joined_keyword"
+        results[label] = {
+            name: round(sum(keyword in fold(text) for text in corpus[kind]) / args.messages, 3)
+            for name, fold in folds.items()
+        }
+    emit("normalize", results, args.output)
+
+if __name__ == "__main__":
+    main()
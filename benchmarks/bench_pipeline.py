@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_pipeline.py - Offline Update Pipeline Benchmark
+Builds NilaBot against a local fake Bot API and replays an update stream
+
+Usage:
+    python benchmarks/bench_pipeline.py --updates 5000 -o pipeline.json
+    python benchmarks/bench_pipeline.py --replay recorded_updates.jsonl
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List
+
+from common import (
+    BenchConfig, FakeBotAPI, emit, make_parser, peak_rss_mb, percentiles, synthetic_updates
+)
+
+from telegram import Update
+from telegram.ext import Application
+
+from master import NilaBot
+
+class BenchBot(NilaBot):
+    """NilaBot pointed at the fake Bot API"""
+
+    def __init__(self, config_manager, api: FakeBotAPI):
+        super().__init__(config_manager)
+        self.api = api
+
+    def _build_application(self, bot_token):
+        return (
+            Application.builder()
+            .token(bot_token)
+            .base_url(self.api.base_url)
+            .base_file_url(self.api.base_file_url)
+            .concurrent_updates(self.executor)
+            .update_queue(self.executor.queue)
+            .build()
+        )
+
+def load_updates(path: str) -> List[Dict]:
+    """Load a recorded stream (one raw update JSON per line)"""
+    updates = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                update = json.loads(line)
+                update.setdefault("_kind", "recorded")
+                updates.append(update)
+    return updates
+
+async def replay(app: Application, updates: List[Dict], concurrency: int) -> Dict:
+    """Feed updates through the update processor (as the Application's fetcher does) and time each one"""
+    queue = asyncio.Queue()
+    for raw in updates:
+        queue.put_nowait(raw)
+
+    latencies: Dict[str, List[float]] = {}
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                raw = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            kind = raw.get("_kind", "recorded")
+            data = {k: v for k, v in raw.items() if not k.startswith("_")}
+            update = Update.de_json(data, app.bot)
+
+            started = time.perf_counter()
+            try:
+                await app.update_processor.process_update(update, app.process_update(update))
+            except Exception:
+                errors += 1
+            latencies.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [ms for samples in latencies.values() for ms in samples]
+    return {
+        "updates": len(all_latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_ups": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": percentiles(all_latencies),
+        "latency_ms_by_kind": {kind: percentiles(samples) for kind, samples in latencies.items()}
+    }
+
+async def run(args) -> Dict:
+    """Start fake API, build bot, replay and collect results"""
+    features = {name: True for name in ("welcome", "security", "auto_response")}
+    updates = load_updates(args.replay) if args.replay else synthetic_updates(args.updates, args.seed)
+
+    with FakeBotAPI(delay=args.api_delay / 1000) as api:
+        bot = BenchBot(BenchConfig(features, watchdog=args.watchdog), api)
+
+        started = time.perf_counter()
+        await bot.build()
+        await bot.app.initialize()
+        startup_ms = (time.perf_counter() - started) * 1000
+
+        # Warm-up pass is excluded from measurement
+        if args.warmup:
+            await replay(bot.app, updates[:args.warmup], args.concurrency)
+            api.calls.clear()
+
+        results = await replay(bot.app, updates, args.concurrency)
+        results.update({
+            "startup_ms": round(startup_ms, 2),
+            "concurrency": args.concurrency,
+            "peak_rss_mb": peak_rss_mb(),
+            "api_calls": dict(api.calls)
+        })
+
+        if bot.watchdog:
+            await bot.watchdog.stop()
+        await bot.app.shutdown()
+
+    return results
+
+def main():
+    parser = make_parser("Replay updates through NilaBot against a fake Bot API")
+    parser.add_argument("--updates", type=int, default=2000, help="Synthetic update count")
+    parser.add_argument("--replay", help="JSONL file of recorded raw updates")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--api-delay", type=float, default=0.0, help="Fake API delay (ms)")
+    parser.add_argument("--watchdog", action="store_true", help="Run with loop watchdog")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    emit("pipeline", asyncio.run(run(args)), args.output)
+
+if __name__ == "__main__":
+    main()
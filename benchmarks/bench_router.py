@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_router.py - Command Dispatch Cost Benchmark
+Per-handler filter chain vs the single pre-dispatch CommandRouter
+
+Usage:
+    python benchmarks/bench_router.py -o router.json
+"""
+
+import asyncio
+import re
+import time
+from typing import Dict, List
+
+from common import BENCH_TOKEN, BenchConfig, FakeBotAPI, emit, make_parser, synthetic_updates
+
+from telegram import Bot, Update
+from telegram.ext import CommandHandler, MessageHandler, filters
+
+from COMMAND_REGISTRY import COMMANDS
+from command_router import CommandRouter
+
+ASCII_COMMAND = re.compile(r"^[a-z0-9_]{1,32}$")
+
+async def noop(update, context):
+    pass
+
+def filter_chain() -> List:
+    """Handlers as they would be registered without the router"""
+    handlers = []
+    for name, command in COMMANDS.items():
+        names = [name] + command["aliases"]
+        ascii_names = [n for n in names if ASCII_COMMAND.match(n)]
+        other_names = [n for n in names if not ASCII_COMMAND.match(n)]
+
+        handlers.append(CommandHandler(ascii_names, noop))
+        if other_names:
+            pattern = r"^/(" + "|".join(map(re.escape, other_names)) + r")(\s|$)"
+            handlers.append(MessageHandler(filters.Regex(pattern), noop))
+    return handlers
+
+def chain_dispatch(handlers: List, update: Update):
+    """What the dispatcher does per update: try handlers in order"""
+    evaluated = 0
+    for handler in handlers:
+        evaluated += 1
+        if handler.check_update(update):
+            return handler, evaluated
+    return None, evaluated
+
+async def router_dispatch(router: CommandRouter, update: Update, username: str):
+    """Router resolution plus registry checks"""
+    resolved = router.resolve(update.effective_message.text or "", username)
+    if resolved is None:
+        return None
+    return await router.check(resolved[0], update, None)
+
+async def run(args) -> Dict:
+    with FakeBotAPI() as api:
+        bot = Bot(BENCH_TOKEN, base_url=api.base_url)
+        await bot.initialize()
+
+        raw = [u for u in synthetic_updates(args.updates, args.seed) if u["_kind"] != "join"]
+        updates = [Update.de_json({k: v for k, v in u.items() if not k.startswith("_")}, bot)
+                   for u in raw]
+
+        features = {name: True for name in ("welcome", "security", "auto_response")}
+        router = CommandRouter(BenchConfig(features))
+        for name in COMMANDS:
+            router.bind(name, noop)
+        handlers = filter_chain()
+
+        evaluations = 0
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            for update in updates:
+                evaluations += chain_dispatch(handlers, update)[1]
+        chain_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            for update in updates:
+                await router_dispatch(router, update, bot.username)
+        router_s = time.perf_counter() - started
+
+        await bot.shutdown()
+
+    total = len(updates) * args.rounds
+    return {
+        "updates": total,
+        "handlers_in_chain": len(handlers),
+        "chain_evaluations_per_update": round(evaluations / total, 2),
+        "chain_us_per_update": round(chain_s / total * 1e6, 3),
+        "router_us_per_update": round(router_s / total * 1e6, 3),
+        "speedup": round(chain_s / router_s, 2)
+    }
+
+def main():
+    parser = make_parser("Compare per-handler filter dispatch with the CommandRouter")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    emit("router", asyncio.run(run(args)), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_spam_guard.py - Spam Wave Detection Benchmark
+Precision, recall and per-message latency of SpamIndex vs exact-text matching on a synthetic corpus
+
+Usage:
+    python benchmarks/bench_spam_guard.py --messages 50000 --spam-share 0.1 -o spam.json
+"""
+
+import random
+import time
+import tracemalloc
+from typing import Dict, List, Set, Tuple
+
+from common import emit, make_parser, peak_rss_mb, percentiles
+
+from spam_guard import SpamIndex, spam_text
+from stylish_text import ZERO_WIDTH, StylishText
+
+TEMPLATES = [
+    "🔥 FREE BITCOIN giveaway! Join our channel t.me/{w} and claim {n} BTC now, limited slots!!",
+    "Earn ${n} per day working from home, no experience needed. DM @{w} for details",
+    "অনলাইনে আয় করুন প্রতিদিন {n} টাকা, যোগাযোগ করুন @{w} এখনই",
+    "Hot singles in your area want to meet you, visit {w}.com today and get {n} free credits",
+    "Investment opportunity: double your money in {n} days guaranteed, contact {w} on whatsapp",
+    "💰 Crypto signals group with {n}% accuracy, first week free, join t.me/{w}",
+    "ফ্রি তে নেটফ্লিক্স প্রিমিয়াম পেতে এখানে ক্লিক করুন {w}.xyz মাত্র {n} জন বাকি",
+    "Selling verified accounts and followers, {n}k for cheap, message @{w} fast",
+    "Congratulations! You have been selected for a {n} USDT airdrop, connect wallet at {w}.io",
+    "Need a loan? Instant approval up to {n} lakh without documents, call {w} today"
+]
+ENGLISH = ("the a is are was we you they this that game match today tomorrow tonight meeting "
+           "rules group admin please thanks help question answer python code bug update phone "
+           "movie song music food lunch dinner rain weather exam class teacher friend family "
+           "going coming home work office late early really think know want need good bad "
+           "new old problem fixed broken link photo video call later sure maybe why how what").split()
+BANGLA = ("আমি তুমি আমরা সবাই আজকে কালকে খেলা ক্লাস পরীক্ষা বৃষ্টি খাবার বাসা অফিস কাজ ভালো "
+          "খারাপ কেন কিভাবে কি হবে হয়েছে দেখো শুনো বলো ধন্যবাদ ভাই আপু গান সিনেমা ছবি").split()
+# Legitimate phrases many members post in many groups
+COMMON = [
+    "good morning everyone, have a nice day", "happy birthday bro, many many happy returns",
+    "ঈদ মোবারক সবাইকে, ভালো থাকবেন সবাই", "thanks a lot for adding me to this group"
+]
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 9)))
+
+def mutate(template: str, rng: random.Random) -> str:
+    """A wave copy: new link and amount, then up to three evasions"""
+    text = template.replace("{w}", random_word(rng)).replace("{n}", str(rng.randint(1, 999)))
+    words = text.split()
+    for _ in range(rng.randint(0, 3)):
+        op, i = rng.random(), rng.randrange(len(words))
+        if op < 0.3:
+            style = rng.choice(StylishText.get_all_styles())
+            words[i] = StylishText.generate(words[i], style, add_emoji=False)
+        elif op < 0.5:
+            words.insert(i, rng.choice(["🔥", "💰", "✅", "!!", "👉"]))
+        elif op < 0.7:
+            j = rng.randrange(len(words[i]))
+            words[i] = words[i][:j] + rng.choice(ZERO_WIDTH) + words[i][j:]
+        elif op < 0.85:
+            j = rng.randrange(len(words[i]))
+            words[i] = words[i][:j] + rng.choice("abcdefghijklmnopqrstuvwxyz") + words[i][j + 1:]
+        elif len(words) > 4:
+            words.pop(i)
+    return " ".join(words)
+
+def chatter(rng: random.Random) -> str:
+    if rng.random() < 0.05:
+        return rng.choice(COMMON)
+    vocab = BANGLA if rng.random() < 0.4 else ENGLISH
+    return " ".join(rng.choice(vocab) for _ in range(rng.randint(3, 16)))
+
+# (time, chat_id, user_id, text, wave or -1)
+Message = Tuple[float, int, int, str, int]
+
+def make_corpus(args) -> List[Message]:
+    """Chatter spread over an hour across chats, plus spam waves of 10-60 copies"""
+    rng = random.Random(args.seed)
+    chats = [-1001000000000 - i for i in range(args.chats)]
+    duration = 3600.0
+    spam = int(args.messages * args.spam_share)
+    messages: List[Message] = []
+    for _ in range(args.messages - spam):
+        messages.append((rng.uniform(0, duration), rng.choice(chats),
+                         rng.randint(1, 50000), chatter(rng), -1))
+
+    wave = 0
+    while spam > 0:
+        copies = min(spam, rng.randint(10, 60))
+        template = rng.choice(TEMPLATES)
+        start, spread = rng.uniform(0, duration - 300), rng.uniform(30, 300)
+        bots = [rng.randint(100000, 200000) for _ in range(rng.randint(1, 8))]
+        for _ in range(copies):
+            messages.append((start + rng.uniform(0, spread), rng.choice(chats),
+                             rng.choice(bots), mutate(template, rng), wave))
+        spam -= copies
+        wave += 1
+    messages.sort()
+    return messages
+
+def score(caught: Set[int], messages: List[Message]) -> Dict:
+    spam = {i for i, message in enumerate(messages) if message[4] >= 0}
+    hits = len(caught & spam)
+    return {"flagged": len(caught), "precision": round(hits / len(caught), 4) if caught else 1.0,
+            "recall": round(hits / len(spam), 4) if spam else 1.0,
+            "false_positives": len(caught - spam)}
+
+def run_index(messages: List[Message], args, bands: int) -> Dict:
+    """Replay through SpamIndex with SpamGuard's flag/delete rule"""
+    index = SpamIndex(window=args.window, max_entries=args.max_entries, bands=bands)
+    caught: Set[int] = set()
+    latencies = []
+    for i, (now, chat_id, user_id, text, _) in enumerate(messages):
+        started = time.perf_counter()
+        cluster = index.add(text, chat_id, user_id, i, now=now)
+        latencies.append((time.perf_counter() - started) * 1e6)
+        if index.is_spam(cluster, user_id):
+            caught.update(message_id for _, message_id in index.flag(cluster, user_id))
+            caught.add(i)
+    result = score(caught, messages)
+    result.update({"latency_us": percentiles(latencies),
+                   "msgs_per_s": round(len(messages) / (sum(latencies) / 1e6)),
+                   "entries": len(index), "index_mb": round(index.memory_bytes() / 2 ** 20, 2)})
+    return result
+
+def run_exact(messages: List[Message], args) -> Dict:
+    """Baseline: same rule, but copies must have identical normalized text"""
+    seen: Dict[str, List[Tuple[float, int, int, int]]] = {}
+    caught: Set[int] = set()
+    for i, (now, chat_id, user_id, text, _) in enumerate(messages):
+        key = spam_text(text)
+        if len(key) < 24:
+            continue
+        recent = [entry for entry in seen.get(key, []) if entry[0] >= now - args.window]
+        recent.append((now, chat_id, user_id, i))
+        seen[key] = recent
+        own = [entry for entry in recent if entry[2] == user_id]
+        if len(recent) >= 3 and len({entry[1] for entry in own}) >= 2:
+            caught.update(entry[3] for entry in own)
+    return score(caught, messages)
+
+def bounded_memory(messages: List[Message], args) -> Dict:
+    """Heap held by an index fed far more messages than it keeps"""
+    tracemalloc.start()
+    index = SpamIndex(window=1e9, max_entries=args.max_entries // 4)
+    for i, (now, chat_id, user_id, text, _) in enumerate(messages):
+        index.add(text, chat_id, user_id, i, now=now)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"max_entries": index.capacity, "fed": len(messages), "entries": len(index),
+            "heap_mb": round(held / 2 ** 20, 2)}
+
+def main():
+    parser = make_parser("Benchmark near-duplicate spam detection")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--spam-share", type=float, default=0.1)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--window", type=float, default=600.0)
+    parser.add_argument("--max-entries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    messages = make_corpus(args)
+    results: Dict = {"messages": len(messages), "spam": sum(1 for m in messages if m[4] >= 0),
+                     "waves": len({m[4] for m in messages if m[4] >= 0})}
+    results["exact"] = run_exact(messages, args)
+    for bands in (4, 8, 16):
+        results[f"minhash_{bands}_bands"] = run_index(messages, args, bands)
+    results["memory_bound"] = bounded_memory(messages, args)
+    results["peak_rss_mb"] = peak_rss_mb()
+    emit("spam_guard", results, args.output)
+
+if __name__ == "__main__":
+    main()
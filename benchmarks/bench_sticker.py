@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_sticker.py - Sticker Pipeline Benchmark
+Latency and peak RSS: vectorized NumPy pipeline vs pure-Pillow per-pixel path
+
+Usage:
+    python benchmarks/bench_sticker.py -o sticker.json
+"""
+
+import io
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+
+from common import emit, make_parser, percentiles, peak_rss_mb
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from sticker_tools import StickerMaker, cv2, fit_size, make_sticker
+
+def make_sources(count: int, size: int, seed: int) -> List[bytes]:
+    """PNG cut-outs: an opaque blob on a transparent canvas with wide margins"""
+    rng = random.Random(seed)
+    sources = []
+    for _ in range(count):
+        image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x, y = rng.randrange(size // 4, size // 2), rng.randrange(size // 4, size // 2)
+            r = rng.randrange(size // 10, size // 5)
+            color = tuple(rng.randrange(256) for _ in range(3)) + (255,)
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        sources.append(buffer.getvalue())
+    return sources
+
+def pillow_sticker(source: bytes, max_size: int = 512, border: int = 8,
+                   border_color=(255, 255, 255)) -> bytes:
+    """Reference: per-pixel crop scan and compositing, resize then thumbnail"""
+    image = Image.open(io.BytesIO(source)).convert("RGBA")
+    width, height = image.size
+    pixels = image.load()
+
+    # Bounding box by visiting every pixel
+    left, top, right, bottom = width, height, 0, 0
+    for y in range(height):
+        for x in range(width):
+            if pixels[x, y][3] > 8:
+                left, top = min(left, x), min(top, y)
+                right, bottom = max(right, x + 1), max(bottom, y + 1)
+    if right > left:
+        image = image.crop((left, top, right, bottom))
+
+    content = max_size - 2 * border
+    image = image.resize(fit_size(image.height, image.width, content * 2), Image.LANCZOS)
+    image.thumbnail((content, content), Image.LANCZOS)
+
+    # Border: Pillow max filter on alpha, then per-pixel compositing
+    canvas = Image.new("RGBA", (image.width + 2 * border, image.height + 2 * border), (0, 0, 0, 0))
+    canvas.paste(image, (border, border))
+    grown = canvas.getchannel("A").filter(ImageFilter.MaxFilter(2 * border + 1)).load()
+    src = canvas.load()
+    out = canvas.copy()
+    dst = out.load()
+    br, bg, bb = border_color
+    for y in range(canvas.height):
+        for x in range(canvas.width):
+            r, g, b, a = src[x, y]
+            dst[x, y] = ((r * a + br * (255 - a)) // 255, (g * a + bg * (255 - a)) // 255,
+                         (b * a + bb * (255 - a)) // 255, max(a, grown[x, y]))
+
+    output = io.BytesIO()
+    out.save(output, "WEBP", quality=90, method=4)
+    return output.getvalue()
+
+PATHS: Dict[str, Callable[[bytes], bytes]] = {
+    "vectorized": lambda source: make_sticker(source, border=8),
+    "per_pixel": pillow_sticker
+}
+
+def measure(path: str, sources: List[bytes]) -> Dict:
+    """Per-image latency percentiles and peak RSS (runs in a fresh process)"""
+    fn = PATHS[path]
+    fn(sources[0])  # warm-up: codecs, lazy imports
+
+    latencies = []
+    for source in sources:
+        started = time.perf_counter()
+        fn(source)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"latency_ms": percentiles(latencies), "peak_rss_mb": peak_rss_mb()}
+
+def measure_isolated(path: str, sources: List[bytes]) -> Dict:
+    """
+    measure() in a spawned child
+
+    Pillow's pixel buffers are invisible to tracemalloc, so each path gets
+    its own process and its own RSS high-water mark.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(measure, path, sources).result()
+
+def main():
+    parser = make_parser("Benchmark vectorized vs per-pixel sticker processing")
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--size", type=int, default=1024, help="source image side in px")
+    parser.add_argument("--pack", type=int, default=30, help="images in the batch run")
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+
+    sources = make_sources(args.images, args.size, args.seed)
+
+    results: Dict = {
+        "source_px": args.size,
+        "dilation": "opencv" if cv2 is not None else "numpy",
+        "vectorized": measure_isolated("vectorized", sources),
+        "per_pixel": measure_isolated("per_pixel", sources)
+    }
+    results["speedup_p50"] = round(
+        results["per_pixel"]["latency_ms"]["p50"] / results["vectorized"]["latency_ms"]["p50"], 1
+    )
+
+    pack = make_sources(args.pack, args.size, args.seed + 1)
+    maker = StickerMaker()
+    started = time.perf_counter()
+    maker.make_pack(pack)
+    elapsed = time.perf_counter() - started
+    results["pack"] = {"images": len(pack), "total_s": round(elapsed, 3),
+                       "images_per_s": round(len(pack) / elapsed, 1)}
+
+    emit("sticker", results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_timing_wheel.py - Timer Scheduler Benchmark
+1M pending timers: timing wheel vs one sleeping task per timer vs loop.call_later
+
+Usage:
+    python benchmarks/bench_timing_wheel.py --timers 1000000 -o timers.json
+    python benchmarks/bench_timing_wheel.py --baseline-tasks 100000
+"""
+
+import asyncio
+import gc
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+from common import emit, make_parser, peak_rss_mb
+
+from timing_wheel import TimingWheel
+
+def make_delays(count: int, horizon: float, seed: int) -> List[float]:
+    """Delays spread over the horizon (welcome deletes, mutes, reminders)"""
+    rng = random.Random(seed)
+    return [rng.uniform(1.0, horizon) for _ in range(count)]
+
+def traced_bytes(build) -> int:
+    """Python heap bytes held by whatever build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+def bench_wheel(delays: List[float], args) -> Dict:
+    """Insert, cancel 10%, fire everything tick by tick, save and load"""
+    wheel = TimingWheel(tick=args.tick)
+    payload = {"chat_id": -1001, "message_id": 1}
+
+    started = time.perf_counter()
+    timers = [wheel.schedule("delete_message", delay, payload) for delay in delays]
+    insert_s = time.perf_counter() - started
+
+    rng = random.Random(args.seed)
+    cancelled = rng.sample(timers, len(timers) // 10)
+    started = time.perf_counter()
+    for timer in cancelled:
+        wheel.cancel(timer)
+    cancel_s = time.perf_counter() - started
+    expected = {id(timer): timer.deadline for timer in timers if timer.active}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = directory + "/timers.bin"
+        started = time.perf_counter()
+        wheel.save(path)
+        save_s = time.perf_counter() - started
+        restored = TimingWheel(tick=args.tick)
+        started = time.perf_counter()
+        restored.load(path)
+        load_s = time.perf_counter() - started
+        with open(path, "rb") as f:
+            snapshot_mb = len(f.read()) / 2 ** 20
+
+    # Fire everything; every timer must come out exactly on its deadline tick
+    last_tick = max(expected.values())
+    fired, batches, late = 0, 0, 0
+    started = time.perf_counter()
+    for tick in range(wheel.current + 1, last_tick + 1):
+        for action, due in wheel.advance(tick).items():
+            batches += 1
+            fired += len(due)
+            late += sum(1 for timer in due if expected[id(timer)] != tick)
+    fire_s = time.perf_counter() - started
+    assert fired == len(expected) and late == 0 and len(wheel) == 0, (fired, late, len(wheel))
+    assert len(restored) == len(expected)
+
+    return {
+        "insert_us": round(insert_s / len(delays) * 1e6, 3),
+        "cancel_us": round(cancel_s / len(cancelled) * 1e6, 3),
+        "fire_us": round(fire_s / fired * 1e6, 3),
+        "ticks": last_tick, "fired": fired, "batches": batches, "late": late,
+        "save_s": round(save_s, 2), "load_s": round(load_s, 2),
+        "snapshot_mb": round(snapshot_mb, 1)
+    }
+
+def wheel_memory(delays: List[float], tick: float) -> int:
+    def build():
+        wheel = TimingWheel(tick=tick)
+        payload = {"chat_id": -1001, "message_id": 1}
+        for delay in delays:
+            wheel.schedule("delete_message", delay, payload)
+        return wheel
+    return traced_bytes(build)
+
+async def bench_tasks(delays: List[float]) -> Dict:
+    """Baseline: one asyncio.sleep task per timer"""
+    async def delayed(delay):
+        await asyncio.sleep(delay)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(delayed(delay)) for delay in delays]
+    await asyncio.sleep(0)  # let every task reach its sleep
+    insert_s = time.perf_counter() - started
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    cancel_s = time.perf_counter() - started
+    return {"insert_us": round(insert_s / len(delays) * 1e6, 3),
+            "cancel_us": round(cancel_s / len(delays) * 1e6, 3),
+            "bytes_per_timer": round(held / len(delays))}
+
+async def bench_call_later(delays: List[float]) -> Dict:
+    """Baseline: loop.call_later handles (heap, lost on restart)"""
+    loop = asyncio.get_running_loop()
+    noop = lambda: None
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    handles = [loop.call_later(delay, noop) for delay in delays]
+    insert_s = time.perf_counter() - started
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for handle in handles:
+        handle.cancel()
+    cancel_s = time.perf_counter() - started
+    await asyncio.sleep(0)
+    return {"insert_us": round(insert_s / len(delays) * 1e6, 3),
+            "cancel_us": round(cancel_s / len(delays) * 1e6, 3),
+            "bytes_per_timer": round(held / len(delays))}
+
+def main():
+    parser = make_parser("Benchmark the timing wheel scheduler with 1M timers")
+    parser.add_argument("--timers", type=int, default=1_000_000)
+    parser.add_argument("--horizon", type=float, default=3600.0, help="max delay in seconds")
+    parser.add_argument("--tick", type=float, default=0.5)
+    parser.add_argument("--baseline-tasks", type=int, default=100_000,
+                        help="sleeping tasks for the baseline (1M needs several GB)")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    delays = make_delays(args.timers, args.horizon, args.seed)
+    results: Dict = {"timers": args.timers, "horizon_s": args.horizon, "tick_s": args.tick}
+    results["wheel"] = bench_wheel(delays, args)
+    results["wheel"]["bytes_per_timer"] = round(
+        wheel_memory(delays[:200_000], args.tick) / min(len(delays), 200_000))
+    results["call_later"] = asyncio.run(bench_call_later(delays))
+    results["tasks"] = asyncio.run(bench_tasks(delays[:args.baseline_tasks]))
+    results["peak_rss_mb"] = peak_rss_mb()
+    emit("timing_wheel", results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_user_state.py - User State Memory Benchmark
+Bytes per tracked user: dict of dicts vs __slots__ records vs UserStateStore columns
+
+Usage:
+    python benchmarks/bench_user_state.py -o user_state.json
+"""
+
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from common import emit, make_parser
+
+from user_state import DEFAULT_FIELDS, UserStateStore
+
+class SlotsRecord:
+    """One object per user with a fixed attribute set"""
+    __slots__ = tuple(DEFAULT_FIELDS)
+
+    def __init__(self):
+        for name in DEFAULT_FIELDS:
+            setattr(self, name, 0)
+
+def fill_dicts(user_ids: List[int], now: float):
+    table = {}
+    for i, user_id in enumerate(user_ids):
+        table[user_id] = {name: 0 for name in DEFAULT_FIELDS}
+        table[user_id]["last_seen"] = int(now) - i
+        table[user_id]["message_count"] = i % 5000
+        table[user_id]["flood_window_start"] = now - i * 0.5
+    return table
+
+def fill_slots(user_ids: List[int], now: float):
+    table = {}
+    for i, user_id in enumerate(user_ids):
+        record = table[user_id] = SlotsRecord()
+        record.last_seen = int(now) - i
+        record.message_count = i % 5000
+        record.flood_window_start = now - i * 0.5
+    return table
+
+def fill_store(user_ids: List[int], now: float):
+    store = UserStateStore()
+    for i, user_id in enumerate(user_ids):
+        store.set(user_id, "last_seen", int(now) - i)
+        store.set(user_id, "message_count", i % 5000)
+        store.set(user_id, "flood_window_start", now - i * 0.5)
+    return store
+
+def measure(fill: Callable, user_ids: List[int], now: float) -> Dict:
+    """Traced bytes retained per user and fill time"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    table = fill(user_ids, now)
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {"bytes_per_user": round(retained / len(user_ids), 1),
+              "total_mb": round(retained / 2 ** 20, 2), "fill_s": round(elapsed, 3)}
+    del table
+    return result
+
+def main():
+    parser = make_parser("Benchmark per-user state memory")
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--ops", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    user_ids = rng.sample(range(10 ** 8, 7 * 10 ** 9), args.users)
+    now = time.time()
+
+    results: Dict = {"users": args.users, "fields": len(DEFAULT_FIELDS)}
+    for label, fill in (("dict_of_dicts", fill_dicts), ("slots_records", fill_slots),
+                        ("column_store", fill_store)):
+        results[label] = measure(fill, user_ids, now)
+
+    store = fill_store(user_ids, now)
+    results["column_store"]["estimated_bytes_per_user"] = round(store.memory_bytes() / len(store), 1)
+
+    # Hot path: one flood check per message
+    sample = [rng.choice(user_ids) for _ in range(args.ops)]
+    started = time.perf_counter()
+    for user_id in sample:
+        store.flood_hit(user_id, 10.0, 8, now)
+    results["column_store"]["flood_checks_per_s"] = round(args.ops / (time.perf_counter() - started))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "user_state.bin")
+        started = time.perf_counter()
+        store.save(path)
+        save_ms = (time.perf_counter() - started) * 1000
+        restored = UserStateStore()
+        started = time.perf_counter()
+        restored.load(path)
+        load_ms = (time.perf_counter() - started) * 1000
+        results["snapshot"] = {"bytes": os.path.getsize(path), "save_ms": round(save_ms, 1),
+                               "load_ms": round(load_ms, 1), "rows": len(restored)}
+
+    started = time.perf_counter()
+    evicted = store.evict_idle(now + store.idle_ttl - args.users // 2)
+    results["evict_idle"] = {"evicted": evicted, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    emit("user_state", results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+benchmarks/common.py - Shared Benchmark Helpers
+Fake Telegram Bot API server, synthetic updates, stats and JSON output
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl
+
+# Repository root on path (benchmarks are run as plain scripts)
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+BENCH_TOKEN = "123456:BENCHMARK-TOKEN"
+BENCH_GROUP_ID = -1001000000001
+
+# Synthetic traffic mix: (kind, weight)
+TRAFFIC_MIX = [
+    ("join", 10),
+    ("start", 15),
+    ("rules", 15),
+    ("alias", 10),
+    ("chatter", 50)
+]
+
+CHATTER = [
+    "hello everyone", "কেমন আছো সবাই?", "good morning", "ভালো আছি",
+    "anyone here?", "lol 😂", "আজকে কী প্ল্যান?", "nice bot"
+]
+
+ALIASES = ["/ছবি", "/নিয়ম", "/img", "/rule", "/menu"]
+
+class BenchConfig:
+    """In-memory stand-in for ConfigManager (no vault I/O)"""
+
+    def __init__(self, features: Dict[str, bool], watchdog: bool = False):
+        self.data = {
+            "bot_token": BENCH_TOKEN,
+            "bot_name": "Nila Bench",
+            "admin_ids": [1],
+            "features": features,
+            "bot_settings": {"watchdog": {"enabled": watchdog}},
+            "cloudinary": {"use_cloudinary": False}
+        }
+        # Fresh recipient database per run, so runs never see each other's chats
+        self.db_dir = tempfile.mkdtemp(prefix="nila-bench-")
+        self.listeners = []
+
+    def validate_config(self):
+        return True
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def get_bot_token(self):
+        return self.data["bot_token"]
+
+    def get_owner_id(self):
+        return self.data["admin_ids"][0]
+
+    def get_admin_ids(self):
+        return list(self.data["admin_ids"])
+
+    def is_admin(self, user_id):
+        return user_id in self.data["admin_ids"]
+
+    def get_bot_settings(self):
+        return self.data["bot_settings"]
+
+    def get_features(self):
+        return self.data["features"]
+
+    def get_feature_status(self, feature_name):
+        return self.data["features"].get(feature_name, False)
+
+    def get_cloudinary_config(self):
+        return self.data["cloudinary"]
+
+    def get_data_dir(self):
+        return "DATA_STORAGE"
+
+    def get_database_path(self):
+        return os.path.join(self.db_dir, "bot.db")
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+class FakeBotAPI:
+    """
+    Local stand-in for the Telegram Bot API
+
+    Serves /bot<token>/<method> with canned successful results and
+    /file/bot<token>/<path> from an in-memory file table (profile_photos
+    maps user ids to file ids there). Runs in its own
+    thread so server work does not share the event loop being measured.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.delay = delay
+        self.calls: Dict[str, int] = {}
+        self.files: Dict[str, bytes] = {}
+        self.profile_photos: Dict[int, str] = {}
+        self.connections = 0
+        self.overrides = {}
+        self._message_id = 0
+        self._lock = threading.Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def setup(self):
+                super().setup()
+                with api._lock:
+                    api.connections += 1
+
+            def do_GET(self):
+                api._handle(self)
+
+            def do_POST(self):
+                api._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Value for ApplicationBuilder.base_url()"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    @property
+    def base_file_url(self) -> str:
+        """Value for ApplicationBuilder.base_file_url()"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/file/bot"
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def total_calls(self) -> int:
+        """Total API calls served"""
+        return sum(self.calls.values())
+
+    def _handle(self, request):
+        """Dispatch one HTTP request"""
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+
+        parts = request.path.strip("/").split("/")
+        if parts[0] == "file":
+            data = self.files.get("/".join(parts[2:]))
+            self._reply(request, data, status=200 if data is not None else 404,
+                        content_type="application/octet-stream")
+            return
+
+        method = parts[-1]
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        params = self._parse_params(request.headers.get("Content-Type", ""), body)
+        override = self.overrides.get(method)
+        if callable(override):
+            payload = override(params)
+        elif override is not None:
+            payload = override
+        else:
+            payload = {"ok": True, "result": self._result(method, params)}
+
+        # Error payloads ({"ok": false, "error_code": 429, ...}) keep their HTTP status
+        status = 200 if payload.get("ok", True) else payload.get("error_code", 400)
+        self._reply(request, json.dumps(payload).encode(), status=status)
+
+    @staticmethod
+    def _parse_params(content_type: str, body: bytes) -> Dict:
+        """Decode JSON or urlencoded parameters (multipart is not inspected)"""
+        if not body:
+            return {}
+        if "json" in content_type:
+            return json.loads(body)
+        if "urlencoded" in content_type:
+            return dict(parse_qsl(body.decode()))
+        return {}
+
+    @staticmethod
+    def _reply(request, body: Optional[bytes], status: int = 200,
+               content_type: str = "application/json"):
+        """Write an HTTP response"""
+        body = body or b""
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        try:
+            request.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled the request
+
+    def _result(self, method: str, params: Dict):
+        """Canned result for a Bot API method"""
+        if method == "getMe":
+            return {
+                "id": 123456, "is_bot": True, "first_name": "Nila",
+                "username": "nila_bench_bot", "can_join_groups": True,
+                "can_read_all_group_messages": True, "supports_inline_queries": False
+            }
+
+        if method.startswith("send") or method.startswith("edit"):
+            with self._lock:
+                self._message_id += 1
+                message_id = self._message_id
+            chat_id = int(params.get("chat_id", 1) or 1)
+            message = {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+                "text": params.get("text", "")
+            }
+            if method in ("sendPhoto", "sendSticker", "sendDocument"):
+                kind = {"sendPhoto": "photo", "sendSticker": "sticker",
+                        "sendDocument": "document"}[method]
+                file_info = {"file_id": f"F{message_id}", "file_unique_id": f"U{message_id}",
+                             "width": 512, "height": 512}
+                if kind == "photo":
+                    message["photo"] = [file_info]
+                elif kind == "sticker":
+                    file_info.update({"type": "regular", "is_animated": False, "is_video": False})
+                    message["sticker"] = file_info
+                else:
+                    message["document"] = file_info
+            return message
+
+        if method == "getChatAdministrators":
+            return [{
+                "status": "creator", "is_anonymous": False,
+                "user": {"id": 1, "is_bot": False, "first_name": "Owner"}
+            }]
+
+        if method == "getUserProfilePhotos":
+            file_id = self.profile_photos.get(int(params.get("user_id", 0) or 0))
+            if file_id is None:
+                return {"total_count": 0, "photos": []}
+            sizes = [{"file_id": file_id, "file_unique_id": "U" + file_id,
+                      "width": side, "height": side} for side in (160, 320, 640)]
+            return {"total_count": 1, "photos": [sizes]}
+
+        if method == "getFile":
+            file_id = params.get("file_id", "file")
+            return {"file_id": file_id, "file_unique_id": file_id,
+                    "file_size": len(self.files.get(file_id, b"")), "file_path": file_id}
+
+        return True
+
+def synthetic_updates(count: int, seed: int = 7) -> List[Dict]:
+    """Generate a reproducible stream of raw update dicts"""
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in TRAFFIC_MIX]
+    weights = [weight for _, weight in TRAFFIC_MIX]
+    now = int(time.time())
+    updates = []
+
+    for n in range(1, count + 1):
+        kind = rng.choices(kinds, weights)[0]
+        user = {"id": 1000 + rng.randrange(5000), "is_bot": False,
+                "first_name": f"User{n}", "language_code": rng.choice(["en", "bn"])}
+        message = {
+            "message_id": n,
+            "date": now,
+            "chat": {"id": BENCH_GROUP_ID, "type": "supergroup", "title": "Bench Group"},
+            "from": user
+        }
+
+        if kind == "join":
+            message["new_chat_members"] = [user]
+        elif kind in ("start", "rules"):
+            text = f"/{kind}"
+            message["text"] = text
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        elif kind == "alias":
+            # Non-ASCII aliases arrive without a bot_command entity
+            message["text"] = rng.choice(ALIASES)
+        else:
+            message["text"] = rng.choice(CHATTER)
+
+        updates.append({"update_id": n, "message": message, "_kind": kind})
+
+    return updates
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max of samples (same unit as input)"""
+    if not samples:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(pct):
+        return round(ordered[min(last, int(round(pct / 100.0 * last)))], 4)
+
+    return {
+        "p50": pick(50),
+        "p90": pick(90),
+        "p99": pick(99),
+        "max": round(ordered[-1], 4),
+        "mean": round(sum(ordered) / len(ordered), 4)
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 2)
+    return round(peak / 1024, 2)
+
+def git_revision() -> str:
+    """Current commit hash (or 'unknown')"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+def make_parser(description: str) -> argparse.ArgumentParser:
+    """Argument parser with the common --output option"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--output", "-o", help="Write JSON results to this file")
+    return parser
+
+def emit(benchmark: str, results: Dict, output: Optional[str] = None) -> Dict:
+    """Print and optionally save machine-readable results"""
+    report = {
+        "benchmark": benchmark,
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "results": results
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    return report
@@ -0,0 +1,553 @@
+"""
+broadcast.py - Resumable Broadcast Engine
+Streams recipients from SQLite and sends announcements under Telegram's rate limits
+"""
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from telegram import ChatMember, Update
+from telegram.constants import ChatType
+from telegram.error import (BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter,
+                            TelegramError, TimedOut)
+from telegram.ext import ContextTypes, TypeHandler
+
+from FEATURE_REGISTRY import get_feature_config
+from rate_limit import AsyncTokenBucket
+
+logger = logging.getLogger(__name__)
+
+MIN_CURSOR = -2 ** 63
+ALL_KINDS = ("private", "group", "channel")
+GONE_STATUSES = (ChatMember.LEFT, ChatMember.BANNED)
+# BadRequest texts meaning the recipient is unreachable for good
+GONE_ERRORS = ("chat not found", "user is deactivated", "peer_id_invalid", "have no rights")
+
+def chat_kind(chat_type: str) -> str:
+    """Recipient kind of a chat type"""
+    if chat_type == ChatType.PRIVATE:
+        return "private"
+    if chat_type == ChatType.CHANNEL:
+        return "channel"
+    return "group"
+
+class RecipientStore:
+    """
+    Every chat the bot can message, in SQLite
+
+    Sightings from updates are buffered and written in one executemany per
+    flush, so tracking costs a dict assignment per update. Broadcasts read
+    with keyset pagination (chat_id > cursor ORDER BY chat_id), which walks
+    the primary key, keeps memory flat and makes the cursor resumable.
+    """
+
+    def __init__(self, path: str = "DATA_STORAGE/bot.db", flush_interval: float = 5.0,
+                 max_pending: int = 1000):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS recipients ("
+            " chat_id INTEGER PRIMARY KEY, kind TEXT NOT NULL,"
+            " seen_at INTEGER NOT NULL, blocked INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.commit()
+        self._pending: Dict[int, str] = {}
+        self._task = None
+
+    def see(self, chat_id: int, kind: str):
+        """Record a reachable chat (written on the next flush)"""
+        self._pending[chat_id] = kind
+        if len(self._pending) >= self.max_pending:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered sightings (a returning chat is reachable again)"""
+        if not self._pending:
+            return 0
+        now = int(time.time())
+        rows = [(chat_id, kind, now) for chat_id, kind in self._pending.items()]
+        self._pending.clear()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO recipients (chat_id, kind, seen_at, blocked) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT(chat_id) DO UPDATE SET kind = excluded.kind, "
+                "seen_at = excluded.seen_at, blocked = 0",
+                rows
+            )
+        return len(rows)
+
+    def mark_blocked(self, chat_id: int):
+        """Skip a chat that blocked or removed the bot"""
+        self._pending.pop(chat_id, None)
+        with self.conn:
+            self.conn.execute("UPDATE recipients SET blocked = 1 WHERE chat_id = ?", (chat_id,))
+
+    def migrate(self, chat_id: int, new_chat_id: int):
+        """A group became a supergroup: replace its id"""
+        self._pending.pop(chat_id, None)
+        with self.conn:
+            self.conn.execute("DELETE FROM recipients WHERE chat_id = ?", (chat_id,))
+            self.conn.execute(
+                "INSERT INTO recipients (chat_id, kind, seen_at, blocked) VALUES (?, 'group', ?, 0) "
+                "ON CONFLICT(chat_id) DO NOTHING", (new_chat_id, int(time.time()))
+            )
+
+    def add_many(self, chat_ids: Sequence[int], kind: str = "private"):
+        """Bulk import (e.g. from an older user list)"""
+        for chat_id in chat_ids:
+            self._pending[chat_id] = kind
+        self.flush()
+
+    @staticmethod
+    def _kind_filter(kinds: Sequence[str]) -> str:
+        return ",".join("?" * len(kinds))
+
+    def count(self, kinds: Sequence[str] = ALL_KINDS, after: int = MIN_CURSOR) -> int:
+        """Reachable recipients of the given kinds after a cursor"""
+        self.flush()
+        (total,) = self.conn.execute(
+            f"SELECT COUNT(*) FROM recipients WHERE chat_id > ? AND blocked = 0 "
+            f"AND kind IN ({self._kind_filter(kinds)})", (after, *kinds)
+        ).fetchone()
+        return total
+
+    def page(self, after: int, kinds: Sequence[str] = ALL_KINDS, limit: int = 500) -> List[int]:
+        """Next chat ids after a cursor, in id order"""
+        rows = self.conn.execute(
+            f"SELECT chat_id FROM recipients WHERE chat_id > ? AND blocked = 0 "
+            f"AND kind IN ({self._kind_filter(kinds)}) ORDER BY chat_id LIMIT ?",
+            (after, *kinds, limit)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_ids(self, after: int = MIN_CURSOR, kinds: Sequence[str] = ALL_KINDS,
+                 page_size: int = 500) -> Iterator[int]:
+        """Stream chat ids page by page"""
+        self.flush()
+        while True:
+            ids = self.page(after, kinds, page_size)
+            yield from ids
+            if len(ids) < page_size:
+                return
+            after = ids[-1]
+
+    async def on_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Track chats from every update, and bot removals from my_chat_member"""
+        member = update.my_chat_member
+        if member is not None:
+            if member.new_chat_member.status in GONE_STATUSES:
+                self.mark_blocked(member.chat.id)
+            else:
+                self.see(member.chat.id, chat_kind(member.chat.type))
+            return
+
+        chat = update.effective_chat
+        if chat is not None and chat.id not in self._pending:
+            self.see(chat.id, chat_kind(chat.type))
+
+    def register(self, app, group: int = -4):
+        """Observe all updates (own group: one handler per group runs)"""
+        app.add_handler(TypeHandler(Update, self.on_update), group=group)
+
+    def start(self):
+        """Flush sightings periodically"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"❌ Failed to write recipients: {e}")
+
+    async def close(self):
+        """Final flush and close"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.flush()
+        self.conn.close()
+
+@dataclass
+class BroadcastJob:
+    """One announcement and its progress (checkpointed as JSON)"""
+    job_id: str
+    content: Dict
+    kinds: List[str] = field(default_factory=lambda: list(ALL_KINDS))
+    created_by: int = 0
+    status: str = "running"  # running | done | cancelled
+    cursor: int = MIN_CURSOR
+    done_ahead: List[int] = field(default_factory=list)  # finished out of order past cursor
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    retries: int = 0
+    report_to: Optional[List[int]] = None  # [chat_id, message_id] of the progress message
+    created_at: float = field(default_factory=time.time)
+    finished_at: float = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+class Broadcaster:
+    """
+    Concurrent, rate-aware, resumable sender
+
+    A producer streams chat ids from the RecipientStore into a bounded
+    queue; workers send through one token bucket shared by all jobs (the
+    global flood limit). RetryAfter pauses every worker for the requested
+    time and the recipient is retried; Forbidden marks it blocked and
+    ChatMigrated resends to the supergroup. The producer and workers are
+    cancelled together if one fails, so a job never outlives run(). The
+    checkpoint holds the highest id below which every send finished plus
+    the ids finished out of order past it, so a crash repeats only the
+    sends that were in flight.
+    """
+
+    def __init__(self, store: RecipientStore, rate: float = 25.0, concurrency: int = 8,
+                 page_size: int = 500, directory: str = "DATA_STORAGE/broadcasts",
+                 checkpoint_interval: float = 2.0, report_interval: float = 10.0,
+                 max_attempts: int = 3, allowed: bool = True):
+        self.store = store
+        self.allowed = allowed
+        self.bucket = AsyncTokenBucket(rate, capacity=rate)
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        self.report_interval = report_interval
+        self.max_attempts = max_attempts
+        self.jobs: Dict[str, BroadcastJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._samples: Dict[str, deque] = {}
+        self._in_flight: Dict[str, "OrderedDict[int, bool]"] = {}
+        self._resume_at = 0.0
+        self.load_jobs()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def checkpoint(self, job: BroadcastJob):
+        """Write job progress atomically"""
+        in_flight = self._in_flight.get(job.job_id)
+        if in_flight is not None:
+            job.done_ahead = [chat_id for chat_id, done in in_flight.items() if done]
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(job.job_id)
+        try:
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(asdict(job), f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.error(f"❌ Failed to checkpoint broadcast {job.job_id}: {e}")
+
+    def load_jobs(self) -> int:
+        """Read checkpoints from the broadcasts directory"""
+        if not os.path.isdir(self.directory):
+            return 0
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    job = BroadcastJob(**json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.error(f"❌ Unreadable broadcast checkpoint {name}: {e}")
+                continue
+            self.jobs[job.job_id] = job
+        return len(self.jobs)
+
+    def create(self, content: Dict, kinds: Sequence[str] = ALL_KINDS, created_by: int = 0,
+               report_to: Optional[List[int]] = None) -> BroadcastJob:
+        """
+        New job
+
+        content is {"text": ..., "parse_mode": ...} or
+        {"from_chat_id": ..., "message_id": ...} to copy a message.
+        """
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + secrets.token_hex(2)
+        job = BroadcastJob(job_id, dict(content), list(kinds), created_by,
+                           total=self.store.count(kinds), report_to=report_to)
+        self.jobs[job_id] = job
+        self.checkpoint(job)
+        logger.info(f"📣 Broadcast {job_id} created for {job.total} recipients")
+        return job
+
+    def start(self, bot, job: BroadcastJob) -> asyncio.Task:
+        """Run a job in the background"""
+        task = self._tasks.get(job.job_id)
+        if task is None or task.done():
+            task = self._tasks[job.job_id] = asyncio.create_task(self.run(bot, job))
+        return task
+
+    def resume(self, bot) -> int:
+        """Restart every job that was running at the last shutdown"""
+        running = [job for job in self.jobs.values() if job.status == "running"]
+        for job in running:
+            logger.info(f"📣 Resuming broadcast {job.job_id} at {job.processed}/{job.total}")
+            self.start(bot, job)
+        return len(running)
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a job for good"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status != "running":
+            return False
+        job.status = "cancelled"
+        task = self._tasks.pop(job_id, None)
+        if task:
+            task.cancel()
+        self.checkpoint(job)
+        return True
+
+    async def run(self, bot, job: BroadcastJob) -> BroadcastJob:
+        """Send a job to every remaining recipient"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        in_flight: "OrderedDict[int, bool]" = OrderedDict()
+        self._in_flight[job.job_id] = in_flight
+        skip = set(job.done_ahead)
+        self._samples[job.job_id] = deque([(time.monotonic(), job.processed)], maxlen=16)
+
+        def finished(chat_id: int):
+            in_flight[chat_id] = True
+            while in_flight:
+                first, done = next(iter(in_flight.items()))
+                if not done:
+                    break
+                in_flight.popitem(last=False)
+                job.cursor = first
+
+        async def produce():
+            for chat_id in self.store.iter_ids(job.cursor, job.kinds, self.page_size):
+                if chat_id in skip:
+                    continue
+                in_flight[chat_id] = False
+                await queue.put(chat_id)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                chat_id = await queue.get()
+                if chat_id is None:
+                    return
+                await self._deliver(bot, job, chat_id)
+                finished(chat_id)
+
+        monitor = asyncio.create_task(self._monitor(bot, job))
+        tasks = [asyncio.ensure_future(produce())]
+        tasks += [asyncio.ensure_future(work()) for _ in range(self.concurrency)]
+        try:
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # No orphaned worker may keep sending past the checkpoint
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            job.status = "done"
+            job.finished_at = time.time()
+            logger.info(f"✅ Broadcast {job.job_id}: {job.sent} sent, {job.blocked} blocked, "
+                        f"{job.failed} failed in {job.finished_at - job.created_at:.0f}s")
+        finally:
+            monitor.cancel()
+            if job.status == "done":
+                in_flight.clear()
+            self.checkpoint(job)
+            self._in_flight.pop(job.job_id, None)
+            self._tasks.pop(job.job_id, None)
+        await self._report(bot, job)
+        return job
+
+    async def _wait_if_paused(self):
+        """Hold while a RetryAfter pause is active"""
+        loop = asyncio.get_running_loop()
+        while (delay := self._resume_at - loop.time()) > 0:
+            await asyncio.sleep(delay)
+
+    async def _send(self, bot, chat_id: int, content: Dict):
+        if "text" in content:
+            await bot.send_message(chat_id, content["text"], parse_mode=content.get("parse_mode"),
+                                   disable_web_page_preview=content.get("disable_preview", True))
+        else:
+            await bot.copy_message(chat_id, content["from_chat_id"], content["message_id"])
+
+    async def _deliver(self, bot, job: BroadcastJob, chat_id: int):
+        """Send to one recipient, retrying flood waits and transient errors"""
+        attempts = 0
+        while attempts < self.max_attempts:
+            await self._wait_if_paused()
+            await self.bucket.acquire()
+            try:
+                await self._send(bot, chat_id, job.content)
+                job.sent += 1
+                return
+            except RetryAfter as e:
+                # Flood limit applies to the whole bot, so every worker waits
+                loop = asyncio.get_running_loop()
+                self._resume_at = max(self._resume_at, loop.time() + float(e.retry_after))
+                job.retries += 1
+            except Forbidden:
+                self.store.mark_blocked(chat_id)
+                job.blocked += 1
+                return
+            except ChatMigrated as e:
+                # Supergroup ids sort below group ids, so the new id is never paged again
+                self.store.migrate(chat_id, e.new_chat_id)
+                chat_id = e.new_chat_id
+            except BadRequest as e:
+                if any(text in str(e).lower() for text in GONE_ERRORS):
+                    self.store.mark_blocked(chat_id)
+                    job.blocked += 1
+                else:
+                    logger.warning(f"⚠️ Broadcast {job.job_id} to {chat_id}: {e}")
+                    job.failed += 1
+                return
+            except (TimedOut, NetworkError):
+                attempts += 1
+                job.retries += 1
+                await asyncio.sleep(min(30, 2 ** attempts))
+            except TelegramError as e:
+                logger.warning(f"⚠️ Broadcast {job.job_id} to {chat_id}: {e}")
+                job.failed += 1
+                return
+        job.failed += 1
+
+    def progress(self, job_id: str) -> Dict:
+        """Counts, throughput over the last ~30 s and ETA"""
+        job = self.jobs[job_id]
+        rate = 0.0
+        samples = self._samples.get(job_id)
+        if samples and job.status == "running":
+            then, processed_then = samples[0]
+            elapsed = time.monotonic() - then
+            if elapsed > 0:
+                rate = (job.processed - processed_then) / elapsed
+        elif job.finished_at > job.created_at:
+            rate = job.processed / (job.finished_at - job.created_at)
+        remaining = max(0, job.total - job.processed)
+        return {
+            "job_id": job_id, "status": job.status, "total": job.total,
+            "sent": job.sent, "blocked": job.blocked, "failed": job.failed,
+            "retries": job.retries, "processed": job.processed,
+            "rate": round(rate, 1),
+            "eta": round(remaining / rate) if rate and job.status == "running" else None
+        }
+
+    def progress_text(self, job_id: str) -> str:
+        """Human-readable progress line"""
+        p = self.progress(job_id)
+        percent = 100 * p["processed"] / p["total"] if p["total"] else 100.0
+        filled = int(percent // 10)
+        eta = f", ETA {p['eta'] // 60}m{p['eta'] % 60:02d}s" if p["eta"] is not None else ""
+        return (f"📣 Broadcast {job_id} [{p['status']}]\n"
+                f"{'▰' * filled}{'▱' * (10 - filled)} {percent:.0f}% "
+                f"({p['processed']}/{p['total']})\n"
+                f"✅ {p['sent']} sent · 🚫 {p['blocked']} blocked · ❌ {p['failed']} failed\n"
+                f"⚡ {p['rate']}/s{eta}")
+
+    async def _monitor(self, bot, job: BroadcastJob):
+        """Checkpoint, sample throughput and report while a job runs"""
+        last_report = time.monotonic()
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            self._samples[job.job_id].append((time.monotonic(), job.processed))
+            self.checkpoint(job)
+            if time.monotonic() - last_report >= self.report_interval:
+                last_report = time.monotonic()
+                logger.info(self.progress_text(job.job_id).replace("\n", " | "))
+                await self._report(bot, job)
+
+    async def _report(self, bot, job: BroadcastJob):
+        """Edit the admin's progress message"""
+        if not job.report_to:
+            return
+        try:
+            await bot.edit_message_text(self.progress_text(job.job_id),
+                                        chat_id=job.report_to[0], message_id=job.report_to[1])
+        except Exception as e:
+            if "not modified" not in str(e).lower():
+                logger.debug(f"Progress edit failed for {job.job_id}: {e}")
+
+    async def command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        /broadcast (reply to a message) - copy it to every chat
+        /broadcast <text>              - send text to every chat
+        /broadcast status | cancel <id>
+        """
+        message = update.effective_message
+        user = update.effective_user
+        permissions = context.bot_data.get("permissions")
+        # Chat admins pass the router's admin_only check; broadcasting needs a bot admin
+        if not self.allowed or permissions is None or not permissions.is_bot_admin(user.id):
+            await message.reply_text("⛔ Only bot admins can broadcast.")
+            return
+
+        args = context.args or []
+        if args and args[0] == "status":
+            jobs = sorted(self.jobs.values(), key=lambda job: job.created_at)[-5:]
+            text = "\n\n".join(self.progress_text(job.job_id) for job in jobs)
+            await message.reply_text(text or "📭 No broadcasts yet.")
+            return
+        if args and args[0] == "cancel":
+            job_id = args[1] if len(args) > 1 else ""
+            cancelled = self.cancel(job_id)
+            await message.reply_text(f"🛑 Broadcast {job_id} cancelled." if cancelled
+                                     else "❓ No running broadcast with that id.")
+            return
+
+        if message.reply_to_message:
+            content = {"from_chat_id": message.chat_id,
+                       "message_id": message.reply_to_message.message_id}
+        elif args:
+            content = {"text": message.text.split(maxsplit=1)[1]}
+        else:
+            await message.reply_text("💡 Reply to a message with /broadcast, or /broadcast <text>")
+            return
+
+        status = await message.reply_text("📣 Preparing broadcast...")
+        job = self.create(content, created_by=user.id, report_to=[status.chat_id, status.message_id])
+        await self._report(context.bot, job)
+        self.start(context.bot, job)
+
+    async def close(self):
+        """Stop sending; running jobs keep status 'running' and resume next start"""
+        for job_id, task in list(self._tasks.items()):
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self.checkpoint(self.jobs[job_id])
+        self._tasks.clear()
+
+def create_broadcaster(store: RecipientStore,
+                       directory: str = "DATA_STORAGE/broadcasts") -> Broadcaster:
+    """Broadcaster configured from admin_controls settings"""
+    settings = get_feature_config("admin_controls").get("settings", {})
+    return Broadcaster(
+        store,
+        rate=settings.get("broadcast_rate", 25),
+        concurrency=settings.get("broadcast_concurrency", 8),
+        page_size=settings.get("broadcast_page_size", 500),
+        directory=directory,
+        allowed=settings.get("can_manage_users", True)
+    )
@@ -0,0 +1,254 @@
+"""
+callback_codec.py - Compact Callback Data Codec
+Versioned struct-packed button payloads within Telegram's 64 bytes, routed by id in O(1)
+"""
+
+import binascii
+import logging
+import secrets
+import struct
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ContextTypes
+
+logger = logging.getLogger(__name__)
+
+CODEC_VERSION = 1
+MARKER = "~"  # not in the base64url alphabet, so legacy string data never matches
+MAX_CALLBACK_BYTES = 64
+FLAG_REF = 0x01
+# Fixed-size struct codes a field may use; "str" and "bytes" are length-prefixed (max 255)
+FIXED_CODES = set("bBhHiIqQ?")
+_HEADER = struct.Struct("<BB")
+_REF = struct.Struct("<Q")
+
+_TO_STD = bytes.maketrans(b"-_", b"+/")
+_TO_URL = bytes.maketrans(b"+/", b"-_")
+
+Fields = Sequence[Tuple[str, str]]
+Handler = Callable[..., Awaitable[Any]]
+
+class CallbackError(ValueError):
+    """Callback data that cannot be decoded (stale, foreign or tampered)"""
+
+def _b64encode(raw: bytes) -> str:
+    return binascii.b2a_base64(raw, newline=False).translate(_TO_URL).rstrip(b"=").decode()
+
+def _b64decode(text: str) -> bytes:
+    encoded = text.encode()
+    return binascii.a2b_base64(encoded.translate(_TO_STD) + b"=" * (-len(encoded) % 4))
+
+class Route:
+    """Payload layout and handler of one button kind"""
+
+    __slots__ = ("route_id", "name", "fields", "handler", "header", "fixed", "fixed_names",
+                 "variable")
+
+    def __init__(self, route_id: int, name: str, fields: Fields, handler: Optional[Handler]):
+        self.route_id = route_id
+        self.name = name
+        self.fields = tuple(fields)
+        self.handler = handler
+        self.header = _HEADER.pack(CODEC_VERSION << 4, route_id)
+        self.fixed_names = tuple(name for name, code in self.fields if code in FIXED_CODES)
+        self.fixed = struct.Struct("<" + "".join(code for _, code in self.fields
+                                                 if code in FIXED_CODES))
+        self.variable = [(name, code) for name, code in self.fields if code not in FIXED_CODES]
+        for field, code in self.variable:
+            if code not in ("str", "bytes"):
+                raise ValueError(f"route {name}: unsupported field type {code!r} for {field}")
+
+    def pack(self, values: Dict[str, Any]) -> bytes:
+        try:
+            body = self.fixed.pack(*[values[name] for name in self.fixed_names])
+        except (KeyError, struct.error) as e:
+            raise ValueError(f"route {self.name}: {e}") from None
+        if not self.variable:
+            return body
+        parts = [body]
+        for name, code in self.variable:
+            raw = values[name].encode() if code == "str" else bytes(values[name])
+            if len(raw) > 255:
+                raise ValueError(f"route {self.name}: {name} is longer than 255 bytes")
+            parts.append(bytes((len(raw),)) + raw)
+        return b"".join(parts)
+
+    def unpack(self, body: bytes) -> Dict[str, Any]:
+        size = self.fixed.size
+        if len(body) < size:
+            raise CallbackError(f"route {self.name}: payload too short")
+        values = dict(zip(self.fixed_names, self.fixed.unpack_from(body)))
+        offset = size
+        for name, code in self.variable:
+            if offset >= len(body):
+                raise CallbackError(f"route {self.name}: payload too short")
+            length = body[offset]
+            raw = body[offset + 1:offset + 1 + length]
+            if len(raw) != length:
+                raise CallbackError(f"route {self.name}: payload too short")
+            try:
+                values[name] = raw.decode() if code == "str" else raw
+            except UnicodeDecodeError:
+                raise CallbackError(f"route {self.name}: {name} is not text") from None
+            offset += 1 + length
+        return values
+
+class CallbackCodec:
+    """
+    Encoder, decoder and dispatcher for inline button data
+
+    callback_data is "~" plus base64url of [version|flags, route id,
+    payload]. Fixed-size fields are one precompiled struct, strings are
+    length-prefixed, so decoding is a b64 decode and an unpack instead
+    of string parsing. Route ids are explicit and stable, so buttons in
+    old messages still decode after a restart; a layout change needs a
+    new route id, and a codec version bump turns every old button into
+    a polite "expired". Payloads that would not fit 64 bytes are kept in
+    an in-memory LRU and the button carries an 8-byte reference to them.
+    Dispatch indexes a 256-slot table by route id.
+    """
+
+    def __init__(self, max_refs: int = 10000):
+        self.max_refs = max_refs
+        self.stats = {"encoded": 0, "decoded": 0, "refs": 0, "ref_misses": 0,
+                      "errors": 0, "dispatched": 0}
+        self._routes: List[Optional[Route]] = [None] * 256
+        self._names: Dict[str, Route] = {}
+        self._refs: "OrderedDict[int, bytes]" = OrderedDict()
+        self._ref_salt = secrets.randbits(32) << 32
+        self._ref_counter = 0
+        self._handler = None
+
+    def route(self, route_id: int, name: str, fields: Fields = (),
+              handler: Optional[Handler] = None) -> Route:
+        """Declare a button kind; handler(update, context, **fields) gets its presses"""
+        if not 0 <= route_id <= 255:
+            raise ValueError("route id must fit one byte")
+        existing = self._routes[route_id]
+        if existing is not None and existing.name != name:
+            raise ValueError(f"route id {route_id} is already used by {existing.name}")
+        route = Route(route_id, name, fields, handler)
+        self._routes[route_id] = route
+        self._names[name] = route
+        return route
+
+    def _store_ref(self, body: bytes) -> int:
+        self._ref_counter = (self._ref_counter + 1) & 0xFFFFFFFF
+        ref = self._ref_salt | self._ref_counter
+        self._refs[ref] = body
+        if len(self._refs) > self.max_refs:
+            self._refs.popitem(last=False)
+        self.stats["refs"] += 1
+        return ref
+
+    def encode(self, name: str, **values) -> str:
+        """callback_data for a button of a route"""
+        route = self._names[name]
+        body = route.pack(values)
+        data = MARKER + _b64encode(route.header + body)
+        if len(data) > MAX_CALLBACK_BYTES:
+            header = _HEADER.pack(CODEC_VERSION << 4 | FLAG_REF, route.route_id)
+            data = MARKER + _b64encode(header + _REF.pack(self._store_ref(body)))
+        self.stats["encoded"] += 1
+        return data
+
+    def decode(self, data: str) -> Tuple[Route, Dict[str, Any]]:
+        """Route and field values of callback_data (CallbackError when unusable)"""
+        if not data or data[0] != MARKER:
+            raise CallbackError("not codec data")
+        try:
+            raw = _b64decode(data[1:])
+        except (ValueError, binascii.Error):
+            raise CallbackError("bad encoding") from None
+        if len(raw) < _HEADER.size:
+            raise CallbackError("too short")
+
+        head, route_id = _HEADER.unpack_from(raw)
+        if head >> 4 != CODEC_VERSION:
+            raise CallbackError(f"codec version {head >> 4}")
+        route = self._routes[route_id]
+        if route is None:
+            raise CallbackError(f"unknown route {route_id}")
+
+        body = raw[_HEADER.size:]
+        if head & FLAG_REF:
+            if len(body) != _REF.size:
+                raise CallbackError("bad reference")
+            ref = _REF.unpack(body)[0]
+            stored = self._refs.get(ref)
+            if stored is None:
+                self.stats["ref_misses"] += 1
+                raise CallbackError("reference expired")
+            self._refs.move_to_end(ref)
+            body = stored
+        self.stats["decoded"] += 1
+        return route, route.unpack(body)
+
+    def matches(self, data: object) -> bool:
+        """CallbackQueryHandler pattern: only codec data"""
+        return isinstance(data, str) and data.startswith(MARKER)
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Decode a press and call its route's handler"""
+        query = update.callback_query
+        try:
+            route, values = self.decode(query.data)
+        except CallbackError as e:
+            self.stats["errors"] += 1
+            logger.debug(f"Callback {query.data!r} rejected: {e}")
+            await query.answer("⌛ This button has expired.")
+            return
+        if route.handler is None:
+            await query.answer()
+            return
+        self.stats["dispatched"] += 1
+        await route.handler(update, context, **values)
+
+    def register(self, app):
+        """One handler for every codec route (safe to call more than once)"""
+        if self._handler is None:
+            self._handler = CallbackQueryHandler(self.dispatch, pattern=self.matches)
+            app.add_handler(self._handler)
+
+def create_callback_codec(settings: Optional[Dict] = None) -> CallbackCodec:
+    """Create codec from bot_settings['callbacks']"""
+    settings = settings or {}
+    return CallbackCodec(max_refs=settings.get("max_refs", 10000))
+
+if __name__ == "__main__":
+    codec = CallbackCodec(max_refs=4)
+    codec.route(1, "help", [("category", "str"), ("page", "H")])
+    codec.route(2, "welcome", [("chat_id", "q"), ("user_id", "Q"), ("template", "B")])
+    codec.route(3, "note", [("text", "str")])
+
+    cases = [("help", {"category": "entertainment", "page": 3}),
+             ("welcome", {"chat_id": -1001234567890, "user_id": 7123456789, "template": 4}),
+             ("note", {"text": "নিয়মগুলো পড়ে নিন " * 5})]
+    for name, values in cases:
+        data = codec.encode(name, **values)
+        route, decoded = codec.decode(data)
+        assert route.name == name and decoded == values, (name, decoded)
+        assert len(data.encode()) <= MAX_CALLBACK_BYTES
+        print(f"✅ {name:8} {len(data.encode()):2} bytes  {data}")
+
+    for bad in ("help|media|0", "~", "~AAAA", "~" + "A" * 20):
+        try:
+            codec.decode(bad)
+            raise AssertionError(bad)
+        except CallbackError as e:
+            print(f"✅ rejected {bad!r}: {e}")
+
+    count = 200_000
+    data = codec.encode("welcome", chat_id=-1001234567890, user_id=7123456789, template=4)
+    started = time.perf_counter()
+    for _ in range(count):
+        codec.decode(data)
+    decode_us = (time.perf_counter() - started) / count * 1e6
+    started = time.perf_counter()
+    for _ in range(count):
+        codec.encode("welcome", chat_id=-1001234567890, user_id=7123456789, template=4)
+    encode_us = (time.perf_counter() - started) / count * 1e6
+    print(f"⏱️ encode {encode_us:.2f} µs, decode {decode_us:.2f} µs")
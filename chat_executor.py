@@ -0,0 +1,207 @@
+"""
+chat_executor.py - Per-Chat Serialized Update Executor
+Updates of one chat run in arrival order, different chats in parallel under a global cap
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+class ChatLane:
+    """FIFO lane of one chat"""
+
+    __slots__ = ("lock", "depth", "max_depth", "processed", "wait_seconds", "last_active")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0  # queued + running
+        self.max_depth = 0
+        self.processed = 0
+        self.wait_seconds = 0.0
+        self.last_active = time.monotonic()
+
+def chat_key(update: object) -> Optional[int]:
+    """Chat an update belongs to (the user for chatless updates like inline queries)"""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return None
+
+class AdmissionQueue(asyncio.Queue):
+    """
+    update_queue that holds updates back while max_pending are in process
+
+    Application._update_fetcher starts a task per update as soon as get()
+    returns, so limits inside the update processor only make those tasks
+    wait. Here get() itself waits until fewer than max_pending updates are
+    between get() and the task_done() the Application calls after
+    processing. Updates then stay in this queue, and once maxsize of them
+    are waiting the Updater's put() blocks, so polling pauses instead of
+    memory growing.
+    """
+
+    def __init__(self, max_pending: int, maxsize: int = 1024):
+        super().__init__(maxsize)
+        self.max_pending = max_pending
+        self.in_process = 0
+        self._room = asyncio.Event()
+        self._room.set()
+
+    async def get(self):
+        while self.in_process >= self.max_pending:
+            self._room.clear()
+            await self._room.wait()
+        item = await super().get()
+        self.in_process += 1
+        return item
+
+    def task_done(self):
+        super().task_done()
+        # The Application also marks drained updates done on stop
+        self.in_process = max(0, self.in_process - 1)
+        if self.in_process < self.max_pending:
+            self._room.set()
+
+class ChatExecutor(BaseUpdateProcessor):
+    """
+    Update processor that keeps each chat's updates in order
+
+    The Application hands every update to process_update as its own task.
+    Updates of one chat wait on that chat's lock, which wakes waiters in
+    arrival order, so a rules edit and a following /rules read, or a join
+    and the matching leave, never overtake each other. A running update
+    also holds one of max_concurrent global slots; the slot is taken only
+    once the chat's turn has come, so a burst in one chat cannot occupy
+    slots other chats need. Lanes with nothing queued are evicted after
+    idle_ttl seconds.
+
+    The Application starts a task for every update it takes from its
+    update_queue, so the processor alone cannot push back. Building the
+    Application with update_queue(executor.queue) bounds it: at most
+    max_pending updates are admitted (queued in lanes plus running), up
+    to queue_size more wait in the queue, and past that polling pauses.
+    """
+
+    def __init__(self, max_concurrent: int = 64, max_pending: int = 4096,
+                 idle_ttl: float = 300.0, sweep_interval: float = 60.0,
+                 queue_size: int = 1024):
+        super().__init__(max(max_pending, max_concurrent))
+        self.queue = AdmissionQueue(max(max_pending, max_concurrent), queue_size)
+        self.max_concurrent = max_concurrent
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.stats = {"processed": 0, "unordered": 0, "queued": 0, "running": 0,
+                      "max_queued": 0, "evicted": 0, "errors": 0}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lanes: Dict[int, ChatLane] = {}
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._lanes)
+
+    async def initialize(self):
+        """Create the global slots and start idle eviction (called by Application.initialize)"""
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def shutdown(self):
+        """Stop idle eviction (called by Application.shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]):
+        """Run the update once its chat's earlier updates are done and a slot is free"""
+        key = chat_key(update)
+        if key is None:
+            self.stats["unordered"] += 1
+            await self._run(coroutine)
+            return
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = ChatLane()
+        lane.depth += 1
+        lane.max_depth = max(lane.max_depth, lane.depth)
+        self.stats["queued"] += 1
+        self.stats["max_queued"] = max(self.stats["max_queued"], self.stats["queued"])
+        queued_at = time.monotonic()
+        try:
+            async with lane.lock:
+                lane.wait_seconds += time.monotonic() - queued_at
+                await self._run(coroutine)
+                lane.processed += 1
+        finally:
+            lane.depth -= 1
+            lane.last_active = time.monotonic()
+            self.stats["queued"] -= 1
+
+    async def _run(self, coroutine: Awaitable[Any]):
+        async with self._slots:
+            self.stats["running"] += 1
+            try:
+                await coroutine
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["running"] -= 1
+                self.stats["processed"] += 1
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop lanes with nothing queued that were idle for idle_ttl"""
+        cutoff = (now or time.monotonic()) - self.idle_ttl
+        idle = [key for key, lane in self._lanes.items()
+                if not lane.depth and lane.last_active < cutoff]
+        for key in idle:
+            del self._lanes[key]
+        self.stats["evicted"] += len(idle)
+        return len(idle)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            evicted = self.evict_idle()
+            if evicted:
+                logger.debug(f"Evicted {evicted} idle chat lanes, {len(self._lanes)} left")
+
+    def depth(self, chat_id: int) -> int:
+        """Updates queued or running for a chat"""
+        lane = self._lanes.get(chat_id)
+        return lane.depth if lane else 0
+
+    def busiest(self, limit: int = 10) -> List[Dict]:
+        """Per-chat queue metrics, deepest queues first"""
+        lanes = sorted(self._lanes.items(), key=lambda item: (item[1].depth, item[1].max_depth),
+                       reverse=True)[:limit]
+        return [{"chat_id": key, "depth": lane.depth, "max_depth": lane.max_depth,
+                 "processed": lane.processed,
+                 "avg_wait_ms": round(lane.wait_seconds / lane.processed * 1000, 2)
+                 if lane.processed else 0.0}
+                for key, lane in lanes]
+
+    def metrics(self) -> Dict:
+        """Global counters plus the busiest chats"""
+        return {**self.stats, "lanes": len(self._lanes), "waiting": self.queue.qsize(),
+                "busiest": self.busiest(5)}
+
+def create_chat_executor(settings: Optional[Dict] = None) -> ChatExecutor:
+    """Create executor from bot_settings['executor']"""
+    settings = settings or {}
+    return ChatExecutor(
+        max_concurrent=settings.get("max_concurrent", 64),
+        max_pending=settings.get("max_pending", 4096),
+        idle_ttl=settings.get("idle_ttl", 300),
+        sweep_interval=settings.get("sweep_interval", 60),
+        queue_size=settings.get("queue_size", 1024)
+    )
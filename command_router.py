@@ -0,0 +1,193 @@
+"""
+command_router.py - Fast Pre-Dispatch Command Router
+One handler that resolves registry commands and aliases (including
+non-ASCII ones Telegram cannot parse as /commands) with a single lookup
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from telegram import Update
+from telegram.constants import ChatType
+from telegram.ext import ApplicationHandlerStop, CommandHandler, ContextTypes, MessageHandler, filters
+
+from registry_compiler import fold_token, get_manifest
+
+logger = logging.getLogger(__name__)
+
+# Replies for denied commands (disabled commands are ignored silently)
+DENIAL_MESSAGES = {
+    "admin_only": "⛔ This command is for admins only.",
+    "group_only": "👥 This command works in groups only.",
+    "feature_disabled": "⚠️ This feature is currently disabled."
+}
+
+GROUP_CHATS = (ChatType.GROUP, ChatType.SUPERGROUP)
+
+def build_alias_map(commands: Dict[str, Dict]) -> Dict[str, str]:
+    """Map every folded command name and alias to its canonical command"""
+    alias_map = {}
+    for name, command in commands.items():
+        for token in [name] + list(command.get("aliases", [])):
+            key = fold_token(token)
+            owner = alias_map.setdefault(key, name)
+            if owner != name:
+                logger.warning(f"⚠️ Alias '{token}' of /{name} already used by /{owner}")
+    return alias_map
+
+def active_features(manifest, configured: Dict) -> Set[str]:
+    """Features enabled in the registry and switched on in config (off when missing)"""
+    return {
+        name for name, feature in manifest["features"].items()
+        if feature.get("enabled", False) and configured.get(name, False)
+    }
+
+class CommandRouter:
+    """
+    Single pre-dispatch handler for registry commands
+
+    The command token is parsed once, resolved through a precomputed alias
+    map and checked against enabled, group_only, feature_dependency and
+    admin_only before the bound callback is awaited directly.
+    """
+
+    def __init__(self, config, commands: Optional[Dict[str, Dict]] = None,
+                 prefixes: Tuple[str, ...] = ("/", "!")):
+        self.config = config
+        self.manifest = get_manifest()
+        self.prefixes = prefixes
+        if commands is None:
+            self.commands = self.manifest["commands"]
+            self.alias_map = self.manifest["alias_map"]
+        else:
+            self.commands = commands
+            self.alias_map = build_alias_map(commands)
+        self.callbacks: Dict[str, Callable] = {}
+        self.admin_check: Optional[Callable] = None
+        self.active_features = set()
+        self.stats = {"dispatched": 0, "denied": 0, "unbound": 0}
+        self.refresh_features()
+
+    def refresh_features(self):
+        """Snapshot which features are active (registry enabled + config)"""
+        self.active_features = active_features(self.manifest, self.config.get_features())
+
+    def on_config_change(self, key: str, value=None):
+        """Config listener: re-read switches after a feature is toggled"""
+        if key.startswith("features"):
+            self.refresh_features()
+
+    def bind(self, name: str, callback: Callable):
+        """Bind a registry command to its callback"""
+        if name not in self.commands:
+            raise KeyError(f"Unknown command: {name}")
+        self.callbacks[name] = callback
+
+    def resolve(self, text: str, bot_username: Optional[str] = None) -> Optional[Tuple[str, List[str]]]:
+        """Parse '/token@bot args' once and return (command, args)"""
+        if not text or text[0] not in self.prefixes:
+            return None
+
+        parts = text[1:].split(maxsplit=1)
+        if not parts:
+            return None
+
+        token, _, mention = parts[0].partition("@")
+        if mention and bot_username and mention.casefold() != bot_username.casefold():
+            return None
+
+        name = self.alias_map.get(fold_token(token))
+        if name is None:
+            return None
+
+        args = parts[1].split() if len(parts) > 1 else []
+        return name, args
+
+    async def check(self, name: str, update: Update, context) -> Optional[str]:
+        """Return denial reason for a resolved command (None when allowed)"""
+        command = self.commands[name]
+
+        if not command.get("enabled", False):
+            return "disabled"
+
+        if command.get("group_only") and update.effective_chat.type not in GROUP_CHATS:
+            return "group_only"
+
+        dependency = command.get("feature_dependency")
+        if dependency and dependency not in self.active_features:
+            return "feature_disabled"
+
+        if command.get("admin_only") and not await self._is_admin(update, context):
+            return "admin_only"
+
+        return None
+
+    async def _is_admin(self, update: Update, context) -> bool:
+        """Admin check (pluggable, defaults to vault admin list)"""
+        user = update.effective_user
+        if user is None:
+            return False
+        if self.admin_check:
+            return await self.admin_check(update, context)
+        return self.config.is_admin(user.id)
+
+    async def handle(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Router entry point registered ahead of all other handlers"""
+        message = update.effective_message
+        if message is None or not message.text:
+            return
+
+        resolved = self.resolve(message.text, context.bot.username)
+        if resolved is None:
+            return
+
+        name, args = resolved
+        callback = self.callbacks.get(name)
+        if callback is None:
+            self.stats["unbound"] += 1
+            return
+
+        reason = await self.check(name, update, context)
+        if reason:
+            self.stats["denied"] += 1
+            reply = DENIAL_MESSAGES.get(reason)
+            if reply:
+                await message.reply_text(reply)
+            raise ApplicationHandlerStop
+
+        self.stats["dispatched"] += 1
+        context.args = args
+        await callback(update, context)
+        raise ApplicationHandlerStop
+
+    def adopt_handlers(self, app) -> int:
+        """
+        Take over CommandHandlers registered for registry commands
+
+        Their callbacks are bound to the router and the handlers removed, so
+        registry commands no longer cost one filter evaluation per handler.
+        Handler-level filters are dropped; the registry flags replace them.
+        """
+        adopted = 0
+        for group, handlers in list(app.handlers.items()):
+            for handler in list(handlers):
+                if not isinstance(handler, CommandHandler):
+                    continue
+
+                names = {self.alias_map.get(fold_token(cmd)) for cmd in handler.commands}
+                if None in names:
+                    continue
+
+                for name in names:
+                    self.callbacks.setdefault(name, handler.callback)
+                app.remove_handler(handler, group)
+                adopted += 1
+
+        logger.info(f"🧭 Router adopted {adopted} command handlers")
+        return adopted
+
+    def register(self, app, group: int = -1):
+        """Install the router as one text handler ahead of other groups"""
+        app.add_handler(MessageHandler(filters.TEXT, self.handle), group=group)
+        logger.info(f"🧭 Command router ready: {len(self.alias_map)} names, "
+                    f"{len(self.callbacks)} bound")
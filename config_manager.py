@@ -2,12 +2,43 @@
 config_manager.py - Configuration Manager without ENV files
 """
 
+import logging
 import os
 from SETUP_CONFIG.crypto_vault import get_config, update_config
 
+logger = logging.getLogger(__name__)
+
+# callback(key, value) after each successful write (cache invalidation)
+_listeners = []
+
+def notify_listeners(listeners, key, value):
+    """Tell every listener about a config write (a failing listener is only logged)"""
+    for callback in list(listeners):
+        try:
+            callback(key, value)
+        except Exception as e:
+            logger.error(f"❌ Config listener failed for {key}: {e}")
+
+def _write(key, value):
+    """update_config plus change notification"""
+    saved = update_config(key, value)
+    if saved:
+        notify_listeners(_listeners, key, value)
+    return saved
+
 class ConfigManager:
     """Central configuration manager"""
     
+    @staticmethod
+    def get(key, default=None):
+        """Get any top-level setting"""
+        return get_config(key, default)
+    
+    @staticmethod
+    def validate_config():
+        """Token and at least one admin"""
+        return bool(get_config("bot_token")) and bool(ConfigManager.get_admin_ids())
+    
     @staticmethod
     def get_bot_token():
         """Get bot token from encrypted vault"""
@@ -21,6 +52,12 @@ class ConfigManager:
         """Get admin IDs"""
         return get_config("admin_ids", [])
     
+    @staticmethod
+    def get_owner_id():
+        """First admin is the owner"""
+        admins = ConfigManager.get_admin_ids()
+        return admins[0] if admins else None
+    
     @staticmethod
     def is_admin(user_id):
         """Check if user is admin"""
@@ -32,6 +69,11 @@ class ConfigManager:
         """Get bot settings"""
         return get_config("bot_settings", {})
     
+    @staticmethod
+    def get_features():
+        """Get all feature switches"""
+        return get_config("features", {})
+    
     @staticmethod
     def get_feature_status(feature_name):
         """Check if feature is enabled"""
@@ -46,12 +88,12 @@ class ConfigManager:
     @staticmethod
     def enable_feature(feature_name):
         """Enable a feature"""
-        return update_config(f"features.{feature_name}", True)
+        return _write(f"features.{feature_name}", True)
     
     @staticmethod
     def disable_feature(feature_name):
         """Disable a feature"""
-        return update_config(f"features.{feature_name}", False)
+        return _write(f"features.{feature_name}", False)
     
     @staticmethod
     def add_admin(admin_id):
@@ -59,7 +101,7 @@ class ConfigManager:
         admins = ConfigManager.get_admin_ids()
         if admin_id not in admins:
             admins.append(admin_id)
-            return update_config("admin_ids", admins)
+            return _write("admin_ids", admins)
         return True
     
     @staticmethod
@@ -68,9 +110,14 @@ class ConfigManager:
         admins = ConfigManager.get_admin_ids()
         if admin_id in admins:
             admins.remove(admin_id)
-            return update_config("admin_ids", admins)
+            return _write("admin_ids", admins)
         return True
     
+    @staticmethod
+    def get_data_dir():
+        """Directory for this bot's runtime state"""
+        return "DATA_STORAGE"
+    
     @staticmethod
     def get_database_path():
         """Get database path"""
@@ -84,7 +131,18 @@ class ConfigManager:
     @staticmethod
     def update_setting(key, value):
         """Update any setting"""
-        return update_config(key, value)
+        return _write(key, value)
+    
+    @staticmethod
+    def add_listener(callback):
+        """Call callback(key, value) after every successful config write"""
+        _listeners.append(callback)
+    
+    @staticmethod
+    def remove_listener(callback):
+        """Stop notifying a listener"""
+        if callback in _listeners:
+            _listeners.remove(callback)
 
 # Global config instance
 config = ConfigManager()
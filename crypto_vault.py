@@ -14,9 +14,10 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 class CryptoVault:
     """AES-256 encrypted configuration manager"""
     
-    def __init__(self, vault_path="DATA_STORAGE/config.vault"):
+    def __init__(self, vault_path="DATA_STORAGE/config.vault", key_path=None):
         self.vault_path = vault_path
-        self.key_path = "DATA_STORAGE/.secret.key"
+        # Key lives next to its vault (one key per bot instance)
+        self.key_path = key_path or os.path.join(os.path.dirname(vault_path), ".secret.key")
         self.fernet = None
         
         # Initialize encryption
@@ -57,6 +58,7 @@ class CryptoVault:
         }
         
         # Save to hidden file
+        os.makedirs(os.path.dirname(self.key_path) or ".", exist_ok=True)
         with open(self.key_path, "w") as f:
             json.dump(key_data, f)
         
@@ -0,0 +1,241 @@
+"""
+file_registry.py - Telegram file_id Registry
+Media sent once by upload, afterwards by reference to the file_id Telegram returned
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from telegram.error import BadRequest
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Message attribute holding the sent file, per send_<kind> method
+MEDIA_KINDS = ("photo", "sticker", "document", "animation", "video", "audio", "voice")
+# BadRequest texts meaning a stored file_id can no longer be used
+STALE_FILE_ERRORS = ("wrong file identifier", "wrong remote file identifier",
+                     "file reference expired", "invalid file_id", "file_id_invalid")
+HASH_IN_EXECUTOR = 1 << 20  # hash bigger payloads off the event loop
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def sent_file(message, kind: str):
+    """File object of a sent media message (largest size for photos)"""
+    if kind == "photo":
+        return message.photo[-1] if message.photo else None
+    return getattr(message, kind, None)
+
+def is_stale_file_error(error: Exception) -> bool:
+    text = str(error).lower()
+    return any(marker in text for marker in STALE_FILE_ERRORS)
+
+class FileIdRegistry:
+    """
+    (sha256, kind) -> file_id, kept as an append-only JSONL log
+
+    Each upload appends one line; an invalidated id appends a tombstone
+    (file_id null), and loading replays the log so the last line wins.
+    The log is rewritten atomically once dead lines outnumber live ones.
+    file_ids belong to the bot that received them, so every bot keeps
+    its own log in its data directory. Beyond max_entries the least
+    recently used ids are forgotten (that media is simply uploaded again).
+    """
+
+    def __init__(self, path: str = "DATA_STORAGE/file_ids.jsonl", max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lines = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._ids
+
+    def load(self) -> int:
+        """Replay the log; returns live entries"""
+        self._ids.clear()
+        self._lines = 0
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = (record["sha256"], record["kind"])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn last line after a crash
+                    self._lines += 1
+                    self._ids.pop(key, None)
+                    if record.get("file_id"):
+                        self._ids[key] = record["file_id"]
+        except OSError as e:
+            logger.error(f"❌ Failed to read file_id registry {self.path}: {e}")
+            return 0
+
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+        if self._lines > 2 * len(self._ids) + 100:
+            self.compact()
+        logger.info(f"📎 Loaded {len(self._ids)} known file_ids")
+        return len(self._ids)
+
+    def get(self, digest: str, kind: str) -> Optional[str]:
+        file_id = self._ids.get((digest, kind))
+        if file_id is not None:
+            self._ids.move_to_end((digest, kind))
+        return file_id
+
+    def put(self, digest: str, kind: str, file_id: str, size: int = 0):
+        """Remember an uploaded file"""
+        key = (digest, kind)
+        if self._ids.get(key) == file_id:
+            return
+        self._ids.pop(key, None)
+        self._ids[key] = file_id
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+        self._append({"sha256": digest, "kind": kind, "file_id": file_id, "size": size,
+                      "at": int(time.time())})
+
+    def drop(self, digest: str, kind: str):
+        """Forget a file_id Telegram rejected"""
+        if self._ids.pop((digest, kind), None) is not None:
+            self._append({"sha256": digest, "kind": kind, "file_id": None})
+
+    def _append(self, record: Dict):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._lines += 1
+        except OSError as e:
+            logger.error(f"❌ Failed to write file_id registry {self.path}: {e}")
+            return
+        if self._lines > 2 * len(self._ids) + 100:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log with live entries only"""
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for (digest, kind), file_id in self._ids.items():
+                    f.write(json.dumps({"sha256": digest, "kind": kind, "file_id": file_id},
+                                       separators=(",", ":")) + "\n")
+            os.replace(tmp_path, self.path)
+            self._lines = len(self._ids)
+        except OSError as e:
+            logger.error(f"❌ Failed to compact file_id registry {self.path}: {e}")
+
+class MediaSender:
+    """
+    Send media bytes, uploading each distinct content only once
+
+    send() hashes the bytes; a known (hash, kind) is sent as its file_id,
+    so nothing but the id crosses the network. Unknown content is
+    uploaded once: concurrent sends of the same bytes share one upload
+    through a SingleFlight - the first caller's message is the upload and
+    the others send the resulting file_id to their own chats. If Telegram
+    rejects a stored file_id it is dropped and the bytes are uploaded
+    again. Banners, template previews, common stickers and repeated
+    collages (e.g. every join batch of users without avatars) hit.
+    """
+
+    def __init__(self, registry: Optional[FileIdRegistry] = None, upload_timeout: float = 120.0):
+        self.registry = registry if registry is not None else FileIdRegistry()
+        self.stats = {"sends": 0, "by_reference": 0, "uploads": 0, "shared_uploads": 0,
+                      "stale_ids": 0, "bytes_uploaded": 0, "bytes_saved": 0}
+        self._flight = SingleFlight("media_upload", timeout=upload_timeout)
+
+    async def digest(self, data: bytes) -> str:
+        if len(data) >= HASH_IN_EXECUTOR:
+            return await asyncio.get_running_loop().run_in_executor(None, content_hash, data)
+        return content_hash(data)
+
+    async def send(self, bot, kind: str, chat_id: int, data: bytes, **kwargs):
+        """bot.send_<kind>(chat_id, data, **kwargs), by file_id when the bytes are known"""
+        if kind not in MEDIA_KINDS:
+            raise ValueError(f"unsupported media kind {kind!r}")
+        self.stats["sends"] += 1
+        digest = await self.digest(data)
+
+        message = await self._send_known(bot, kind, chat_id, digest, len(data), kwargs)
+        if message is not None:
+            return message
+
+        leader = []
+
+        async def upload():
+            leader.append(True)
+            return await self._upload(bot, kind, chat_id, digest, data, kwargs)
+
+        try:
+            message = await self._flight.do((kind, digest), upload)
+        except Exception:
+            if leader:
+                raise
+            # The shared upload failed in the other chat; this one may still work
+            return await self._upload(bot, kind, chat_id, digest, data, kwargs)
+        if leader:
+            return message
+
+        self.stats["shared_uploads"] += 1
+        message = await self._send_known(bot, kind, chat_id, digest, len(data), kwargs)
+        if message is None:
+            message = await self._upload(bot, kind, chat_id, digest, data, kwargs)
+        return message
+
+    async def _send_known(self, bot, kind: str, chat_id: int, digest: str, size: int,
+                          kwargs: Dict):
+        """Send by stored file_id; None when there is none (or it went stale)"""
+        file_id = self.registry.get(digest, kind)
+        if file_id is None:
+            return None
+        try:
+            message = await getattr(bot, f"send_{kind}")(chat_id, file_id, **kwargs)
+        except BadRequest as e:
+            if not is_stale_file_error(e):
+                raise
+            self.stats["stale_ids"] += 1
+            logger.info(f"📎 Stored {kind} {digest[:12]} rejected ({e}), uploading again")
+            self.registry.drop(digest, kind)
+            return None
+        self.stats["by_reference"] += 1
+        self.stats["bytes_saved"] += size
+        return message
+
+    async def _upload(self, bot, kind: str, chat_id: int, digest: str, data: bytes,
+                      kwargs: Dict):
+        message = await getattr(bot, f"send_{kind}")(chat_id, data, **kwargs)
+        self.stats["uploads"] += 1
+        self.stats["bytes_uploaded"] += len(data)
+        sent = sent_file(message, kind)
+        if sent is not None:
+            self.registry.put(digest, kind, sent.file_id, len(data))
+        return message
+
+    def summary(self) -> Dict:
+        """Counters plus the share of sends that skipped the upload"""
+        sends = self.stats["sends"]
+        return dict(self.stats, known_files=len(self.registry),
+                    reference_ratio=round(self.stats["by_reference"] / sends, 4) if sends else 0.0)
+
+def create_media_sender(settings: Optional[Dict] = None,
+                        path: str = "DATA_STORAGE/file_ids.jsonl") -> MediaSender:
+    """Create sender from bot_settings['media']"""
+    settings = settings or {}
+    registry = FileIdRegistry(path, max_entries=settings.get("max_entries", 100000))
+    return MediaSender(registry, upload_timeout=settings.get("upload_timeout", 120))
@@ -0,0 +1,259 @@
+"""
+help_pages.py - Precomputed Help Pages
+/help rendered once per (category, admin, group, language) and served as ready message payloads
+"""
+
+import html
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.constants import ChatType, ParseMode
+from telegram.error import BadRequest
+from telegram.ext import ContextTypes
+
+from callback_codec import CallbackCodec
+from command_router import active_features
+from registry_compiler import fold_token, get_manifest
+from stylish_text import StylishText
+
+logger = logging.getLogger(__name__)
+
+GROUP_CHATS = (ChatType.GROUP, ChatType.SUPERGROUP)
+LANGUAGES = ("en", "bn")
+ALL = "*"  # category key of the combined listing
+HELP_ROUTE = 1  # callback codec route id of the help keyboard
+
+STRINGS = {
+    "en": {"title": "Commands", "all": "All", "empty": "No commands available here.",
+           "admin": "admin", "group": "groups", "footer": "Tap a category below."},
+    "bn": {"title": "কমান্ড তালিকা", "all": "সব", "empty": "এখানে কোনো কমান্ড নেই।",
+           "admin": "অ্যাডমিন", "group": "গ্রুপ", "footer": "নিচে একটি বিভাগ বেছে নিন।"}
+}
+
+CATEGORY_LABELS = {
+    "general": ("📋", {"en": "General", "bn": "সাধারণ"}),
+    "moderation": ("🛡️", {"en": "Moderation", "bn": "মডারেশন"}),
+    "admin": ("👑", {"en": "Admin", "bn": "অ্যাডমিন"}),
+    "media": ("🎨", {"en": "Media", "bn": "মিডিয়া"}),
+    "entertainment": ("🎬", {"en": "Entertainment", "bn": "বিনোদন"})
+}
+
+# (category, is_admin, is_group, language)
+PageKey = Tuple[str, bool, bool, str]
+
+@dataclass(frozen=True)
+class HelpPage:
+    """Ready-to-send /help message"""
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+
+def user_language(update: Update) -> str:
+    """Help language for the user who asked"""
+    user = update.effective_user
+    code = (user.language_code or "") if user else ""
+    return "bn" if code.startswith("bn") else "en"
+
+def category_label(category: str, language: str) -> str:
+    emoji, names = CATEGORY_LABELS.get(category, ("🔹", {}))
+    return f"{emoji} {names.get(language, category.title())}"
+
+class HelpPages:
+    """
+    /help pages rendered ahead of use
+
+    Visible commands depend only on the registry, the feature switches
+    and who is asking where, so every (category, is_admin, is_group,
+    language) combination is rendered once - styled title, HTML listing
+    and inline keyboard - and later /help calls and button presses just
+    pick a cached page. Any config write (enable_feature,
+    disable_feature, update_setting) drops the cache through a config
+    listener. Buttons carry (category, page) through the callback codec.
+    """
+
+    def __init__(self, config, manifest=None, page_size: int = 8, title_style: str = "bold",
+                 codec: Optional[CallbackCodec] = None):
+        self.config = config
+        self.codec = codec or CallbackCodec()
+        self.codec.route(HELP_ROUTE, "help", [("category", "str"), ("page", "H")], self.on_callback)
+        self.manifest = manifest or get_manifest()
+        self.page_size = page_size
+        self.title_style = title_style
+        self.stats = {"renders": 0, "hits": 0, "invalidations": 0}
+        self._pages: Dict[PageKey, Tuple[HelpPage, ...]] = {}
+        self._features = None
+        self.categories: List[str] = list(dict.fromkeys(
+            command["category"] for command in self.manifest["commands"].values()))
+
+    def invalidate(self, key: Optional[str] = None, value=None):
+        """Drop every rendered page (config listener signature)"""
+        if self._pages or self._features is not None:
+            self.stats["invalidations"] += 1
+        self._pages.clear()
+        self._features = None
+
+    def visible(self, category: str, is_admin: bool, is_group: bool) -> List[str]:
+        """Commands this audience may use, in registry order"""
+        if self._features is None:
+            self._features = active_features(self.manifest, self.config.get_features())
+        names = []
+        for name, command in self.manifest["commands"].items():
+            if not command.get("enabled", False):
+                continue
+            if category != ALL and command["category"] != category:
+                continue
+            dependency = command.get("feature_dependency")
+            if dependency and dependency not in self._features:
+                continue
+            if command.get("admin_only") and not is_admin:
+                continue
+            if command.get("group_only") and not is_group:
+                continue
+            names.append(name)
+        return names
+
+    def _line(self, name: str, language: str) -> str:
+        command = self.manifest["commands"][name]
+        strings = STRINGS[language]
+        line = f"/{name} — {html.escape(command.get('description', ''))}"
+        aliases = [alias for alias in command.get("aliases", ()) if alias.isascii()][:3]
+        if aliases:
+            line += f" <i>({html.escape(', '.join(aliases))})</i>"
+        tags = [strings[tag] for tag, flag in (("admin", "admin_only"), ("group", "group_only"))
+                if command.get(flag)]
+        if tags:
+            line += f" [{', '.join(tags)}]"
+        return line
+
+    def _keyboard(self, key: PageKey, page: int, pages: int,
+                  categories: List[str]) -> InlineKeyboardMarkup:
+        category, _, _, language = key
+        buttons = []
+        for name in [ALL] + categories:
+            label = STRINGS[language]["all"] if name == ALL else category_label(name, language)
+            if name == category:
+                label = f"• {label} •"
+            buttons.append(InlineKeyboardButton(
+                label, callback_data=self.codec.encode("help", category=name, page=0)))
+        rows = [buttons[i:i + 3] for i in range(0, len(buttons), 3)]
+        if pages > 1:
+            encode = self.codec.encode
+            rows.append([
+                InlineKeyboardButton("◀️", callback_data=encode(
+                    "help", category=category, page=(page - 1) % pages)),
+                InlineKeyboardButton(f"{page + 1}/{pages}", callback_data=encode(
+                    "help", category=category, page=page)),
+                InlineKeyboardButton("▶️", callback_data=encode(
+                    "help", category=category, page=(page + 1) % pages))
+            ])
+        return InlineKeyboardMarkup(rows)
+
+    def render(self, key: PageKey) -> Tuple[HelpPage, ...]:
+        """Build every page of one combination"""
+        category, is_admin, is_group, language = key
+        strings = STRINGS[language]
+        self.stats["renders"] += 1
+
+        names = self.visible(category, is_admin, is_group)
+        if category == ALL:
+            order = {name: index for index, name in enumerate(self.categories)}
+            names.sort(key=lambda name: order[self.manifest["commands"][name]["category"]])
+        # Only categories with something to show get a button
+        categories = [name for name in self.categories if self.visible(name, is_admin, is_group)]
+        heading = strings["all"] if category == ALL else category_label(category, language)
+        title = StylishText.generate(strings["title"], self.title_style, add_emoji=False)
+
+        chunks = [names[i:i + self.page_size] for i in range(0, len(names), self.page_size)] or [[]]
+        pages = []
+        for number, chunk in enumerate(chunks):
+            lines = [f"<b>{html.escape(title)}</b> · {html.escape(heading)}", ""]
+            if category == ALL:
+                current = None
+                for name in chunk:
+                    command_category = self.manifest["commands"][name]["category"]
+                    if command_category != current:
+                        if current is not None:
+                            lines.append("")
+                        current = command_category
+                        lines.append(f"<b>{html.escape(category_label(current, language))}</b>")
+                    lines.append(self._line(name, language))
+            else:
+                lines.extend(self._line(name, language) for name in chunk)
+            if not chunk:
+                lines.append(strings["empty"])
+            lines += ["", f"<i>{strings['footer']}</i>"]
+            pages.append(HelpPage("\n".join(lines), self._keyboard(key, number, len(chunks), categories)))
+        return tuple(pages)
+
+    def pages(self, category: str, is_admin: bool, is_group: bool, language: str) -> Tuple[HelpPage, ...]:
+        """Cached pages of a combination (rendered on first use)"""
+        if category != ALL and category not in self.categories:
+            category = ALL
+        if language not in LANGUAGES:
+            language = "en"
+        key = (category, is_admin, is_group, language)
+        cached = self._pages.get(key)
+        if cached is None:
+            cached = self._pages[key] = self.render(key)
+        else:
+            self.stats["hits"] += 1
+        return cached
+
+    def page(self, category: str, is_admin: bool, is_group: bool, language: str,
+             number: int = 0) -> HelpPage:
+        pages = self.pages(category, is_admin, is_group, language)
+        return pages[min(max(number, 0), len(pages) - 1)]
+
+    def warm(self):
+        """Render every combination now (keeps the first /help of each audience fast too)"""
+        for category in [ALL] + self.categories:
+            for is_admin in (False, True):
+                for is_group in (False, True):
+                    for language in LANGUAGES:
+                        self.pages(category, is_admin, is_group, language)
+
+    def find_category(self, text: str) -> str:
+        """Category named by /help <arg> (key or label in any language)"""
+        wanted = fold_token(text)
+        for category in self.categories:
+            names = CATEGORY_LABELS.get(category, ("", {}))[1].values()
+            if wanted in [fold_token(category)] + [fold_token(name) for name in names]:
+                return category
+        return ALL
+
+    async def _audience(self, update: Update, context) -> Tuple[bool, bool, str]:
+        chat = update.effective_chat
+        is_group = chat is not None and chat.type in GROUP_CHATS
+        permissions = context.bot_data.get("permissions")
+        if permissions is not None:
+            is_admin = await permissions.is_admin(update, context)
+        else:
+            user = update.effective_user
+            is_admin = user is not None and self.config.is_admin(user.id)
+        return is_admin, is_group, user_language(update)
+
+    async def command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/help [category]"""
+        category = self.find_category(context.args[0]) if context.args else ALL
+        page = self.page(category, *await self._audience(update, context))
+        await update.effective_message.reply_text(page.text, parse_mode=ParseMode.HTML,
+                                                  reply_markup=page.reply_markup)
+
+    async def on_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                          category: str = ALL, page: int = 0):
+        """Category and page buttons (decoded by the codec): swap in the cached page"""
+        query = update.callback_query
+        cached = self.page(category, *await self._audience(update, context), page)
+        await query.answer()
+        try:
+            await query.edit_message_text(cached.text, parse_mode=ParseMode.HTML,
+                                          reply_markup=cached.reply_markup)
+        except BadRequest as e:
+            # Pressing the current page's counter changes nothing
+            if "not modified" not in str(e).lower():
+                raise
+
+    def register(self, app):
+        """Listen for help keyboard presses (through the codec's dispatcher)"""
+        self.codec.register(app)
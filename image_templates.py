@@ -0,0 +1,237 @@
+"""
+image_templates.py - Pre-Rasterized Image Templates
+Templates are prepared once into ready-to-composite layers; each render
+only adds the per-user avatar and name
+"""
+
+import asyncio
+import io
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+from FEATURE_REGISTRY import get_feature_config
+from single_flight import coalesce, content_key
+from stylish_text import StylishText
+
+logger = logging.getLogger(__name__)
+
+# Template definitions (optional background asset: MEDIA_TOOLS/templates/<name>.png)
+TEMPLATES = {
+    "modern": {
+        "size": (1024, 512),
+        "gradient": ((32, 58, 140), (118, 40, 160)),
+        "accent": (255, 255, 255),
+        "title": "WELCOME",
+        "avatar_box": (72, 136, 240),
+        "ring_width": 8,
+        "name_pos": (360, 250),
+        "title_pos": (360, 170),
+        "name_size": 56,
+        "title_size": 40,
+        "glow": False
+    },
+    "cyberpunk": {
+        "size": (1024, 512),
+        "gradient": ((12, 6, 30), (60, 0, 80)),
+        "accent": (0, 255, 230),
+        "title": "ACCESS GRANTED",
+        "avatar_box": (72, 136, 240),
+        "ring_width": 6,
+        "name_pos": (360, 250),
+        "title_pos": (360, 170),
+        "name_size": 56,
+        "title_size": 36,
+        "glow": True
+    },
+    "elegant": {
+        "size": (1024, 512),
+        "gradient": ((245, 236, 220), (214, 190, 150)),
+        "accent": (90, 60, 30),
+        "title": "Welcome",
+        "avatar_box": (72, 136, 240),
+        "ring_width": 4,
+        "name_pos": (360, 250),
+        "title_pos": (360, 170),
+        "name_size": 54,
+        "title_size": 42,
+        "glow": False
+    }
+}
+
+TEMPLATE_DIR = "MEDIA_TOOLS/templates"
+
+# Bold fonts with wide Unicode coverage (Termux, Debian/Ubuntu, Android)
+FONT_CANDIDATES = [
+    "MEDIA_TOOLS/fonts/NotoSansBengali-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/data/data/com.termux/files/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+    "/system/fonts/Roboto-Bold.ttf"
+]
+
+AvatarInput = Union[None, bytes, Image.Image]
+
+def load_font(size: int) -> ImageFont.ImageFont:
+    """First available TrueType font, falling back to Pillow's default"""
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            try:
+                return ImageFont.truetype(path, size)
+            except OSError:
+                continue
+    return ImageFont.load_default(size)
+
+def vertical_gradient(size: Tuple[int, int], top, bottom) -> Image.Image:
+    """RGBA vertical gradient"""
+    mask = Image.linear_gradient("L").resize(size)
+    return Image.composite(
+        Image.new("RGBA", size, bottom + (255,)),
+        Image.new("RGBA", size, top + (255,)),
+        mask
+    )
+
+def circle_mask(diameter: int, supersample: int = 4) -> Image.Image:
+    """Anti-aliased circular mask"""
+    big = Image.new("L", (diameter * supersample,) * 2, 0)
+    ImageDraw.Draw(big).ellipse((0, 0, big.width - 1, big.height - 1), fill=255)
+    return big.resize((diameter, diameter), Image.LANCZOS)
+
+@dataclass
+class PreparedTemplate:
+    """Template layers ready for compositing"""
+    name: str
+    base: Image.Image
+    avatar_mask: Image.Image
+    placeholder: Image.Image
+    name_font: ImageFont.ImageFont
+    spec: Dict
+
+def prepare_template(name: str, spec: Dict) -> PreparedTemplate:
+    """Decode assets and pre-render everything that does not depend on the user"""
+    size = spec["size"]
+    asset = os.path.join(TEMPLATE_DIR, f"{name}.png")
+    if os.path.exists(asset):
+        with Image.open(asset) as source:
+            base = ImageOps.fit(source.convert("RGBA"), size, Image.LANCZOS)
+    else:
+        base = vertical_gradient(size, *spec["gradient"])
+
+    accent = spec["accent"]
+    x, y, diameter = spec["avatar_box"]
+    ring = spec["ring_width"]
+
+    # Avatar ring (with optional neon glow) baked into the base layer
+    ring_layer = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(ring_layer).ellipse(
+        (x - ring, y - ring, x + diameter + ring, y + diameter + ring), fill=accent + (255,)
+    )
+    if spec.get("glow"):
+        base.alpha_composite(ring_layer.filter(ImageFilter.GaussianBlur(18)))
+    base.alpha_composite(ring_layer)
+
+    # Static title and divider
+    draw = ImageDraw.Draw(base)
+    title_font = load_font(spec["title_size"])
+    draw.text(spec["title_pos"], spec["title"], font=title_font, fill=accent + (255,), anchor="ls")
+    line_y = spec["name_pos"][1] + 24
+    draw.line((spec["name_pos"][0], line_y, size[0] - 72, line_y), fill=accent + (160,), width=3)
+
+    placeholder = Image.new("RGBA", (diameter, diameter), accent + (255,))
+    ImageDraw.Draw(placeholder).ellipse(
+        (diameter // 4, diameter // 6, diameter * 3 // 4, diameter * 2 // 3), fill=(255, 255, 255, 200)
+    )
+
+    return PreparedTemplate(
+        name=name,
+        base=base,
+        avatar_mask=circle_mask(diameter),
+        placeholder=placeholder,
+        name_font=load_font(spec["name_size"]),
+        spec=spec
+    )
+
+def composite(template: PreparedTemplate, avatar: AvatarInput, display_name: str,
+              image_format: str = "JPEG") -> bytes:
+    """Per-render work: avatar + name on a copy of the prepared base"""
+    spec = template.spec
+    canvas = template.base.copy()
+    x, y, diameter = spec["avatar_box"]
+
+    if avatar is None:
+        face = template.placeholder
+    else:
+        if isinstance(avatar, bytes):
+            avatar = Image.open(io.BytesIO(avatar))
+            # JPEG avatars decode straight at reduced scale
+            avatar.draft("RGB", (diameter, diameter))
+        face = ImageOps.fit(avatar.convert("RGBA"), (diameter, diameter), Image.BILINEAR)
+    canvas.paste(face, (x, y), template.avatar_mask)
+
+    ImageDraw.Draw(canvas).text(
+        spec["name_pos"], display_name, font=template.name_font,
+        fill=spec["accent"] + (255,), anchor="ls"
+    )
+
+    output = io.BytesIO()
+    if image_format.upper() == "JPEG":
+        canvas.convert("RGB").save(output, "JPEG", quality=90)
+    else:
+        canvas.save(output, image_format)
+    return output.getvalue()
+
+class TemplateRenderer:
+    """
+    Render welcome/image templates from pre-rasterized layers
+
+    preload() decodes assets, fonts, gradients and masks once at feature
+    startup. render() copies the base and composites only per-user layers;
+    render_async() does it in a worker thread so the event loop stays free,
+    and identical concurrent renders (a join wave on one template) share
+    one through the "image" flight.
+    """
+
+    def __init__(self, templates: Optional[Dict[str, Dict]] = None):
+        settings = get_feature_config("image_generator").get("settings", {})
+        self.templates = templates or TEMPLATES
+        self.default_template = settings.get("default_template", "modern")
+        self._prepared: Dict[str, PreparedTemplate] = {}
+
+    def preload(self, names: Optional[Iterable[str]] = None):
+        """Prepare templates (all by default)"""
+        for name in names or self.templates:
+            self._prepared[name] = prepare_template(name, self.templates[name])
+        logger.info(f"🖼️ Preloaded {len(self._prepared)} image templates")
+
+    def get(self, name: Optional[str] = None) -> PreparedTemplate:
+        """Prepared template, preparing on first use"""
+        name = name if name in self.templates else self.default_template
+        prepared = self._prepared.get(name)
+        if prepared is None:
+            prepared = self._prepared[name] = prepare_template(name, self.templates[name])
+        return prepared
+
+    def render(self, name: str, avatar: AvatarInput, display_name: str,
+               style: Optional[str] = None, image_format: str = "JPEG") -> bytes:
+        """Render one image (optionally styling the name with StylishText)"""
+        if style:
+            display_name = StylishText.generate(display_name, style, add_emoji=False)
+        return composite(self.get(name), avatar, display_name, image_format)
+
+    @coalesce("image", lambda self, name, avatar, display_name, style=None, image_format="JPEG":
+              (id(self), name, content_key(avatar), display_name, style, image_format))
+    async def render_async(self, name: str, avatar: AvatarInput, display_name: str,
+                           style: Optional[str] = None, image_format: str = "JPEG") -> bytes:
+        """render() in the default executor (identical concurrent renders run once)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.render, name, avatar, display_name, style, image_format
+        )
+
+    def render_cold(self, name: str, avatar: AvatarInput, display_name: str,
+                    image_format: str = "JPEG") -> bytes:
+        """Reference path without preloading (used by the benchmark)"""
+        return composite(prepare_template(name, self.templates[name]), avatar,
+                         display_name, image_format)
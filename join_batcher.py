@@ -0,0 +1,243 @@
+"""
+join_batcher.py - Join Burst Batching for welcome_pro
+Joins are collected per chat over a short window and welcomed together
+"""
+
+import asyncio
+import html
+import io
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from PIL import Image, ImageOps
+from telegram import Chat, Update, User
+from telegram.constants import ParseMode
+from telegram.error import Forbidden, RetryAfter, TelegramError
+from telegram.ext import ContextTypes, MessageHandler, filters
+
+from FEATURE_REGISTRY import get_feature_config
+from image_templates import circle_mask
+from rate_limit import AsyncTokenBucket
+from single_flight import coalesce, content_key
+from stylish_text import StylishText
+
+logger = logging.getLogger(__name__)
+
+CAPTION_LIMIT = 1024  # Telegram photo caption length
+
+@dataclass
+class JoinBatch:
+    """Users who joined one chat within the current window"""
+    bot: object
+    chat: Chat
+    users: Dict[int, User] = field(default_factory=dict)
+
+def render_collage(avatars: Sequence[Optional[bytes]], tile: int = 160, gap: int = 12,
+                   background=(24, 24, 32)) -> bytes:
+    """Grid of round avatars as JPEG (missing avatars become grey circles)"""
+    columns = math.ceil(math.sqrt(len(avatars)))
+    rows = math.ceil(len(avatars) / columns)
+    size = (columns * (tile + gap) + gap, rows * (tile + gap) + gap)
+    canvas = Image.new("RGB", size, background)
+    mask = circle_mask(tile)
+    placeholder = Image.new("RGB", (tile, tile), (90, 90, 110))
+
+    for i, avatar in enumerate(avatars):
+        if avatar:
+            face = Image.open(io.BytesIO(avatar))
+            face.draft("RGB", (tile, tile))
+            face = ImageOps.fit(face.convert("RGB"), (tile, tile), Image.BILINEAR)
+        else:
+            face = placeholder
+        row, column = divmod(i, columns)
+        canvas.paste(face, (gap + column * (tile + gap), gap + row * (tile + gap)), mask)
+
+    output = io.BytesIO()
+    canvas.save(output, "JPEG", quality=85)
+    return output.getvalue()
+
+@coalesce("welcome", lambda avatars: tuple(content_key(avatar) for avatar in avatars))
+async def render_collage_async(avatars: Sequence[Optional[bytes]]) -> bytes:
+    """render_collage in the default executor; identical collages render once"""
+    return await asyncio.get_running_loop().run_in_executor(None, render_collage, avatars)
+
+class JoinBatcher:
+    """
+    Aggregate join events per chat
+
+    The first join in a chat opens a window of join_batch_window seconds
+    (closed early at join_batch_max users). When it closes the chat gets
+    one welcome: a styled member list, as the caption of an avatar collage
+    when generate_image is on. Welcome DMs go through a shared token
+    bucket. A raid of N joins costs O(windows) group messages instead of
+    O(N) messages and images.
+    """
+
+    def __init__(self, avatars=None, window: Optional[float] = None,
+                 max_batch: Optional[int] = None, dm_rate: Optional[float] = None,
+                 scheduler=None, media=None):
+        settings = get_feature_config("welcome_pro").get("settings", {})
+        self.avatars = avatars
+        self.scheduler = scheduler
+        self.media = media
+        self.auto_delete_after = settings.get("auto_delete_after", 0)
+        self.window = window if window is not None else settings.get("join_batch_window", 5.0)
+        self.max_batch = max_batch or settings.get("join_batch_max", 50)
+        self.collage_max = settings.get("collage_max", 16)
+        self.inbox_first = settings.get("inbox_first", True)
+        self.generate_image = settings.get("generate_image", True)
+        self.dm_bucket = AsyncTokenBucket(dm_rate or settings.get("dm_rate_limit", 20))
+        self.stats = {"joins": 0, "windows": 0, "group_messages": 0, "collages": 0,
+                      "dms": 0, "dm_failures": 0}
+
+        self._batches: Dict[int, JoinBatch] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._tasks = set()
+
+    def add(self, bot, chat: Chat, users: Sequence[User]):
+        """Queue joined users; the chat's window starts with its first join"""
+        users = [user for user in users if not user.is_bot]
+        if not users:
+            return
+
+        batch = self._batches.get(chat.id)
+        if batch is None:
+            batch = self._batches[chat.id] = JoinBatch(bot, chat)
+            loop = asyncio.get_running_loop()
+            self._timers[chat.id] = loop.call_later(self.window, self._spawn_flush, chat.id)
+
+        for user in users:
+            batch.users[user.id] = user
+        self.stats["joins"] += len(users)
+
+        if len(batch.users) >= self.max_batch:
+            self._spawn_flush(chat.id)
+
+    def _spawn_flush(self, chat_id: int):
+        """Flush a chat in a tracked background task"""
+        task = asyncio.ensure_future(self.flush(chat_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, chat_id: int):
+        """Close the chat's window and send its welcome"""
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(chat_id, None)
+        if batch is None or not batch.users:
+            return
+
+        self.stats["windows"] += 1
+        users = list(batch.users.values())
+
+        if self.inbox_first:
+            task = asyncio.ensure_future(self._send_dms(batch.bot, batch.chat, users))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        try:
+            await self._send_group_welcome(batch.bot, batch.chat, users)
+        except RetryAfter as e:
+            logger.warning(f"⏳ Welcome for chat {chat_id} rate limited, retrying in {e.retry_after}s")
+            await asyncio.sleep(e.retry_after)
+            try:
+                await self._send_group_welcome(batch.bot, batch.chat, users)
+            except TelegramError as retry_error:
+                logger.error(f"❌ Group welcome retry failed in chat {chat_id}: {retry_error}")
+            except Exception:
+                logger.exception(f"❌ Group welcome retry failed in chat {chat_id}")
+        except TelegramError as e:
+            logger.error(f"❌ Group welcome failed in chat {chat_id}: {e}")
+        except Exception:
+            logger.exception(f"❌ Group welcome failed in chat {chat_id}")
+
+    def welcome_text(self, chat: Chat, users: List[User], limit: int = 4096) -> str:
+        """Styled header plus member mentions, trimmed to limit characters"""
+        header = StylishText.generate("Welcome", "bold")
+        footer = f"\n\n🏠 {html.escape(chat.title or 'this group')}"
+        lines = [header, ""]
+        length = len(header) + len(footer) + 1
+
+        for shown, user in enumerate(users):
+            line = f"• {user.mention_html()}"
+            remaining = len(users) - shown
+            if length + len(line) + 24 > limit and remaining > 1:
+                lines.append(f"… and {remaining} more")
+                break
+            lines.append(line)
+            length += len(line) + 1
+        return "\n".join(lines) + footer
+
+    async def _send_group_welcome(self, bot, chat: Chat, users: List[User]):
+        """One message (or one photo) for the whole window"""
+        collage = None
+        if self.generate_image and self.avatars is not None and len(users) > 1:
+            shown = users[:self.collage_max]
+            try:
+                avatars = await asyncio.gather(*(self.avatars.fetch(bot, user.id)
+                                                 for user in shown))
+                collage = await render_collage_async(avatars)
+            except Exception:
+                # A broken avatar must not cost the group its welcome
+                logger.exception(f"❌ Welcome collage failed in chat {chat.id}, sending text")
+
+        if collage is not None:
+            caption = self.welcome_text(chat, users, CAPTION_LIMIT)
+            if self.media is not None:
+                # Identical collages (e.g. users without avatars) go out by file_id
+                message = await self.media.send(bot, "photo", chat.id, collage,
+                                                caption=caption, parse_mode=ParseMode.HTML)
+            else:
+                message = await bot.send_photo(chat.id, collage, caption=caption,
+                                               parse_mode=ParseMode.HTML)
+            self.stats["collages"] += 1
+        else:
+            message = await bot.send_message(chat.id, self.welcome_text(chat, users),
+                                             parse_mode=ParseMode.HTML)
+        self.stats["group_messages"] += 1
+
+        if self.scheduler is not None and self.auto_delete_after:
+            self.scheduler.schedule("delete_message", self.auto_delete_after,
+                                    {"chat_id": chat.id, "message_id": message.message_id})
+
+    async def _send_dms(self, bot, chat: Chat, users: List[User]):
+        """Welcome DMs at dm_rate_limit messages per second"""
+        text = f"👋 Welcome to {chat.title or 'the group'}!"
+        for user in users:
+            await self.dm_bucket.acquire()
+            try:
+                await bot.send_message(user.id, text)
+                self.stats["dms"] += 1
+            except RetryAfter as e:
+                # Flood limit hit anyway: back off before the next DM
+                self.stats["dm_failures"] += 1
+                await asyncio.sleep(e.retry_after)
+            except Forbidden:
+                # User never started the bot or blocked it
+                self.stats["dm_failures"] += 1
+            except TelegramError as e:
+                self.stats["dm_failures"] += 1
+                logger.debug(f"DM to {user.id} failed: {e}")
+
+    async def on_new_members(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """new_chat_members handler"""
+        message = update.effective_message
+        if message and message.new_chat_members:
+            self.add(context.bot, update.effective_chat, message.new_chat_members)
+
+    def register(self, app, group: int = 1):
+        """Collect joins in their own handler group (other groups still see them)"""
+        app.add_handler(
+            MessageHandler(filters.StatusUpdate.NEW_CHAT_MEMBERS, self.on_new_members),
+            group=group
+        )
+
+    async def close(self):
+        """Flush every open window and wait for pending sends"""
+        for chat_id in list(self._batches):
+            await self.flush(chat_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,302 @@
+"""
+loop_watchdog.py - Event Loop Lag Watchdog
+Measures loop scheduling delay and reports handlers that stall the loop
+"""
+
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class LagHistogram:
+    """Fixed-bucket lag histogram (milliseconds)"""
+
+    BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear all samples"""
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.samples = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, lag_ms: float):
+        """Record one lag sample"""
+        self.counts[bisect.bisect_left(self.BUCKETS, lag_ms)] += 1
+        self.samples += 1
+        self.total_ms += lag_ms
+        if lag_ms > self.max_ms:
+            self.max_ms = lag_ms
+
+    def percentile(self, pct: float) -> float:
+        """Upper bucket bound containing the given percentile"""
+        if not self.samples:
+            return 0.0
+
+        target = self.samples * pct / 100.0
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return float(self.BUCKETS[i]) if i < len(self.BUCKETS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict:
+        """Machine-readable histogram summary"""
+        labels = [f"<={b}ms" for b in self.BUCKETS] + [f">{self.BUCKETS[-1]}ms"]
+        return {
+            "samples": self.samples,
+            "mean_ms": round(self.total_ms / self.samples, 3) if self.samples else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+class LoopWatchdog:
+    """
+    Event loop lag watchdog
+
+    A ticker task on the loop measures how late each wake-up is and feeds the
+    histogram. A monitor thread notices when the ticker stops beating and logs
+    the handler that is blocking the loop while the stall is still happening.
+    """
+
+    def __init__(self, interval: float = 0.05, stall_threshold: float = 0.25,
+                 shed_threshold: float = 0.1, report_interval: float = 300.0):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.shed_threshold = shed_threshold
+        self.report_interval = report_interval
+
+        self.histogram = LagHistogram()
+        self.stalls = 0
+        self.shed_count = 0
+        self.shedding = False
+
+        self._lag_avg = 0.0
+        self._heartbeat = time.monotonic()
+        self._stall_reported = False
+        self._activities: Dict[int, str] = {}
+        self._shed_listeners: List[Callable[[bool], None]] = []
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Start ticker task and monitor thread (call from the running loop)"""
+        if self._running:
+            return
+
+        loop = asyncio.get_running_loop()
+        self._running = True
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+
+        self._task = loop.create_task(self._tick())
+        self._thread = threading.Thread(
+            target=self._monitor, name="nila-loop-watchdog", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"🐕 Loop watchdog started (stall > {self.stall_threshold * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop watchdog and log final histogram"""
+        if not self._running:
+            return
+
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=self.interval * 4)
+
+        logger.info(f"🐕 Loop watchdog stopped: {self.stats()}")
+
+    def on_shed_change(self, callback: Callable[[bool], None]):
+        """Register callback(shedding) fired when load shedding toggles"""
+        self._shed_listeners.append(callback)
+
+    def should_shed(self) -> bool:
+        """True while lag is high and low-priority work should be skipped"""
+        return self.shedding
+
+    def stats(self) -> Dict:
+        """Current watchdog statistics"""
+        data = self.histogram.snapshot()
+        data.update({
+            "stalls": self.stalls,
+            "shed": self.shed_count,
+            "shedding": self.shedding,
+            "lag_avg_ms": round(self._lag_avg * 1000, 3)
+        })
+        return data
+
+    def watch(self, name: str, low_priority: bool = False):
+        """Decorator tagging an async callback so stalls can be attributed"""
+        def decorator(callback):
+            @wraps(callback)
+            async def wrapper(*args, **kwargs):
+                if low_priority and self.shedding:
+                    self.shed_count += 1
+                    return None
+
+                frame_id = id(sys._getframe())
+                self._activities[frame_id] = name
+                try:
+                    return await callback(*args, **kwargs)
+                finally:
+                    self._activities.pop(frame_id, None)
+
+            wrapper.__nila_watched__ = True
+            return wrapper
+        return decorator
+
+    def instrument(self, app, low_priority: Iterable[str] = ()):
+        """Wrap every registered handler callback of a telegram Application"""
+        low_priority = tuple(low_priority)
+        wrapped = 0
+
+        for handlers in app.handlers.values():
+            for handler in handlers:
+                callback = handler.callback
+                if getattr(callback, "__nila_watched__", False):
+                    continue
+
+                name = self._handler_name(handler)
+                is_low = any(name.startswith(prefix) for prefix in low_priority)
+                handler.callback = self.watch(name, low_priority=is_low)(callback)
+                wrapped += 1
+
+        logger.info(f"🐕 Watching {wrapped} handlers")
+        return wrapped
+
+    def instrument_callbacks(self, callbacks: Dict[str, Callable],
+                             low_priority: Iterable[str] = ()) -> int:
+        """Wrap command callbacks dispatched outside app.handlers (e.g. the router's)"""
+        low_priority = tuple(low_priority)
+        wrapped = 0
+        for command, callback in list(callbacks.items()):
+            if getattr(callback, "__nila_watched__", False):
+                continue
+            name = getattr(callback, "__qualname__", "/" + command)
+            is_low = any(name.startswith(prefix) for prefix in low_priority)
+            callbacks[command] = self.watch("/" + command, low_priority=is_low)(callback)
+            wrapped += 1
+        return wrapped
+
+    @staticmethod
+    def _handler_name(handler) -> str:
+        """Readable name for a handler (command or callback qualname)"""
+        commands = getattr(handler, "commands", None)
+        if commands:
+            return "/" + sorted(commands)[0]
+        callback = handler.callback
+        return getattr(callback, "__qualname__", repr(callback))
+
+    async def _tick(self):
+        """Measure scheduling delay of a periodic sleep"""
+        loop = asyncio.get_running_loop()
+        next_report = loop.time() + self.report_interval
+
+        while self._running:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            lag = max(0.0, now - expected)
+
+            self._heartbeat = time.monotonic()
+            self.histogram.record(lag * 1000)
+            self._update_shedding(lag)
+
+            if lag >= self.stall_threshold:
+                self.stalls += 1
+                if not self._stall_reported:
+                    logger.warning(f"🐢 Event loop stalled for {lag * 1000:.0f}ms")
+            self._stall_reported = False
+
+            if now >= next_report:
+                logger.info(f"📈 Loop lag: {self.histogram.snapshot()}")
+                next_report = now + self.report_interval
+
+    def _update_shedding(self, lag: float):
+        """Toggle load shedding with hysteresis on an averaged lag"""
+        self._lag_avg = self._lag_avg * 0.8 + lag * 0.2
+
+        if not self.shedding and self._lag_avg >= self.shed_threshold:
+            self._set_shedding(True)
+        elif self.shedding and self._lag_avg < self.shed_threshold / 2:
+            self._set_shedding(False)
+
+    def _set_shedding(self, shedding: bool):
+        """Apply shedding state and notify listeners"""
+        self.shedding = shedding
+        if shedding:
+            logger.warning(f"⚠️ Loop lag {self._lag_avg * 1000:.0f}ms - shedding low-priority work")
+        else:
+            logger.info("✅ Loop lag recovered - resuming low-priority work")
+
+        for callback in self._shed_listeners:
+            try:
+                callback(shedding)
+            except Exception as e:
+                logger.error(f"❌ Shed listener failed: {e}")
+
+    def _monitor(self):
+        """Watch the heartbeat from a thread and catch stalls in progress"""
+        while self._running:
+            time.sleep(self.interval)
+            blocked = time.monotonic() - self._heartbeat
+
+            if blocked >= self.stall_threshold and not self._stall_reported:
+                self._stall_reported = True
+                culprit, stack = self._blocking_activity()
+                logger.warning(
+                    f"🐢 Event loop blocked for {blocked * 1000:.0f}ms+ in {culprit}\n{stack}"
+                )
+
+    def _blocking_activity(self):
+        """Find the watched handler on the loop thread's current stack"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "unknown", ""
+
+        stack = "".join(traceback.format_stack(frame, limit=6))
+
+        culprit = None
+        current = frame
+        while current is not None:
+            culprit = self._activities.get(id(current))
+            if culprit:
+                break
+            current = current.f_back
+
+        return culprit or "unwatched code", stack
+
+def create_watchdog(settings: Optional[Dict] = None) -> Optional[LoopWatchdog]:
+    """Create watchdog from bot_settings['watchdog'] (None when disabled)"""
+    settings = settings or {}
+    if not settings.get("enabled", True):
+        return None
+
+    return LoopWatchdog(
+        interval=settings.get("interval_ms", 50) / 1000,
+        stall_threshold=settings.get("stall_threshold_ms", 250) / 1000,
+        shed_threshold=settings.get("shed_threshold_ms", 100) / 1000,
+        report_interval=settings.get("report_interval", 300)
+    )
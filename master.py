@@ -5,6 +5,7 @@ Professional Telegram Bot | No ENV | No Hardcode
 """
 
 import asyncio
+import os
 import sys
 import logging
 from pathlib import Path
@@ -15,6 +16,23 @@ sys.path.insert(0, str(Path(__file__).parent))
 from telegram.ext import Application
 from config_manager import config
 from stylish_text import StylishText
+from loop_watchdog import create_watchdog
+from command_router import CommandRouter
+from registry_compiler import RegistryError, get_manifest
+from permissions import PermissionResolver
+from avatar_fetcher import AvatarFetcher
+from join_batcher import JoinBatcher
+from user_state import create_user_state
+from broadcast import RecipientStore, create_broadcaster
+from timing_wheel import create_scheduler, register_bot_actions
+from spam_guard import create_spam_guard
+from chat_executor import create_chat_executor
+from help_pages import HelpPages
+from callback_codec import create_callback_codec
+from file_registry import create_media_sender
+from warm_restart import WarmRestart
+from SETUP_CONFIG.crypto_vault import vault
+from single_flight import flight_stats
 from auto_commands import AutoCommandSystem, create_default_commands
 from features.welcome_pro import WelcomeProFeature
 from features.security import SecurityFeature
@@ -31,49 +49,51 @@ logger = logging.getLogger(__name__)
 class NilaBot:
     """Main Nila Bot Controller"""
     
-    def __init__(self):
-        self.config = config
+    def __init__(self, config_manager=None, shared=None):
+        self.config = config_manager or config
+        # Services owned by a BotHost when several bots share one process
+        self.shared = shared or {}
         self.app = None
+        self.executor = None
         self.auto_cmd = None
+        self.watchdog = None
+        self.router = None
+        self.help_pages = None
+        self.callbacks = None
+        self.permissions = None
+        self.avatars = None
+        self.media = None
+        self.joins = None
+        self.spam_guard = None
+        self.user_state = None
+        self.recipients = None
+        self.broadcasts = None
+        self.scheduler = None
+        self.warm = None
+        self.manifest = None
         self.features = {}
+        # Config listeners this bot added (config_manager keeps them module-global)
+        self.listeners = []
         
     async def start(self):
         """Start the bot"""
         try:
-            # Validate configuration
-            if not self.config.validate_config():
-                logger.error("❌ Invalid configuration. Please run setup.py")
+            if not await self.build():
                 return
             
-            bot_token = self.config.get_bot_token()
-            bot_name = self.config.get("bot_name", "Nila Bot")
-            
-            # Create stylish banner
-            banner = StylishText.create_banner(f"{bot_name} STARTING")
-            print(banner)
-            
-            # Initialize Telegram application
-            logger.info("🚀 Initializing Nila Bot...")
-            self.app = Application.builder().token(bot_token).build()
-            
-            # Initialize auto-command system
-            self.auto_cmd = AutoCommandSystem(self.app, self.config)
-            
-            # Create default commands
-            create_default_commands(self.app, self.config, self.auto_cmd)
-            
-            # Load features based on config
-            await self._load_features()
+            # Restore caches and limits before any update is processed
+            self.warm.restore()
             
             # Start the bot
             logger.info("✅ Bot initialized successfully")
-            logger.info(f"🤖 Bot Name: {bot_name}")
+            logger.info(f"🤖 Bot Name: {self.config.get('bot_name', 'Nila Bot')}")
             logger.info(f"👤 Owner ID: {self.config.get_owner_id()}")
             logger.info(f"📊 Features: {len(self.features)} loaded")
             
             # Run bot
             await self.app.initialize()
             await self.app.start()
+            self.resume_jobs()
             logger.info("🟢 Bot is now running!")
             
             # Run forever
@@ -83,6 +103,145 @@ class NilaBot:
             logger.error(f"❌ Error starting bot: {e}")
             raise
     
+    async def build(self):
+        """Build application, commands and features (no network I/O)"""
+        # Validate configuration
+        if not self.config.validate_config():
+            logger.error("❌ Invalid configuration. Please run setup.py")
+            return False
+        
+        # Validated registry manifest (recompiled only when registries change)
+        try:
+            self.manifest = get_manifest()
+        except RegistryError as e:
+            for error in e.errors:
+                logger.error(f"❌ Registry: {error}")
+            return False
+        
+        bot_token = self.config.get_bot_token()
+        bot_name = self.config.get("bot_name", "Nila Bot")
+        
+        # Create stylish banner
+        banner = StylishText.create_banner(f"{bot_name} STARTING")
+        print(banner)
+        
+        # Initialize Telegram application
+        logger.info("🚀 Initializing Nila Bot...")
+        # Same-chat updates in order, different chats concurrently
+        self.executor = create_chat_executor(self.config.get_bot_settings().get("executor", {}))
+        self.app = self._build_application(bot_token)
+        self.app.bot_data["executor"] = self.executor
+        self.app.bot_data["manifest"] = self.manifest
+        
+        # Packed inline button data, one dispatcher for every codec route
+        self.callbacks = create_callback_codec(self.config.get_bot_settings().get("callbacks", {}))
+        self.callbacks.register(self.app)
+        self.app.bot_data["callbacks"] = self.callbacks
+        
+        # Initialize auto-command system
+        self.auto_cmd = AutoCommandSystem(self.app, self.config)
+        
+        # Create default commands
+        create_default_commands(self.app, self.config, self.auto_cmd)
+        
+        # Compact per-user state (flood control, cooldowns, analysis)
+        data_dir = self.config.get_data_dir()
+        state_settings = self.config.get_bot_settings().get("user_state", {})
+        # Cooldowns and flood counters are keyed by user id: encrypted like the vault
+        self.user_state = create_user_state(
+            {"path": os.path.join(data_dir, "user_state.bin"), **state_settings},
+            fernet=vault.fernet
+        )
+        self.user_state.register(self.app)
+        self.user_state.start(state_settings.get("evict_interval", 3600))
+        self.app.bot_data["user_state"] = self.user_state
+        
+        # Every reachable chat, for resumable broadcasts
+        self.recipients = RecipientStore(self.config.get_database_path())
+        self.recipients.register(self.app)
+        self.recipients.start()
+        self.broadcasts = create_broadcaster(self.recipients, os.path.join(data_dir, "broadcasts"))
+        self.app.bot_data["broadcasts"] = self.broadcasts
+        
+        # Delayed and recurring actions (welcome auto-delete, timed mutes, reminders)
+        self.scheduler = create_scheduler(self.config.get_bot_settings().get("scheduler", {}),
+                                          os.path.join(data_dir, "timers.bin"))
+        register_bot_actions(self.scheduler, self.app.bot)
+        self.app.bot_data["scheduler"] = self.scheduler
+        
+        # Shared avatar download pool (welcome_pro, image_generator)
+        self.avatars = self.shared.get("avatars") or AvatarFetcher()
+        self.app.bot_data["avatars"] = self.avatars
+        
+        # Media sent by file_id once uploaded (image_generator, sticker_maker, welcome_pro)
+        self.media = create_media_sender(self.config.get_bot_settings().get("media", {}),
+                                         os.path.join(data_dir, "file_ids.jsonl"))
+        self.app.bot_data["media"] = self.media
+        
+        # Batch join bursts into one welcome per chat window
+        if self.config.get_feature_status("welcome_pro"):
+            self.joins = JoinBatcher(avatars=self.avatars, scheduler=self.scheduler,
+                                     media=self.media)
+            self.joins.register(self.app)
+            self.app.bot_data["join_batcher"] = self.joins
+        
+        # Near-duplicate spam waves across groups (checked before any other handler)
+        if self.config.get_feature_status("security"):
+            self.spam_guard = create_spam_guard(self.config.get_bot_settings().get("spam_guard", {}))
+            self.spam_guard.register(self.app)
+            self.app.bot_data["spam_guard"] = self.spam_guard
+        
+        # Load features based on config
+        await self._load_features()
+        
+        # Cached admin checks (vault admins + chat admins)
+        self.permissions = PermissionResolver(self.config)
+        self.permissions.register(self.app)
+        self.listen(self.permissions.on_config_change)
+        self.app.bot_data["permissions"] = self.permissions
+        
+        # Route registry commands through one pre-dispatch handler
+        self.router = CommandRouter(self.config)
+        self.router.admin_check = self.permissions.is_admin
+        self.router.adopt_handlers(self.app)
+        self.router.bind("broadcast", self.broadcasts.command)
+        self.router.register(self.app)
+        self.listen(self.router.on_config_change)
+        
+        # /help pages rendered once per audience, dropped on any config write
+        self.help_pages = HelpPages(self.config, self.manifest, codec=self.callbacks)
+        self.help_pages.register(self.app)
+        self.router.bind("help", self.help_pages.command)
+        self.listen(self.help_pages.invalidate)
+        self.app.bot_data["help_pages"] = self.help_pages
+        
+        # Start event loop watchdog (after every handler is registered and bound)
+        self._start_watchdog()
+        
+        # Warmable state kept across restarts (user_state persists itself, encrypted)
+        self.warm = WarmRestart(os.path.join(data_dir, "warm_state.bin"))
+        self.warm.register("permissions", self.permissions)
+        if self.joins:
+            self.warm.register("welcome_dm_bucket", self.joins.dm_bucket)
+        return True
+    
+    def resume_jobs(self):
+        """Continue background work interrupted by the last shutdown"""
+        self.scheduler.start()
+        resumed = self.broadcasts.resume(self.app.bot)
+        if resumed:
+            logger.info(f"📣 Resumed {resumed} broadcasts")
+    
+    def _build_application(self, bot_token):
+        """Create the telegram Application (override to point at another API)"""
+        return (
+            Application.builder()
+            .token(bot_token)
+            .concurrent_updates(self.executor)
+            .update_queue(self.executor.queue)
+            .build()
+        )
+    
     async def _load_features(self):
         """Load enabled features"""
         features_config = self.config.get("features", {})
@@ -117,6 +276,27 @@ class NilaBot:
             except Exception as e:
                 logger.error(f"❌ Failed to load auto-response feature: {e}")
     
+    def _start_watchdog(self):
+        """Start loop lag watchdog and attach it to handlers"""
+        settings = self.config.get_bot_settings().get("watchdog", {})
+        shared = self.shared.get("watchdog")
+        self.watchdog = shared or create_watchdog(settings)
+        if not self.watchdog:
+            return
+        
+        # Low-priority work is skipped while the loop is lagging
+        low_priority = settings.get("low_priority", ["WelcomeProFeature", "JoinBatcher"])
+        self.watchdog.instrument(self.app, low_priority=low_priority)
+        self.watchdog.instrument_callbacks(self.router.callbacks, low_priority=low_priority)
+        self.app.bot_data["watchdog"] = self.watchdog
+        if shared:
+            return  # one loop, one watchdog: the host starts and stops it
+        
+        self.watchdog.on_shed_change(
+            lambda shedding: setattr(StylishText, "decorations_enabled", not shedding)
+        )
+        self.watchdog.start()
+    
     async def _run_forever(self):
         """Keep the bot running"""
         try:
@@ -128,14 +308,58 @@ class NilaBot:
         finally:
             await self._shutdown()
     
+    def listen(self, callback):
+        """Subscribe to config writes until shutdown"""
+        self.config.add_listener(callback)
+        self.listeners.append(callback)
+    
+    def release_listeners(self):
+        """Unsubscribe from config writes so a stopped bot can be collected"""
+        for callback in self.listeners:
+            self.config.remove_listener(callback)
+        self.listeners.clear()
+    
     async def _shutdown(self):
         """Shutdown bot gracefully"""
         logger.info("🛑 Shutting down Nila Bot...")
         
+        self.release_listeners()
+        
+        if self.watchdog and "watchdog" not in self.shared:
+            await self.watchdog.stop()
+        
+        coalesced = flight_stats()
+        if coalesced:
+            logger.info(f"🔁 Coalesced work: {coalesced}")
+        
+        if self.media and self.media.stats["sends"]:
+            logger.info(f"📎 Media sends: {self.media.summary()}")
+        
+        if self.joins:
+            await self.joins.close()
+        
+        if self.avatars and "avatars" not in self.shared:
+            await self.avatars.close()
+        
+        if self.scheduler:
+            await self.scheduler.close()
+        
+        if self.broadcasts:
+            await self.broadcasts.close()
+        
+        if self.recipients:
+            await self.recipients.close()
+        
+        if self.user_state:
+            await self.user_state.close()
+        
         if self.app:
             await self.app.stop()
             await self.app.shutdown()
         
+        if self.warm:
+            self.warm.save()
+        
         logger.info("✅ Bot shutdown complete")
 
 async def main():
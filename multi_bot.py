@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+multi_bot.py - Multi-Bot Host
+Runs every bot in the vault's "bots" table in one process with shared caches
+
+Usage:
+    python multi_bot.py                                      # host all bots
+    python multi_bot.py --list                               # show configured bots
+    python multi_bot.py --add NAME --token TOKEN --admins 1,2
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from telegram.ext import Application
+from telegram.request import BaseRequest, HTTPXRequest
+
+from SETUP_CONFIG.crypto_vault import get_config, update_config
+from config_manager import config, notify_listeners
+from stylish_text import StylishText
+from loop_watchdog import create_watchdog
+from avatar_fetcher import AvatarFetcher
+from registry_compiler import RegistryError, get_manifest
+from master import NilaBot
+
+logger = logging.getLogger(__name__)
+
+BOT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+PRIVATE_KEYS = ("bot_token", "admin_ids")
+MERGED_KEYS = ("features", "bot_settings")
+
+class BotNamespace:
+    """
+    ConfigManager for one entry of the vault's "bots" table
+
+    Reads fall back to the top-level config for shared defaults, with
+    features and bot_settings merged key by key; the token and admin
+    list are never inherited. Writes only touch bots.<name>, so one
+    bot's feature switches and admins cannot leak into another.
+    """
+
+    def __init__(self, name: str):
+        if not BOT_NAME_PATTERN.match(name):
+            raise ValueError(f"invalid bot name: {name!r}")
+        self.name = name
+        self.prefix = f"bots.{name}"
+        self._listeners = []
+
+    def _entry(self) -> Dict:
+        """This bot's own section"""
+        return get_config(self.prefix, {}) or {}
+
+    def get(self, key, default=None):
+        """Own value, else the shared top-level value"""
+        entry = self._entry()
+        if key in PRIVATE_KEYS:
+            return entry.get(key, default)
+        if key in MERGED_KEYS:
+            return {**(get_config(key, {}) or {}), **entry.get(key, {})}
+        if key in entry:
+            return entry[key]
+        return get_config(key, default)
+
+    def validate_config(self):
+        """Token and at least one admin"""
+        return bool(self.get("bot_token")) and bool(self.get_admin_ids())
+
+    def get_bot_token(self):
+        token = self.get("bot_token")
+        if not token:
+            raise ValueError(f"Bot token not found for {self.name}")
+        return token
+
+    def get_owner_id(self):
+        admins = self.get_admin_ids()
+        return admins[0] if admins else None
+
+    def get_admin_ids(self):
+        return list(self.get("admin_ids", []))
+
+    def is_admin(self, user_id):
+        return user_id in self.get_admin_ids()
+
+    def get_bot_settings(self):
+        return self.get("bot_settings")
+
+    def get_features(self):
+        return self.get("features")
+
+    def get_feature_status(self, feature_name):
+        return self.get_features().get(feature_name, False)
+
+    def get_cloudinary_config(self):
+        return self.get("cloudinary", {})
+
+    def _write(self, key, value):
+        """Write into bots.<name> and notify this bot's listeners"""
+        saved = update_config(f"{self.prefix}.{key}", value)
+        if saved:
+            notify_listeners(self._listeners, key, value)
+        return saved
+
+    def add_listener(self, callback):
+        """Own writes, plus top-level writes (they change inherited values)"""
+        self._listeners.append(callback)
+        config.add_listener(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+        config.remove_listener(callback)
+
+    def enable_feature(self, feature_name):
+        return self._write(f"features.{feature_name}", True)
+
+    def disable_feature(self, feature_name):
+        return self._write(f"features.{feature_name}", False)
+
+    def add_admin(self, admin_id):
+        admins = self.get_admin_ids()
+        if admin_id not in admins:
+            admins.append(admin_id)
+            return self._write("admin_ids", admins)
+        return True
+
+    def remove_admin(self, admin_id):
+        admins = self.get_admin_ids()
+        if admin_id in admins:
+            admins.remove(admin_id)
+            return self._write("admin_ids", admins)
+        return True
+
+    def get_data_dir(self):
+        return os.path.join("DATA_STORAGE", "bots", self.name)
+
+    def get_database_path(self):
+        return os.path.join(self.get_data_dir(), "bot.db")
+
+    def get_log_path(self):
+        return os.path.join(self.get_data_dir(), "bot.log")
+
+    def update_setting(self, key, value):
+        return self._write(key, value)
+
+def load_namespaces() -> Dict[str, object]:
+    """Main bot (top-level token) plus every bots.<name> entry, one per token"""
+    namespaces, tokens = {}, set()
+    if get_config("bot_token"):
+        namespaces["main"] = config
+        tokens.add(get_config("bot_token"))
+
+    for name in sorted(get_config("bots", {}) or {}):
+        try:
+            namespace = BotNamespace(name)
+        except ValueError as e:
+            logger.error(f"❌ {e}")
+            continue
+        token = namespace.get("bot_token")
+        if not token:
+            logger.warning(f"⚠️ Bot {name} has no token, skipping")
+        elif token in tokens:
+            # Two pollers on one token would steal each other's updates
+            logger.warning(f"⚠️ Bot {name} reuses another bot's token, skipping")
+        else:
+            tokens.add(token)
+            namespaces[name] = namespace
+    return namespaces
+
+def new_account() -> Dict:
+    """Per-bot resource counters"""
+    return {"api_calls": 0, "api_errors": 0, "api_seconds": 0.0, "polls": 0,
+            "bytes_sent": 0, "bytes_received": 0, "updates": 0, "handler_seconds": 0.0}
+
+class AccountedRequest(BaseRequest):
+    """
+    One bot's view of a host-wide HTTPXRequest
+
+    Requests go through the shared connection pool and are counted in
+    the bot's account. initialize/shutdown are no-ops because the pool
+    outlives any single bot.
+    """
+
+    def __init__(self, pool: HTTPXRequest, account: Dict):
+        self.pool = pool
+        self.account = account
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return self.pool.read_timeout
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=BaseRequest.DEFAULT_NONE,
+                         write_timeout=BaseRequest.DEFAULT_NONE,
+                         connect_timeout=BaseRequest.DEFAULT_NONE,
+                         pool_timeout=BaseRequest.DEFAULT_NONE):
+        account = self.account
+        polling = url.endswith("/getUpdates")
+        if request_data is not None:
+            account["bytes_sent"] += len(request_data.json_payload)
+            if request_data.contains_files:
+                account["bytes_sent"] += sum(
+                    len(part[1]) for part in request_data.multipart_data.values()
+                    if isinstance(part, tuple) and isinstance(part[1], bytes)
+                )
+
+        started = time.perf_counter()
+        try:
+            code, payload = await self.pool.do_request(
+                url, method, request_data, read_timeout=read_timeout, write_timeout=write_timeout,
+                connect_timeout=connect_timeout, pool_timeout=pool_timeout
+            )
+        except Exception:
+            account["api_errors"] += 1
+            raise
+        finally:
+            if polling:
+                account["polls"] += 1  # long polls would swamp api_seconds
+            else:
+                account["api_calls"] += 1
+                account["api_seconds"] += time.perf_counter() - started
+
+        account["bytes_received"] += len(payload)
+        return code, payload
+
+class HostedBot(NilaBot):
+    """NilaBot on the host's shared pools, with per-bot accounting"""
+
+    def __init__(self, name: str, config_manager, shared: Dict, api_pool: HTTPXRequest,
+                 poll_pool: HTTPXRequest, base_url: Optional[str] = None,
+                 base_file_url: Optional[str] = None):
+        super().__init__(config_manager, shared)
+        self.name = name
+        self.account = new_account()
+        self.api_pool = api_pool
+        self.poll_pool = poll_pool
+        self.base_url = base_url
+        self.base_file_url = base_file_url
+
+    def _build_application(self, bot_token):
+        builder = (
+            Application.builder()
+            .token(bot_token)
+            .request(AccountedRequest(self.api_pool, self.account))
+            .get_updates_request(AccountedRequest(self.poll_pool, self.account))
+            .concurrent_updates(self.executor)
+            .update_queue(self.executor.queue)
+        )
+        if self.base_url:
+            builder.base_url(self.base_url).base_file_url(self.base_file_url or self.base_url)
+        app = builder.build()
+        app.bot_data["account"] = self.account
+
+        process_update = app.process_update
+        account = self.account
+
+        async def accounted(update):
+            started = time.perf_counter()
+            try:
+                await process_update(update)
+            finally:
+                account["updates"] += 1
+                account["handler_seconds"] += time.perf_counter() - started
+
+        app.process_update = accounted
+        return app
+
+class BotHost:
+    """
+    Many bots, one process
+
+    Every bot keeps its own Application, config namespace, user state,
+    permissions and warm snapshot under DATA_STORAGE/bots/<name>/.
+    Shared across bots: the event loop (with one watchdog), one HTTP
+    connection pool for API calls and one for long polls, the avatar
+    fetcher and its disk cache (keyed by file_unique_id, which is the
+    same for every bot), the media thread pool (the loop's default
+    executor), the compiled registry manifest and the StylishText tables.
+    A bot that fails to start is logged and left out.
+    """
+
+    def __init__(self, namespaces: Optional[Dict[str, object]] = None, host_config=None):
+        self.host_config = host_config or config
+        self.namespaces = namespaces if namespaces is not None else load_namespaces()
+        bot_settings = self.host_config.get_bot_settings()
+        self.settings = bot_settings.get("multi_bot", {})
+        self.watchdog_settings = bot_settings.get("watchdog", {})
+        self.bots: Dict[str, HostedBot] = {}
+        self.shared: Dict[str, object] = {}
+        self.api_pool: Optional[HTTPXRequest] = None
+        self.poll_pool: Optional[HTTPXRequest] = None
+        self.media_pool: Optional[ThreadPoolExecutor] = None
+        self._started = time.monotonic()
+
+    async def start(self) -> int:
+        """Create shared services and start every bot; returns how many run"""
+        get_manifest()  # compiled once, read by every bot's router
+
+        loop = asyncio.get_running_loop()
+        self.media_pool = ThreadPoolExecutor(
+            max_workers=self.settings.get("media_workers", min(8, (os.cpu_count() or 1) + 2)),
+            thread_name_prefix="nila-media"
+        )
+        loop.set_default_executor(self.media_pool)
+
+        self.api_pool = HTTPXRequest(
+            connection_pool_size=self.settings.get("pool_size", 64),
+            pool_timeout=self.settings.get("pool_timeout", 10.0)
+        )
+        # Each polling bot holds one connection for the whole long poll
+        self.poll_pool = HTTPXRequest(connection_pool_size=max(1, len(self.namespaces)))
+        await self.api_pool.initialize()
+        await self.poll_pool.initialize()
+
+        watchdog = create_watchdog(self.watchdog_settings)
+        if watchdog:
+            watchdog.on_shed_change(
+                lambda shedding: setattr(StylishText, "decorations_enabled", not shedding)
+            )
+            watchdog.start()
+            self.shared["watchdog"] = watchdog
+        self.shared["avatars"] = AvatarFetcher()
+
+        for name, namespace in self.namespaces.items():
+            bot = HostedBot(name, namespace, self.shared, self.api_pool, self.poll_pool,
+                            base_url=self.settings.get("base_url"),
+                            base_file_url=self.settings.get("base_file_url"))
+            try:
+                if not await bot.build():
+                    logger.error(f"❌ Bot {name}: invalid configuration")
+                    continue
+                bot.warm.restore()
+                await bot.app.initialize()
+                await bot.app.start()
+                bot.resume_jobs()
+                if self.settings.get("polling", True):
+                    await bot.app.updater.start_polling()
+            except Exception as e:
+                logger.error(f"❌ Bot {name} failed to start: {e}")
+                await self._discard(bot)
+                continue
+            self.bots[name] = bot
+            logger.info(f"🟢 Bot {name} running (@{bot.app.bot.username})")
+
+        if "main" in self.namespaces and "main" not in self.bots:
+            logger.error("❌ Main bot (top-level token) is not running, see the errors above")
+        logger.info(f"🏠 Hosting {len(self.bots)}/{len(self.namespaces)} bots in one process")
+        return len(self.bots)
+
+    async def check(self) -> Dict[str, Optional[str]]:
+        """Build every bot without network I/O; name -> None, or why it cannot start"""
+        get_manifest()
+        self.api_pool = HTTPXRequest(connection_pool_size=1)
+        self.poll_pool = HTTPXRequest(connection_pool_size=1)
+        results = {}
+        for name, namespace in self.namespaces.items():
+            bot = HostedBot(name, namespace, self.shared, self.api_pool, self.poll_pool)
+            try:
+                results[name] = None if await bot.build() else "invalid configuration"
+            except Exception as e:
+                results[name] = f"{type(e).__name__}: {e}"
+            await self._discard(bot)
+        return results
+
+    @staticmethod
+    async def _discard(bot: HostedBot):
+        """Release what a half-started bot holds"""
+        try:
+            if bot.app and bot.app.updater and bot.app.updater.running:
+                await bot.app.updater.stop()
+            if bot.app and bot.app.running:
+                await bot._shutdown()
+            else:
+                bot.release_listeners()
+                for component in (bot.recipients, bot.user_state):
+                    if component:
+                        await component.close()
+        except Exception as e:
+            logger.error(f"❌ Bot {bot.name} cleanup failed: {e}")
+
+    def accounting(self) -> Dict[str, Dict]:
+        """Per-bot counters plus state sizes"""
+        report = {}
+        for name, bot in self.bots.items():
+            report[name] = {
+                **bot.account,
+                "users": len(bot.user_state),
+                "chat_lanes": len(bot.executor),
+                "queued": bot.executor.stats["queued"],
+                "waiting": bot.executor.queue.qsize(),
+                "max_queued": bot.executor.stats["max_queued"],
+                "user_state_bytes": bot.user_state.memory_bytes(),
+                "features": len(bot.features)
+            }
+        return report
+
+    def log_accounting(self):
+        """One line per bot"""
+        uptime = (time.monotonic() - self._started) / 60
+        for name, row in self.accounting().items():
+            logger.info(
+                f"📒 {name}: {row['updates']} updates ({row['handler_seconds']:.1f}s), "
+                f"{row['api_calls']} calls ({row['api_errors']} errors, {row['api_seconds']:.1f}s), "
+                f"{row['bytes_sent'] / 1024:.0f}/{row['bytes_received'] / 1024:.0f} KiB out/in, "
+                f"{row['users']} users, {row['chat_lanes']} chat lanes "
+                f"(peak {row['max_queued']} queued), {uptime:.0f} min"
+            )
+
+    async def stop(self):
+        """Stop every bot, then the shared services"""
+        for bot in self.bots.values():
+            if bot.app.updater and bot.app.updater.running:
+                await bot.app.updater.stop()
+        self.log_accounting()
+
+        results = await asyncio.gather(*(bot._shutdown() for bot in self.bots.values()),
+                                       return_exceptions=True)
+        for name, result in zip(self.bots, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Bot {name} shutdown failed: {result}")
+        self.bots.clear()
+
+        if "watchdog" in self.shared:
+            await self.shared["watchdog"].stop()
+        if "avatars" in self.shared:
+            await self.shared["avatars"].close()
+        for pool in (self.api_pool, self.poll_pool):
+            if pool:
+                await pool.shutdown()
+        if self.media_pool:
+            self.media_pool.shutdown(wait=False)
+        logger.info("✅ Bot host shutdown complete")
+
+    async def run_forever(self):
+        """Start, report periodically and stop on cancellation"""
+        try:
+            if not await self.start():
+                logger.error("❌ No bot could be started")
+                return
+            interval = self.settings.get("report_interval", 3600)
+            while True:
+                await asyncio.sleep(interval)
+                self.log_accounting()
+        except asyncio.CancelledError:
+            logger.info("Bot host stopping...")
+        finally:
+            await self.stop()
+
+def add_bot(name: str, token: str, admin_ids) -> bool:
+    """Create or replace bots.<name> in the vault"""
+    BotNamespace(name)  # validates the name
+    return update_config(f"bots.{name}", {"bot_token": token, "admin_ids": list(admin_ids)})
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Host several Nila bots in one process")
+    parser.add_argument("--list", action="store_true", help="show configured bots and exit")
+    parser.add_argument("--check", action="store_true",
+                        help="build every bot offline and report the ones that cannot start")
+    parser.add_argument("--add", metavar="NAME", help="add or replace a bot in the vault")
+    parser.add_argument("--token", help="bot token for --add")
+    parser.add_argument("--admins", default="", help="comma-separated admin ids for --add")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.add:
+        if not args.token:
+            print("❌ --add needs --token")
+            return 1
+        try:
+            admins = [int(part) for part in args.admins.split(",") if part.strip()]
+            saved = add_bot(args.add, args.token, admins)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        if not saved:
+            print("❌ Vault is empty. Please run setup.py first")
+            return 1
+        print(f"✅ Bot {args.add} saved")
+        return 0
+
+    namespaces = load_namespaces()
+    if args.list:
+        for name, namespace in namespaces.items():
+            features = sum(1 for enabled in namespace.get_features().values() if enabled)
+            print(f"🤖 {name}: {len(namespace.get_admin_ids())} admins, {features} features")
+        return 0
+
+    if not namespaces:
+        print("❌ No bots configured. Run setup.py or multi_bot.py --add")
+        return 1
+    try:
+        get_manifest()
+    except RegistryError as e:
+        for error in e.errors:
+            print(f"❌ Registry: {error}")
+        return 1
+
+    if args.check:
+        results = asyncio.run(BotHost(namespaces).check())
+        for name, problem in results.items():
+            print(f"❌ {name}: {problem}" if problem else f"✅ {name}: builds")
+        return 1 if any(results.values()) else 0
+
+    try:
+        asyncio.run(BotHost(namespaces).run_forever())
+    except KeyboardInterrupt:
+        logger.info("Received keyboard interrupt, shutting down...")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+permissions.py - Cached Admin Permission Resolver
+Bot admins from the vault plus per-chat Telegram admins, no I/O in steady state
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Set, Tuple
+
+from telegram import Update
+from telegram.constants import ChatMemberStatus, ChatType
+from telegram.ext import ChatMemberHandler, ContextTypes
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATUSES = (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
+GROUP_CHATS = (ChatType.GROUP, ChatType.SUPERGROUP)
+
+class PermissionResolver:
+    """
+    Admin checks for admin_only commands
+
+    Bot admins are kept in a set, reloaded whenever admin_ids is written
+    (on_config_change is a config listener). Chat administrators are
+    fetched with getChatAdministrators on first use, cached per chat with
+    a TTL and kept current from chat_member updates, so repeated checks
+    are set lookups. Concurrent misses for the same chat share one API call.
+    """
+
+    def __init__(self, config, ttl: float = 3600.0, max_chats: int = 10000):
+        self.config = config
+        self.ttl = ttl
+        self.max_chats = max_chats
+        self.bot_admins: Set[int] = set()
+        self._chat_admins: "OrderedDict[int, Tuple[float, Set[int]]]" = OrderedDict()
+        self._fetches = SingleFlight("chat_admins", timeout=30.0)
+        self.stats = {"hits": 0, "fetches": 0, "member_updates": 0}
+        self.reload_bot_admins()
+
+    def reload_bot_admins(self) -> Set[int]:
+        """Reload bot admins from the vault; returns users whose status changed"""
+        previous = self.bot_admins
+        self.bot_admins = set(self.config.get_admin_ids())
+        return previous ^ self.bot_admins
+
+    def on_config_change(self, key: str, value=None):
+        """Config listener: apply admin_ids writes right away"""
+        if key != "admin_ids":
+            return
+        # Chat admin caches stay: Telegram's admin lists did not change
+        changed = self.reload_bot_admins()
+        if changed:
+            logger.info(f"👑 Bot admins reloaded ({len(changed)} changed)")
+
+    def is_bot_admin(self, user_id: int) -> bool:
+        """Check vault admin list (set lookup)"""
+        return user_id in self.bot_admins
+
+    def add_bot_admin(self, user_id: int) -> bool:
+        """Persist a new bot admin and update the set"""
+        if not self.config.add_admin(user_id):
+            return False
+        self.bot_admins.add(user_id)
+        return True
+
+    def remove_bot_admin(self, user_id: int) -> bool:
+        """Persist bot admin removal and update the set"""
+        if not self.config.remove_admin(user_id):
+            return False
+        self.bot_admins.discard(user_id)
+        return True
+
+    def invalidate(self, chat_id: int = None):
+        """Drop cached admins for one chat (or all chats)"""
+        if chat_id is None:
+            self._chat_admins.clear()
+        else:
+            self._chat_admins.pop(chat_id, None)
+
+    def _cached(self, chat_id: int):
+        """Fresh cached admin set or None"""
+        entry = self._chat_admins.get(chat_id)
+        if entry is None:
+            return None
+
+        expires, admins = entry
+        if expires < time.monotonic():
+            del self._chat_admins[chat_id]
+            return None
+
+        self._chat_admins.move_to_end(chat_id)
+        return admins
+
+    def _store(self, chat_id: int, admins: Set[int]):
+        """Cache admin set, evicting least recently used chats"""
+        self._chat_admins[chat_id] = (time.monotonic() + self.ttl, admins)
+        self._chat_admins.move_to_end(chat_id)
+        while len(self._chat_admins) > self.max_chats:
+            self._chat_admins.popitem(last=False)
+
+    async def get_chat_admins(self, bot, chat_id: int) -> Set[int]:
+        """Admin user ids of a chat (cached)"""
+        admins = self._cached(chat_id)
+        if admins is not None:
+            self.stats["hits"] += 1
+            return admins
+
+        return await self._fetches.do(chat_id, lambda: self._fetch(bot, chat_id))
+
+    async def _fetch(self, bot, chat_id: int) -> Set[int]:
+        """Call getChatAdministrators and cache the result"""
+        self.stats["fetches"] += 1
+        members = await bot.get_chat_administrators(chat_id)
+        admins = {member.user.id for member in members}
+        self._store(chat_id, admins)
+        return admins
+
+    def export_state(self) -> bytes:
+        """Cached chat admins with wall-clock expiry (warm restart)"""
+        offset = time.time() - time.monotonic()
+        chats = {str(chat_id): [expires + offset, sorted(admins)]
+                 for chat_id, (expires, admins) in self._chat_admins.items()}
+        return json.dumps(chats).encode()
+
+    def import_state(self, data: bytes):
+        """Restore cached chat admins that have not expired"""
+        offset = time.time() - time.monotonic()
+        for chat_id, (expires, admins) in json.loads(data).items():
+            if expires - offset > time.monotonic():
+                self._chat_admins[int(chat_id)] = (expires - offset, set(admins))
+        while len(self._chat_admins) > self.max_chats:
+            self._chat_admins.popitem(last=False)
+
+    async def is_chat_admin(self, bot, chat_id: int, user_id: int) -> bool:
+        """Check Telegram admin status in a chat"""
+        return user_id in await self.get_chat_admins(bot, chat_id)
+
+    async def is_admin(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        """Bot admin anywhere, or chat admin inside groups"""
+        user = update.effective_user
+        if user is None:
+            return False
+        if user.id in self.bot_admins:
+            return True
+
+        chat = update.effective_chat
+        if chat is None or chat.type not in GROUP_CHATS:
+            return False
+
+        try:
+            return await self.is_chat_admin(context.bot, chat.id, user.id)
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch admins for chat {chat.id}: {e}")
+            return False
+
+    async def on_chat_member(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Apply promotions and demotions to a cached chat"""
+        change = update.chat_member or update.my_chat_member
+        if change is None:
+            return
+
+        self.stats["member_updates"] += 1
+        admins = self._cached(change.chat.id)
+        if admins is None:
+            return
+
+        member = change.new_chat_member
+        if member.status in ADMIN_STATUSES:
+            admins.add(member.user.id)
+        else:
+            admins.discard(member.user.id)
+
+    def register(self, app, group: int = -2):
+        """
+        Listen for chat member changes
+
+        chat_member updates are only delivered when requested in
+        allowed_updates (e.g. Update.ALL_TYPES) and the bot is a chat admin.
+        """
+        app.add_handler(
+            ChatMemberHandler(self.on_chat_member, ChatMemberHandler.ANY_CHAT_MEMBER),
+            group=group
+        )
@@ -0,0 +1,84 @@
+"""
+rate_limit.py - Async Token Bucket
+Smooth outgoing message rates below Telegram's flood limits
+"""
+
+import asyncio
+import struct
+import time
+
+class AsyncTokenBucket:
+    """
+    Token bucket for asyncio
+
+    rate tokens are added per second up to capacity (the allowed burst).
+    acquire() waits until enough tokens are available; waiters are served
+    in arrival order so one large request cannot be starved.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.stats = {"acquired": 0, "waited": 0, "wait_seconds": 0.0}
+
+    def _refill(self):
+        """Add tokens earned since the last update"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Currently available tokens"""
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting (False if not enough)"""
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        self.stats["acquired"] += tokens
+        return True
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until tokens are available and take them"""
+        if tokens > self.capacity:
+            raise ValueError("cannot acquire more tokens than capacity")
+
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                wait = (tokens - self._tokens) / self.rate
+                self.stats["waited"] += 1
+                self.stats["wait_seconds"] += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= tokens
+            self.stats["acquired"] += tokens
+
+    def export_state(self) -> bytes:
+        """Token level and wall-clock time (warm restart)"""
+        return struct.pack("<dd", self.tokens, time.time())
+
+    def import_state(self, data: bytes):
+        """Restore token level, refilled for the time spent restarting"""
+        tokens, saved_at = struct.unpack("<dd", data)
+        elapsed = max(0.0, time.time() - saved_at)
+        self._tokens = min(self.capacity, tokens + elapsed * self.rate)
+        self._updated = time.monotonic()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
@@ -0,0 +1,210 @@
+"""
+registry_compiler.py - Registry Compiler
+Validates COMMAND_REGISTRY and FEATURE_REGISTRY and emits one immutable
+manifest with every derived index, cached by a hash of the registry files
+
+Usage:
+    python registry_compiler.py          # validate and write the manifest
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import unicodedata
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = "DATA_STORAGE/registry_manifest.json"
+MANIFEST_VERSION = 1
+REGISTRY_MODULES = ("COMMAND_REGISTRY", "FEATURE_REGISTRY")
+
+COMMAND_FIELDS = {
+    "enabled": bool, "description": str, "aliases": list, "admin_only": bool,
+    "group_only": bool, "cooldown": (int, float), "category": str,
+    "feature_dependency": (str, type(None))
+}
+FEATURE_FIELDS = {
+    "enabled": bool, "description": str, "version": str, "category": str,
+    "dependencies": list, "admin_configurable": bool, "settings": dict
+}
+
+class RegistryError(ValueError):
+    """Registries failed validation"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+def fold_token(token: str) -> str:
+    """
+    Lookup key for a command token
+
+    NFC matters for Bangla: keyboards send য় both precomposed (U+09DF) and
+    as য + nukta, and NFC maps both to the same sequence.
+    """
+    return unicodedata.normalize("NFC", token).casefold()
+
+def _check_fields(kind: str, name: str, entry: Dict, fields: Dict, errors: List[str]):
+    """Required keys with expected types"""
+    for field, expected in fields.items():
+        if field not in entry:
+            errors.append(f"{kind} '{name}': missing '{field}'")
+        elif not isinstance(entry[field], expected):
+            errors.append(f"{kind} '{name}': '{field}' has type {type(entry[field]).__name__}")
+
+def feature_order(features: Dict[str, Dict], errors: List[str]) -> List[str]:
+    """Features with their (known) dependencies first; cycles are errors"""
+    order, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            errors.append(f"feature dependency cycle: {' -> '.join(path + [name])}")
+            return
+        state[name] = "visiting"
+        for dependency in features[name].get("dependencies", []):
+            if dependency in features:
+                visit(dependency, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in features:
+        visit(name, [])
+    return order
+
+def validate(commands: Dict[str, Dict], features: Dict[str, Dict]) -> Tuple[List[str], List[str]]:
+    """(errors, warnings) for both registries"""
+    errors, warnings = [], []
+
+    for name, feature in features.items():
+        _check_fields("feature", name, feature, FEATURE_FIELDS, errors)
+        for dependency in feature.get("dependencies", []):
+            if dependency not in features:
+                # e.g. "database" is infrastructure, not a registry feature
+                warnings.append(f"feature '{name}': dependency '{dependency}' is not a registered feature")
+
+    owners: Dict[str, str] = {}
+    for name, command in commands.items():
+        _check_fields("command", name, command, COMMAND_FIELDS, errors)
+
+        dependency = command.get("feature_dependency")
+        if dependency is not None and dependency not in features:
+            errors.append(f"command '{name}': feature_dependency '{dependency}' is not a registered feature")
+
+        for token in [name] + list(command.get("aliases", [])):
+            key = fold_token(token)
+            owner = owners.setdefault(key, name)
+            if owner != name:
+                errors.append(f"command '{name}': alias '{token}' is already used by '{owner}'")
+            elif token != name and key == fold_token(name):
+                warnings.append(f"command '{name}': alias '{token}' repeats the command name")
+
+    feature_order(features, errors)
+    return errors, warnings
+
+def compile_registries(commands: Dict[str, Dict], features: Dict[str, Dict]) -> Dict:
+    """Validate and derive every index as plain JSON-able data"""
+    errors, warnings = validate(commands, features)
+    if errors:
+        raise RegistryError(errors)
+    for warning in warnings:
+        logger.warning(f"⚠️ {warning}")
+
+    enabled_commands = [name for name, command in commands.items() if command["enabled"]]
+    alias_map, by_category, by_feature, dependents = {}, {}, {}, {}
+    for name, command in commands.items():
+        for token in [name] + command["aliases"]:
+            alias_map.setdefault(fold_token(token), name)
+        if command["enabled"]:
+            by_category.setdefault(command["category"], []).append(name)
+            if command["feature_dependency"]:
+                by_feature.setdefault(command["feature_dependency"], []).append(name)
+
+    for name, feature in features.items():
+        for dependency in feature["dependencies"]:
+            dependents.setdefault(dependency, []).append(name)
+
+    return {
+        "commands": commands,
+        "features": features,
+        "enabled_commands": enabled_commands,
+        "enabled_features": [name for name, feature in features.items() if feature["enabled"]],
+        "alias_map": alias_map,
+        "commands_by_category": by_category,
+        "commands_by_feature": by_feature,
+        "feature_order": feature_order(features, []),
+        "feature_dependents": dependents,
+        "warnings": warnings
+    }
+
+def freeze(value):
+    """Read-only view: dicts become mappingproxies, lists become tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def registry_hash() -> str:
+    """sha256 of the registry source files (found without importing them)"""
+    digest = hashlib.sha256(f"manifest-v{MANIFEST_VERSION}".encode())
+    for module in REGISTRY_MODULES:
+        spec = importlib.util.find_spec(module)
+        with open(spec.origin, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def build_manifest(path: Optional[str] = MANIFEST_PATH) -> Dict:
+    """Import the registries, compile them and cache the result"""
+    command_registry = importlib.import_module("COMMAND_REGISTRY")
+    feature_registry = importlib.import_module("FEATURE_REGISTRY")
+    manifest = compile_registries(command_registry.COMMANDS, feature_registry.FEATURES)
+    manifest["source_hash"] = registry_hash()
+
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        logger.info(f"📦 Registry manifest compiled ({len(manifest['commands'])} commands, "
+                    f"{len(manifest['features'])} features)")
+    return manifest
+
+def load_manifest(path: str = MANIFEST_PATH) -> MappingProxyType:
+    """Cached manifest when the registry files are unchanged, else recompile"""
+    source_hash = registry_hash()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("source_hash") == source_hash:
+            return freeze(manifest)
+    except (OSError, ValueError):
+        pass
+    return freeze(build_manifest(path))
+
+_manifest: Optional[MappingProxyType] = None
+
+def get_manifest() -> MappingProxyType:
+    """Process-wide manifest (loaded once)"""
+    global _manifest
+    if _manifest is None:
+        _manifest = load_manifest()
+    return _manifest
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        compiled = build_manifest()
+    except RegistryError as e:
+        for error in e.errors:
+            print(f"❌ {error}")
+        sys.exit(1)
+    print(f"✅ Manifest {compiled['source_hash'][:12]} written to {MANIFEST_PATH}")
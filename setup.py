@@ -5,10 +5,37 @@ User শুধু এই ফাইলটি রান করবে
 
 import os
 import sys
+import json
+import time
+import hashlib
+import argparse
 import subprocess
 import getpass
 from pathlib import Path
 from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SETUP_VERSION = "6.0.0"
+
+# Python packages (get an __init__.py) and plain data directories (never do)
+PACKAGE_DIRS = [
+    "SETUP_CONFIG",
+    "CORE_SYSTEM",
+    "MASTER_REGISTRIES",
+    "MASTER_REGISTRIES/features",
+    "MASTER_REGISTRIES/commands",
+    "MASTER_REGISTRIES/admin",
+    "MASTER_REGISTRIES/features/auto_features",
+    "MASTER_REGISTRIES/commands/auto_commands",
+    "MASTER_REGISTRIES/admin/auto_admin",
+    "DATABASE",
+    "DATABASE/models",
+    "UTILITIES"
+]
+DATA_DIRS = ["MEDIA_TOOLS", "DATA_STORAGE"]
+
+PROVISION_STAMP = "DATA_STORAGE/.provisioned"
 
 # Color codes for beautiful interface
 class Colors:
@@ -145,29 +172,35 @@ def setup_cloudinary():
     else:
         return {"use_cloudinary": False}
 
-def generate_config(token, admin_id, cloudinary_config):
-    """Generate encrypted config file"""
-    from SETUP_CONFIG.crypto_vault import CryptoVault
-    
-    config_data = {
+def build_config(token, admin_ids, cloudinary_config, features=None, bot_settings=None):
+    """Config dict stored in the vault"""
+    return {
         "bot_token": token,
-        "admin_ids": [admin_id],
+        "admin_ids": list(admin_ids),
         "bot_settings": {
             "name": "𝗡ɪʟᴀ♡ʚɞ ←●_0",
-            "version": "6.0.0",
+            "version": SETUP_VERSION,
             "auto_setup": True,
-            "debug_mode": False
+            "debug_mode": False,
+            **(bot_settings or {})
         },
         "features": {
             "welcome_pro": True,
             "rules_system": True,
             "live_stream": True,
             "image_generator": True,
-            "sticker_maker": True
+            "sticker_maker": True,
+            **(features or {})
         },
         "cloudinary": cloudinary_config,
         "setup_date": datetime.now().isoformat()
     }
+
+def generate_config(token, admin_id, cloudinary_config):
+    """Generate encrypted config file"""
+    from SETUP_CONFIG.crypto_vault import CryptoVault
+    
+    config_data = build_config(token, [admin_id], cloudinary_config)
     
     # Create data directory if not exists
     os.makedirs("DATA_STORAGE", exist_ok=True)
@@ -200,35 +233,29 @@ def test_bot_connection(token):
         print(f"{Colors.RED}❌ Connection failed: {e}{Colors.END}")
         return False
 
-def create_project_structure():
-    """Create all required folders and files"""
-    folders = [
-        "SETUP_CONFIG",
-        "CORE_SYSTEM", 
-        "MASTER_REGISTRIES/features",
-        "MASTER_REGISTRIES/commands",
-        "MASTER_REGISTRIES/admin",
-        "MASTER_REGISTRIES/features/auto_features",
-        "MASTER_REGISTRIES/commands/auto_commands", 
-        "MASTER_REGISTRIES/admin/auto_admin",
-        "MEDIA_TOOLS",
-        "DATABASE/models",
-        "UTILITIES",
-        "DATA_STORAGE"
-    ]
+def ensure_structure(root=".", verbose=True):
+    """Create declared folders; __init__.py only in package folders"""
+    created = 0
+    for folder in PACKAGE_DIRS + DATA_DIRS:
+        path = os.path.join(root, folder)
+        if not os.path.isdir(path):
+            os.makedirs(path, exist_ok=True)
+            created += 1
+            if verbose:
+                print(f"{Colors.GREEN}📁 Created: {folder}{Colors.END}")
     
-    for folder in folders:
-        os.makedirs(folder, exist_ok=True)
-        print(f"{Colors.GREEN}📁 Created: {folder}{Colors.END}")
-    
-    # Create __init__.py files
-    for root, dirs, files in os.walk("."):
-        if "__pycache__" not in root:
-            init_file = os.path.join(root, "__init__.py")
-            if not os.path.exists(init_file):
-                with open(init_file, "w") as f:
-                    f.write('"""Package initialization"""\n')
+    for folder in PACKAGE_DIRS:
+        init_file = os.path.join(root, folder, "__init__.py")
+        if not os.path.exists(init_file):
+            with open(init_file, "w") as f:
+                f.write('"""Package initialization"""\n')
+            created += 1
     
+    return created
+
+def create_project_structure():
+    """Create all required folders and files"""
+    ensure_structure(".")
     print(f"{Colors.GREEN}✅ Project structure created!{Colors.END}")
 
 def show_summary(token, admin_id):
@@ -323,5 +350,154 @@ def main():
         print(f"{Colors.GREEN}🚀 Starting Nila Bot Pro...{Colors.END}")
         os.system("python master.py")
 
+# ───────────── Headless fleet provisioning ─────────────
+
+@contextmanager
+def timed(timings, step):
+    """Record a step's wall time in milliseconds"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[step] = round((time.perf_counter() - started) * 1000, 1)
+
+def instance_digest(instance):
+    """Stable hash of an instance spec (stamped after provisioning)"""
+    canonical = json.dumps(instance, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{SETUP_VERSION}:{canonical}".encode()).hexdigest()
+
+def validate_instance(instance):
+    """Error message for an invalid instance spec (None when valid)"""
+    token = instance.get("bot_token", "")
+    if len(token) < 10 or ":" not in token:
+        return "invalid bot_token"
+    admin_ids = instance.get("admin_ids", [])
+    if not admin_ids or not all(str(admin_id).isdigit() for admin_id in admin_ids):
+        return "admin_ids must be a non-empty list of numeric IDs"
+    return None
+
+def provision_instance(instance, test_connection=False, force=False):
+    """Provision one bot instance directory; unchanged specs are skipped"""
+    from SETUP_CONFIG.crypto_vault import CryptoVault
+    
+    name = instance.get("name", "default")
+    root = instance.get("root", os.path.join("instances", name))
+    result = {"name": name, "root": root, "timings": {}}
+    timings = result["timings"]
+    
+    error = validate_instance(instance)
+    if error:
+        return dict(result, status="failed", error=error)
+    
+    with timed(timings, "structure"):
+        ensure_structure(root, verbose=False)
+    
+    stamp_path = os.path.join(root, PROVISION_STAMP)
+    vault_path = os.path.join(root, "DATA_STORAGE", "config.vault")
+    digest = instance_digest(instance)
+    with timed(timings, "check"):
+        unchanged = (
+            not force and os.path.exists(vault_path) and os.path.exists(stamp_path)
+            and Path(stamp_path).read_text().strip() == digest
+        )
+    if unchanged:
+        return dict(result, status="unchanged")
+    
+    try:
+        with timed(timings, "vault_key"):
+            vault = CryptoVault(vault_path)
+        
+        with timed(timings, "config"):
+            # Keep settings changed at runtime, spec values win
+            existing = vault.load_config() if os.path.exists(vault_path) else None
+            config_data = build_config(
+                instance["bot_token"],
+                [int(admin_id) for admin_id in instance["admin_ids"]],
+                instance.get("cloudinary", {"use_cloudinary": False}),
+                features={**((existing or {}).get("features", {})), **instance.get("features", {})},
+                bot_settings={**((existing or {}).get("bot_settings", {})),
+                              **instance.get("bot_settings", {})}
+            )
+            if existing:
+                config_data = {**existing, **config_data, "setup_date": existing.get("setup_date")}
+            vault.save_config(config_data)
+        
+        if test_connection:
+            with timed(timings, "connection"):
+                if not test_bot_connection(instance["bot_token"]):
+                    return dict(result, status="failed", error="connection test failed")
+        
+        Path(stamp_path).write_text(digest)
+    except Exception as e:
+        return dict(result, status="failed", error=str(e))
+    
+    return dict(result, status="provisioned")
+
+def install_requirements_once():
+    """pip install -r requirements.txt unless this exact file was installed before"""
+    stamp_path = "DATA_STORAGE/.requirements.sha256"
+    digest = hashlib.sha256(Path("requirements.txt").read_bytes()).hexdigest()
+    if os.path.exists(stamp_path) and Path(stamp_path).read_text().strip() == digest:
+        return "unchanged"
+    
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "-q", "-r", "requirements.txt"])
+    os.makedirs("DATA_STORAGE", exist_ok=True)
+    Path(stamp_path).write_text(digest)
+    return "installed"
+
+def provision_fleet(spec_path, workers=None, force=False):
+    """Provision every instance in a spec file in parallel"""
+    with open(spec_path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    
+    instances = spec.get("instances", [])
+    names = [instance.get("name", "default") for instance in instances]
+    if len(set(names)) != len(names):
+        print(f"{Colors.RED}❌ Instance names must be unique{Colors.END}")
+        return False
+    
+    started = time.perf_counter()
+    if spec.get("install_dependencies", False):
+        dependency_timings = {}
+        with timed(dependency_timings, "dependencies"):
+            status = install_requirements_once()
+        print(f"{Colors.CYAN}📦 Dependencies {status} ({dependency_timings['dependencies']} ms){Colors.END}")
+    
+    # Threads, not processes: work is mostly file and network I/O and
+    # multiprocessing semaphores are unavailable on Termux
+    workers = workers or spec.get("workers") or min(8, max(1, len(instances)))
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(provision_instance, instance, spec.get("test_connection", False), force)
+            for instance in instances
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            steps = " | ".join(f"{step} {ms} ms" for step, ms in result["timings"].items())
+            color = {"provisioned": Colors.GREEN, "unchanged": Colors.BLUE}.get(result["status"], Colors.RED)
+            detail = f" ({result['error']})" if "error" in result else ""
+            print(f"{color}⏱️ {result['name']}: {result['status']}{detail}{Colors.END}  {steps}")
+    
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    elapsed = time.perf_counter() - started
+    print(f"\n{Colors.BOLD}✅ {len(results)} instances in {elapsed:.2f}s "
+          f"({workers} workers): {counts}{Colors.END}")
+    return counts.get("failed", 0) == 0
+
+def parse_args():
+    """Command line options (no options = interactive wizard)"""
+    parser = argparse.ArgumentParser(description="Nila Bot setup")
+    parser.add_argument("--spec", help="headless mode: provision instances from a JSON spec")
+    parser.add_argument("--workers", type=int, help="parallel provisioning workers")
+    parser.add_argument("--force", action="store_true", help="re-provision unchanged instances")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.spec:
+        sys.exit(0 if provision_fleet(args.spec, args.workers, args.force) else 1)
     main()
@@ -0,0 +1,130 @@
+"""
+single_flight.py - Request Coalescing (Single-Flight)
+Concurrent requests with the same key share one in-flight computation
+"""
+
+import asyncio
+import hashlib
+import logging
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Share one computation between concurrent identical requests
+
+    The first caller for a key starts the computation as its own task;
+    callers arriving while it runs await the same result. A caller being
+    cancelled never cancels the shared work. The optional timeout bounds
+    the computation itself, so a stuck key cannot block later callers.
+    """
+
+    def __init__(self, name: str = "default", timeout: Optional[float] = None):
+        self.name = name
+        self.timeout = timeout
+        self.stats = {"calls": 0, "executions": 0, "shared": 0, "timeouts": 0, "errors": 0}
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        # The loop keeps only weak references to tasks
+        self._tasks = set()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 timeout: Optional[float] = None) -> Any:
+        """Run fn() once per key at a time and return its result to every caller"""
+        self.stats["calls"] += 1
+
+        future = self._calls.get(key)
+        if future is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.stats["executions"] += 1
+        task = asyncio.ensure_future(self._run(key, fn, future, timeout or self.timeout))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(future)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                   future: asyncio.Future, timeout: Optional[float]):
+        """Execute the shared computation and publish its outcome"""
+        try:
+            if timeout:
+                result = await asyncio.wait_for(fn(), timeout)
+            else:
+                result = await fn()
+            future.set_result(result)
+        except asyncio.TimeoutError as e:
+            self.stats["timeouts"] += 1
+            logger.warning(f"⏱️ {self.name}: computation for {key!r} timed out after {timeout}s")
+            future.set_exception(e)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            future.set_exception(e)
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+            # Mark exceptions retrieved even when every caller went away
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    def forget(self, key: Hashable):
+        """Let the next caller start a fresh computation for key"""
+        self._calls.pop(key, None)
+
+    def summary(self) -> Dict:
+        """Metrics including how much duplicate work was avoided"""
+        calls = self.stats["calls"]
+        return dict(self.stats, in_flight=len(self._calls),
+                    duplicate_ratio=round(self.stats["shared"] / calls, 4) if calls else 0.0)
+
+def content_key(data) -> Hashable:
+    """Coalescing key for media input: digest of bytes, identity of other objects"""
+    if data is None:
+        return None
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(data, digest_size=16).digest()
+    return id(data)
+
+# Named flights shared across features (e.g. "image", "sticker", "welcome")
+_flights: Dict[str, SingleFlight] = {}
+
+def get_flight(name: str, timeout: Optional[float] = None) -> SingleFlight:
+    """Get or create a named SingleFlight"""
+    flight = _flights.get(name)
+    if flight is None:
+        flight = _flights[name] = SingleFlight(name, timeout)
+    return flight
+
+def flight_stats() -> Dict[str, Dict]:
+    """Metrics for every named flight"""
+    return {name: flight.summary() for name, flight in _flights.items()}
+
+def coalesce(name: str, key: Callable[..., Hashable], timeout: Optional[float] = None):
+    """
+    Decorator: coalesce calls of an async function by key(*args, **kwargs)
+
+    Apply it to the expensive part (rendering, downloading), not to the
+    handler that replies, since every caller still sends its own message.
+    """
+    def decorator(fn):
+        flight = get_flight(name, timeout)
+
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await flight.do(key(*args, **kwargs), lambda: fn(*args, **kwargs))
+
+        wrapper.flight = flight
+        return wrapper
+    return decorator
@@ -0,0 +1,324 @@
+"""
+spam_guard.py - Near-Duplicate Spam Detection
+MinHash fingerprints of normalized text in a time-windowed LSH index, shared across chats
+"""
+
+import logging
+import time
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from telegram import Update
+from telegram.constants import ChatType
+from telegram.error import TelegramError
+from telegram.ext import ApplicationHandlerStop, ContextTypes, MessageHandler, filters
+
+from stylish_text import StylishText
+
+logger = logging.getLogger(__name__)
+
+GROUP_CHATS = (ChatType.GROUP, ChatType.SUPERGROUP)
+
+SHINGLE = 4
+PERMUTATIONS = 32
+_BASE = np.uint64(0x100000001B3)
+_MIX1 = np.uint64(0xFF51AFD7ED558CCD)
+_MIX2 = np.uint64(0xC4CEB9FE1A85EC53)
+_SHIFT = np.uint64(33)
+_HIGH = np.uint64(32)
+# Fixed seed: fingerprints stay comparable across restarts and bots
+_rng = np.random.RandomState(0x5EED)
+_MULT = _rng.randint(1, 2 ** 62, size=PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_ADD = _rng.randint(0, 2 ** 62, size=PERMUTATIONS, dtype=np.uint64)
+
+def spam_text(text: str) -> str:
+    """Normalized letters only: styling, case, digits, emoji and punctuation are dropped"""
+    text = StylishText.normalize(text)
+    return " ".join("".join(
+        char if char.isalpha() or unicodedata.category(char)[0] == "M" else " "
+        for char in text
+    ).split())
+
+def shingle_hashes(text: str, size: int = SHINGLE) -> np.ndarray:
+    """64-bit hashes of every character n-gram (rolling polynomial, then mixed)"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    count = len(codes) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes = hashes * _BASE + codes[offset:offset + count]
+    hashes ^= hashes >> _SHIFT
+    hashes *= _MIX1
+    hashes ^= hashes >> _SHIFT
+    hashes *= _MIX2
+    hashes ^= hashes >> _SHIFT
+    return hashes
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (PERMUTATIONS x uint32) of a normalized text"""
+    hashes = np.unique(shingle_hashes(text))
+    return ((hashes[:, None] * _MULT + _ADD).min(axis=0) >> _HIGH).astype(np.uint32)
+
+class SpamCluster:
+    """Near-identical messages seen within the window"""
+
+    __slots__ = ("first_seen", "last_seen", "count", "live", "senders", "pending", "flagged")
+
+    def __init__(self, now: float):
+        self.first_seen = now
+        self.last_seen = now
+        self.count = 0
+        self.live = 0
+        self.senders: Dict[int, Dict[int, int]] = {}  # user_id -> {chat_id: live copies}
+        self.pending: Dict[int, List[Tuple[int, int]]] = {}  # user_id -> (chat_id, message_id)
+        self.flagged: Set[int] = set()
+
+    def __repr__(self):
+        return f"SpamCluster(count={self.count}, live={self.live}, senders={len(self.senders)})"
+
+    def forget(self, user_id: int, chat_id: int):
+        """An expired copy no longer counts for its sender"""
+        chats = self.senders.get(user_id)
+        if chats is None:
+            return
+        chats[chat_id] -= 1
+        if not chats[chat_id]:
+            del chats[chat_id]
+        if not chats:
+            del self.senders[user_id]
+            self.pending.pop(user_id, None)
+            self.flagged.discard(user_id)
+
+class SpamIndex:
+    """
+    Time-windowed near-duplicate index
+
+    Each message becomes a 32-value MinHash signature of its normalized
+    letter 4-grams, so a mutated copy (styled words, inserted emoji,
+    changed links or amounts) keeps most of its signature. Signatures are
+    split into bands of two values; a bucket maps a band to the newest
+    entry that had it, so a lookup is one dict probe per band and the
+    best candidate is confirmed by comparing whole signatures. A match
+    joins that entry's cluster, which counts live copies per sender and
+    chat.
+    Entries live in fixed-size ring arrays and leave the index when they
+    fall out of the window or the ring wraps, so memory is bounded by
+    max_entries however busy the bot is.
+
+    A sender is a spammer once a cluster has wave_size copies and they
+    have posted it in min_chats chats. Phrases everyone posts ("good
+    morning everyone") form big clusters too, but from one chat per
+    sender, so they are never flagged.
+    """
+
+    def __init__(self, window: float = 600.0, max_entries: int = 20000, bands: int = 8,
+                 similarity: float = 0.35, min_length: int = 24, wave_size: int = 3,
+                 min_chats: int = 2):
+        if not 1 <= bands <= PERMUTATIONS // 2:
+            raise ValueError(f"bands must be between 1 and {PERMUTATIONS // 2}")
+        self.window = window
+        self.capacity = max_entries
+        self.bands = bands
+        self.similarity = similarity
+        self.min_length = min_length
+        self.wave_size = wave_size
+        self.min_chats = min_chats
+        self.stats = {"checked": 0, "short": 0, "matched": 0, "clusters": 0, "spammers": 0}
+
+        self._signatures = np.zeros((max_entries, PERMUTATIONS), dtype=np.uint32)
+        self._times = np.zeros(max_entries, dtype=np.float64)
+        self._cluster_ids = np.zeros(max_entries, dtype=np.int64)
+        self._users = np.zeros(max_entries, dtype=np.int64)
+        self._chats = np.zeros(max_entries, dtype=np.int64)
+        self._buckets: Dict[int, int] = {}
+        self._clusters: Dict[int, SpamCluster] = {}
+        self._head = 0  # next sequence number
+        self._tail = 0  # oldest live sequence number
+
+    def __len__(self) -> int:
+        return self._head - self._tail
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        """One bucket key per band (two signature values plus the band number)"""
+        pairs = signature.view(np.uint64)[:self.bands].tolist()
+        return [(pair << 4) | band for band, pair in enumerate(pairs)]
+
+    def _expire(self, now: float):
+        """Drop entries outside the window, and the oldest when the ring is full"""
+        cutoff = now - self.window
+        while self._tail < self._head and (
+                self._head - self._tail >= self.capacity
+                or self._times[self._tail % self.capacity] < cutoff):
+            slot = self._tail % self.capacity
+            for key in self._band_keys(self._signatures[slot]):
+                if self._buckets.get(key) == self._tail:
+                    del self._buckets[key]
+            cluster_id = int(self._cluster_ids[slot])
+            cluster = self._clusters[cluster_id]
+            cluster.live -= 1
+            if not cluster.live:
+                del self._clusters[cluster_id]
+            else:
+                cluster.forget(int(self._users[slot]), int(self._chats[slot]))
+            self._tail += 1
+
+    def _best_match(self, signature: np.ndarray, keys: List[int]) -> Tuple[int, float]:
+        """Live entry most similar to a signature, as (sequence, similarity)"""
+        best, best_similarity = -1, 0.0
+        seen = set()
+        for key in keys:
+            seq = self._buckets.get(key)
+            if seq is None or seq < self._tail or seq in seen:
+                continue
+            seen.add(seq)
+            similarity = float(np.count_nonzero(
+                self._signatures[seq % self.capacity] == signature)) / PERMUTATIONS
+            if similarity > best_similarity:
+                best, best_similarity = seq, similarity
+        return best, best_similarity
+
+    def add(self, text: str, chat_id: int = 0, user_id: int = 0, message_id: int = 0,
+            now: Optional[float] = None) -> Optional[SpamCluster]:
+        """Index a message and return its cluster (None when too short to judge)"""
+        self.stats["checked"] += 1
+        text = spam_text(text)
+        if len(text) < self.min_length:
+            self.stats["short"] += 1
+            return None
+
+        now = now or time.time()
+        self._expire(now)
+        signature = minhash(text)
+        keys = self._band_keys(signature)
+        seq = self._head
+        match, similarity = self._best_match(signature, keys)
+
+        if match >= 0 and similarity >= self.similarity:
+            self.stats["matched"] += 1
+            cluster_id = int(self._cluster_ids[match % self.capacity])
+            cluster = self._clusters[cluster_id]
+        else:
+            self.stats["clusters"] += 1
+            cluster_id, cluster = seq, SpamCluster(now)
+            self._clusters[cluster_id] = cluster
+
+        slot = seq % self.capacity
+        self._signatures[slot] = signature
+        self._times[slot] = now
+        self._cluster_ids[slot] = cluster_id
+        self._users[slot] = user_id
+        self._chats[slot] = chat_id
+        for key in keys:
+            self._buckets[key] = seq
+        self._head += 1
+
+        cluster.last_seen = now
+        cluster.count += 1
+        cluster.live += 1
+        chats = cluster.senders.setdefault(user_id, {})
+        chats[chat_id] = chats.get(chat_id, 0) + 1
+        if user_id not in cluster.flagged:
+            pending = cluster.pending.setdefault(user_id, [])
+            if len(pending) < self.wave_size:
+                pending.append((chat_id, message_id))
+        return cluster
+
+    def is_spam(self, cluster: Optional[SpamCluster], user_id: int) -> bool:
+        """Sender cross-posted a cluster that has become a wave"""
+        return (cluster is not None and cluster.live >= self.wave_size
+                and len(cluster.senders.get(user_id, ())) >= self.min_chats)
+
+    def flag(self, cluster: SpamCluster, user_id: int) -> List[Tuple[int, int]]:
+        """Mark a spammer; returns their copies not yet dealt with (first time only)"""
+        if user_id in cluster.flagged:
+            return []
+        cluster.flagged.add(user_id)
+        self.stats["spammers"] += 1
+        return cluster.pending.pop(user_id, [])
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the ring arrays and bucket table"""
+        arrays = sum(array.nbytes for array in (self._signatures, self._times, self._cluster_ids,
+                                                self._users, self._chats))
+        # dict slot plus a boxed int key and value per bucket
+        return arrays + len(self._buckets) * 100
+
+class SpamGuard:
+    """
+    Cross-group spam wave filter
+
+    Every group text and caption goes through one SpamIndex shared by all
+    chats. When a sender is flagged their copies so far are deleted
+    together, and later ones on sight. Admins are only looked up for
+    flagged messages, so normal traffic costs no API calls.
+    """
+
+    def __init__(self, index: Optional[SpamIndex] = None, action: str = "delete"):
+        self.index = index or SpamIndex()
+        self.action = action
+        self.stats = {"flagged": 0, "deleted": 0, "admin_skips": 0, "errors": 0}
+
+    async def on_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Index a group message; drop it (and stop other handlers) when it is part of a wave"""
+        message = update.effective_message
+        chat = update.effective_chat
+        if message is None or chat is None or chat.type not in GROUP_CHATS:
+            return
+        text = message.text or message.caption
+        if not text or text.startswith("/"):
+            return
+
+        user = update.effective_user
+        if user is None:
+            return
+        cluster = self.index.add(text, chat.id, user.id, message.message_id)
+        if not self.index.is_spam(cluster, user.id):
+            return
+
+        permissions = context.bot_data.get("permissions")
+        if permissions is not None and await permissions.is_admin(update, context):
+            self.stats["admin_skips"] += 1
+            return
+
+        self.stats["flagged"] += 1
+        targets = self.index.flag(cluster, user.id)
+        if targets:
+            logger.warning(f"🚫 Spam from {user.id}: {cluster.live} near-identical copies "
+                           f"from {len(cluster.senders)} senders")
+        else:
+            targets = [(chat.id, message.message_id)]
+
+        if self.action == "delete":
+            await self._delete(context.bot, targets)
+        raise ApplicationHandlerStop
+
+    async def _delete(self, bot, targets: List[Tuple[int, int]]):
+        for chat_id, message_id in targets:
+            try:
+                await bot.delete_message(chat_id, message_id)
+                self.stats["deleted"] += 1
+            except TelegramError as e:
+                self.stats["errors"] += 1
+                logger.debug(f"Cannot delete spam {message_id} in {chat_id}: {e}")
+
+    def register(self, app, group: int = -5):
+        """Check messages ahead of every other handler group"""
+        app.add_handler(
+            MessageHandler((filters.TEXT | filters.CAPTION) & filters.ChatType.GROUPS,
+                           self.on_message),
+            group=group
+        )
+
+def create_spam_guard(settings: Optional[Dict] = None) -> SpamGuard:
+    """Create guard from bot_settings['spam_guard']"""
+    settings = settings or {}
+    index = SpamIndex(
+        window=settings.get("window", 600),
+        max_entries=settings.get("max_entries", 20000),
+        bands=settings.get("bands", 8),
+        similarity=settings.get("similarity", 0.35),
+        min_length=settings.get("min_length", 24),
+        wave_size=settings.get("wave_size", 3),
+        min_chats=settings.get("min_chats", 2)
+    )
+    return SpamGuard(index, action=settings.get("action", "delete"))
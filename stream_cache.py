@@ -0,0 +1,159 @@
+"""
+stream_cache.py - Stream Source Metadata Cache
+Persistent URL/search -> resolved metadata cache under DATA_STORAGE/
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[str], Awaitable[Dict]]
+
+# Signed media URLs carry their expiry (googlevideo: ?expire=... or /expire/.../)
+EXPIRE_PATTERN = re.compile(r"[?&/]expire[=/](\d{9,11})")
+
+def signed_url_expiry(url: str) -> Optional[float]:
+    """Unix expiry embedded in a signed media URL (None if absent)"""
+    match = EXPIRE_PATTERN.search(url or "")
+    return float(match.group(1)) if match else None
+
+def cache_key(query: str) -> str:
+    """URLs are exact, search terms are case and space insensitive"""
+    query = query.strip()
+    if query.startswith(("http://", "https://")):
+        return "url:" + query
+    return "search:" + " ".join(query.casefold().split())
+
+class StreamMetadataCache:
+    """
+    Metadata cache with per-entry expiry and stale-while-revalidate
+
+    Each entry is fresh until refresh_at; after that it is still served
+    (while its signed URL is valid) and a single background resolution
+    replaces it. Concurrent misses for one key share one resolution.
+    Entries are persisted as JSON so restarts keep warm results.
+    """
+
+    def __init__(self, path: str = "DATA_STORAGE/stream_cache.json", ttl: float = 1800.0,
+                 stale_ttl: float = 6 * 3600.0, expiry_margin: float = 120.0,
+                 max_entries: int = 2000, save_delay: float = 2.0):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.expiry_margin = expiry_margin
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "revalidations": 0, "errors": 0}
+
+        self._entries: Dict[str, Dict] = {}
+        self._flight = SingleFlight("stream_metadata", timeout=120.0)
+        self._save_handle = None
+        self.load()
+
+    def load(self):
+        """Load persisted entries, dropping unusable ones"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Failed to load stream cache: {e}")
+            return
+
+        now = time.time()
+        self._entries = {k: v for k, v in entries.items() if v.get("usable_until", 0) > now}
+
+    def save(self):
+        """Write entries atomically"""
+        self._save_handle = None
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"❌ Failed to save stream cache: {e}")
+
+    def _schedule_save(self):
+        """Coalesce bursts of writes into one save"""
+        if self._save_handle is None:
+            loop = asyncio.get_running_loop()
+            self._save_handle = loop.call_later(self.save_delay, self.save)
+
+    def _entry(self, value: Dict) -> Dict:
+        """Wrap a resolved value with its freshness window"""
+        now = time.time()
+        refresh_at = now + self.ttl
+        usable_until = now + self.stale_ttl
+
+        expiry = signed_url_expiry(value.get("url", ""))
+        if expiry:
+            usable_until = min(usable_until, expiry - self.expiry_margin)
+            refresh_at = min(refresh_at, expiry - 2 * self.expiry_margin)
+
+        return {"value": value, "stored_at": now,
+                "refresh_at": refresh_at, "usable_until": usable_until}
+
+    def _store(self, key: str, value: Dict):
+        """Insert entry, evicting the oldest beyond max_entries"""
+        self._entries.pop(key, None)
+        self._entries[key] = self._entry(value)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._schedule_save()
+
+    def invalidate(self, query: str):
+        """Forget one entry (e.g. after a 403 on its URL)"""
+        if self._entries.pop(cache_key(query), None) is not None:
+            self._schedule_save()
+
+    async def get(self, query: str, loader: Loader) -> Dict:
+        """Cached value, revalidating stale entries in the background"""
+        key = cache_key(query)
+        entry = self._entries.get(key)
+        now = time.time()
+
+        if entry and now < entry["refresh_at"]:
+            self.stats["hits"] += 1
+            return entry["value"]
+
+        if entry and now < entry["usable_until"]:
+            self.stats["stale_hits"] += 1
+            if key not in self._flight:
+                self.stats["revalidations"] += 1
+                task = asyncio.create_task(self._resolve(key, query, loader))
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return entry["value"]
+
+        self.stats["misses"] += 1
+        return await self._resolve(key, query, loader)
+
+    async def _resolve(self, key: str, query: str, loader: Loader) -> Dict:
+        """Run loader once per key, sharing the result with waiters"""
+        return await self._flight.do(key, lambda: self._load(key, query, loader))
+
+    async def _load(self, key: str, query: str, loader: Loader) -> Dict:
+        """Resolve and store one entry"""
+        try:
+            value = await loader(query)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        self._store(key, value)
+        return value
+
+    async def close(self):
+        """Flush pending writes"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self.save()
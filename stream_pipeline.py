@@ -0,0 +1,274 @@
+"""
+stream_pipeline.py - Streaming Media Pipeline for live_stream
+Resolve source metadata once, then relay media in bounded chunks while it downloads
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from FEATURE_REGISTRY import get_feature_config
+from stream_cache import StreamMetadataCache
+
+logger = logging.getLogger(__name__)
+
+# Quality label -> maximum video height
+QUALITY_HEIGHTS = {"144p": 144, "240p": 240, "360p": 360, "480p": 480,
+                   "720p": 720, "1080p": 1080, "1440p": 1440, "2160p": 2160}
+
+# yt-dlp search prefixes per source
+SEARCH_PREFIXES = {"youtube": "ytsearch1:", "soundcloud": "scsearch1:"}
+
+@dataclass
+class StreamInfo:
+    """Resolved media source"""
+    query: str
+    title: str
+    url: str
+    duration: Optional[float] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    formats: List[Dict] = field(default_factory=list)
+    resolved_at: float = field(default_factory=time.time)
+
+def select_format(formats: List[Dict], max_height: int) -> Optional[Dict]:
+    """
+    Best format within the height limit
+
+    Progressive (audio and video) formats win, then ones with audio;
+    None when nothing with a url fits max_height.
+    """
+    candidates = [f for f in formats if f.get("url") and (f.get("height") or 0) <= max_height]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda f: (f.get("acodec") != "none",
+                                          f.get("vcodec") != "none",
+                                          (f.get("height") or 0), (f.get("tbr") or 0)))
+
+class StreamResolver:
+    """
+    Resolve a URL or search term into a direct media URL
+
+    yt-dlp extraction is blocking and slow, so it runs in a worker thread
+    and results go through the persistent StreamMetadataCache.
+    """
+
+    def __init__(self, max_quality: str = "1080p", default_source: str = "youtube",
+                 cache: Optional[StreamMetadataCache] = None):
+        self.max_height = QUALITY_HEIGHTS.get(max_quality, 1080)
+        self.default_source = default_source
+        self.cache = cache or StreamMetadataCache()
+
+    def _target(self, query: str) -> str:
+        """URL as-is, anything else becomes a search"""
+        if query.startswith(("http://", "https://")):
+            return query
+        return SEARCH_PREFIXES.get(self.default_source, "ytsearch1:") + query
+
+    def _extract(self, query: str) -> StreamInfo:
+        """Blocking yt-dlp metadata extraction (no download)"""
+        import yt_dlp
+
+        options = {"quiet": True, "no_warnings": True, "skip_download": True,
+                   "noplaylist": True}
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info = ydl.extract_info(self._target(query), download=False)
+
+        if info.get("entries"):
+            info = info["entries"][0]
+
+        formats = info.get("formats") or [info]
+        chosen = select_format(formats, self.max_height)
+        if chosen is None:
+            raise ValueError(f"No playable format for: {query}")
+
+        return StreamInfo(
+            query=query,
+            title=info.get("title", query),
+            url=chosen["url"],
+            duration=info.get("duration"),
+            headers=dict(chosen.get("http_headers") or {}),
+            formats=[{k: f.get(k) for k in ("format_id", "height", "ext", "tbr")}
+                     for f in formats]
+        )
+
+    async def _load(self, query: str) -> Dict:
+        """Cache loader: extract in a worker thread"""
+        loop = asyncio.get_running_loop()
+        info = await loop.run_in_executor(None, self._extract, query)
+        return asdict(info)
+
+    async def resolve(self, query: str) -> StreamInfo:
+        """Resolve through the metadata cache"""
+        return StreamInfo(**await self.cache.get(query, self._load))
+
+async def iter_http_chunks(session: aiohttp.ClientSession, url: str,
+                           headers: Optional[Dict[str, str]] = None,
+                           chunk_size: int = 256 * 1024) -> AsyncIterator[bytes]:
+    """Stream a URL in chunks without holding the whole body"""
+    async with session.get(url, headers=headers) as response:
+        response.raise_for_status()
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+
+async def iter_file_chunks(path: str, chunk_size: int = 256 * 1024) -> AsyncIterator[bytes]:
+    """Stream a local media file in chunks (reads run in a thread)"""
+    loop = asyncio.get_running_loop()
+    with open(path, "rb") as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+async def buffered(source: AsyncIterator[bytes], max_chunks: int = 8) -> AsyncIterator[bytes]:
+    """
+    Decouple producer and consumer with a bounded buffer
+
+    The producer runs ahead by at most max_chunks; when the consumer is slow
+    the full queue blocks the producer, which stops reading from the socket
+    (backpressure instead of buffering the whole file in memory).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_chunks)
+    done = object()
+
+    async def produce():
+        try:
+            async for chunk in source:
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(done)
+        finally:
+            # An early stop cancels us mid-put; close the HTTP stream now, not at GC
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except (asyncio.CancelledError, Exception):
+            pass
+
+@dataclass
+class RelayStats:
+    """Relay progress counters"""
+    bytes: int = 0
+    chunks: int = 0
+    first_chunk_s: Optional[float] = None
+    elapsed_s: float = 0.0
+
+async def relay(source: AsyncIterator[bytes], sink: Callable[[bytes], Awaitable[None]],
+                max_chunks: int = 8) -> RelayStats:
+    """Pump chunks from source to sink as they arrive"""
+    stats = RelayStats()
+    started = time.perf_counter()
+
+    async for chunk in buffered(source, max_chunks):
+        if stats.first_chunk_s is None:
+            stats.first_chunk_s = time.perf_counter() - started
+        await sink(chunk)
+        stats.bytes += len(chunk)
+        stats.chunks += 1
+
+    stats.elapsed_s = time.perf_counter() - started
+    return stats
+
+class StreamPipeline:
+    """live_stream pipeline: resolve once, stream with bounded buffers"""
+
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None,
+                 resolver: Optional[StreamResolver] = None,
+                 chunk_size: int = 256 * 1024, max_chunks: int = 8):
+        settings = get_feature_config("live_stream").get("settings", {})
+        self.resolver = resolver or StreamResolver(
+            max_quality=settings.get("max_quality", "1080p"),
+            default_source=settings.get("default_source", "youtube")
+        )
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self._session = session
+        self._own_session = session is None
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session (created lazily)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(sock_read=60))
+            self._own_session = True
+        return self._session
+
+    async def open(self, query: str) -> AsyncIterator[bytes]:
+        """
+        Resolve a query and return its chunk stream
+
+        Queries come from chat users, so they only ever reach the resolver
+        (URL or search); local files are streamed by calling
+        iter_file_chunks with a path the code chose itself.
+        """
+        info = await self.resolver.resolve(query)
+        return iter_http_chunks(await self.session(), info.url, info.headers, self.chunk_size)
+
+    async def stream_to(self, query: str, sink: Callable[[bytes], Awaitable[None]]) -> RelayStats:
+        """Relay a source into sink (e.g. a voice chat or upload writer)"""
+        source = await self.open(query)
+        stats = await relay(source, sink, self.max_chunks)
+        logger.info(f"📡 Relayed {stats.bytes} bytes in {stats.chunks} chunks "
+                    f"(first chunk after {stats.first_chunk_s or 0:.3f}s)")
+        return stats
+
+    async def close(self):
+        """Flush metadata cache and close the HTTP session if we created it"""
+        await self.resolver.cache.close()
+        if self._own_session and self._session and not self._session.closed:
+            await self._session.close()
+
+if __name__ == "__main__":
+    # Self-check: relay a local file served by a local HTTP stand-in
+    import hashlib
+    import os
+    import tempfile
+    import threading
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    async def check():
+        payload = os.urandom(3 * 1024 * 1024 + 123)
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "media.bin"), "wb") as f:
+                f.write(payload)
+
+            handler = partial(SimpleHTTPRequestHandler, directory=folder)
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+            digest = hashlib.sha256()
+
+            async def sink(chunk):
+                digest.update(chunk)
+                await asyncio.sleep(0)
+
+            url = f"http://127.0.0.1:{server.server_address[1]}/media.bin"
+            async with aiohttp.ClientSession() as session:
+                stats = await relay(iter_http_chunks(session, url, chunk_size=64 * 1024), sink, 4)
+            server.shutdown()
+
+        assert digest.digest() == hashlib.sha256(payload).digest()
+        assert stats.bytes == len(payload)
+        print(f"✅ Relayed {stats.bytes} bytes in {stats.chunks} chunks")
+
+    asyncio.run(check())
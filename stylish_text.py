@@ -4,11 +4,35 @@ Cool text styles for Nila Bot
 """
 
 import random
-from typing import List, Dict
+import unicodedata
+from typing import List, Dict, Optional
+
+# Invisible characters used to split filtered words (ZWJ/ZWNJ only change Bangla rendering)
+ZERO_WIDTH = "\u00ad\u180e\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff"
+
+# Blocks spammers draw look-alike letters from; folded ahead of time
+FOLD_RANGES = [
+    (0x00A0, 0x00FF),    # Latin-1 (superscripts, ligature-like compatibility forms)
+    (0x2070, 0x209F),    # superscripts and subscripts
+    (0x2100, 0x214F),    # letterlike symbols (ℍ, ℕ, ℓ)
+    (0x2150, 0x218F),    # number forms (Ⅻ)
+    (0x2460, 0x24FF),    # enclosed alphanumerics (①, ⒜, ⓐ)
+    (0x3250, 0x32FF),    # enclosed CJK numbers
+    (0xFB00, 0xFB06),    # latin ligatures (ﬁ)
+    (0xFF01, 0xFF5E),    # fullwidth ASCII
+    (0x1D400, 0x1D7FF),  # mathematical alphanumerics (all fonts, not only STYLES)
+    (0x1F100, 0x1F1FF)   # enclosed alphanumeric supplement (🄰, 🅐, 🅰, 🇦)
+]
 
 class StylishText:
     """Generate stylish text for Nila Bot"""
     
+    # Emoji decoration switch (turned off while the bot sheds load)
+    decorations_enabled = True
+    
+    # Reverse translation table for normalize() (built on first use)
+    _fold_table: Optional[Dict[int, str]] = None
+    
     # Text styles database
     STYLES = {
         "bold": {
@@ -183,7 +207,7 @@ class StylishText:
                 styled_text += char
         
         # Add emoji decoration
-        if add_emoji:
+        if add_emoji and cls.decorations_enabled:
             styled_text = cls._add_emoji_decor(styled_text)
         
         return styled_text
@@ -247,6 +271,66 @@ class StylishText:
                 rainbow_text += f"{heart} {char} "
         
         return rainbow_text.strip()
+    
+    @staticmethod
+    def _fold_char(char: str) -> str:
+        """NFKC + casefold of one character, enclosing punctuation dropped: ⒜ -> a, ⒈ -> 1"""
+        folded = unicodedata.normalize("NFKC", char).casefold()
+        if len(folded) > 2 and folded[0] == "(" and folded[-1] == ")":
+            folded = folded[1:-1]
+        elif len(folded) > 1 and folded[-1] == "." and folded[:-1].isalnum():
+            folded = folded[:-1]
+        return folded
+    
+    @classmethod
+    def _build_fold_table(cls) -> Dict[int, str]:
+        """Styled glyph -> plain lowercase text, for str.translate"""
+        table = {}
+        for start, end in FOLD_RANGES:
+            for codepoint in range(start, end + 1):
+                char = chr(codepoint)
+                if unicodedata.category(char) == "Cn":
+                    continue
+                folded = cls._fold_char(char)
+                if folded != char:
+                    table[codepoint] = folded
+        
+        # Negative circled/squared letters and regional indicators have no NFKC form
+        for first in (0x1F150, 0x1F170, 0x1F1E6):
+            for offset in range(26):
+                table[first + offset] = chr(ord("a") + offset)
+        
+        # Every glyph of every style maps back to its source character
+        for style in cls.STYLES.values():
+            for plain, glyph in style.items():
+                if glyph != plain:
+                    table[ord(glyph)] = plain.casefold()
+        
+        for char in ZERO_WIDTH + "".join(chr(c) for c in range(0xFE00, 0xFE10)):
+            table[ord(char)] = None
+        
+        cls._fold_table = table
+        return table
+    
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """
+        Fold text for filters and matching (not for display)
+        
+        Styled letters become plain lowercase, zero-width characters are
+        deleted, then NFKC (only when needed) and casefold, so "𝗙𝗥𝗘𝗘 ⓑⓘⓣⓒⓞⓘⓝ"
+        and "free bit\u200bcoin" both match "free bitcoin". A zero-width
+        character used in place of a space joins the words ("freebitcoin"),
+        since it cannot be told apart from one hidden inside a word. ASCII
+        text only pays for one casefold.
+        """
+        if text.isascii():
+            return text.casefold()
+        
+        text = text.translate(cls._fold_table or cls._build_fold_table())
+        if not unicodedata.is_normalized("NFKC", text):
+            text = unicodedata.normalize("NFKC", text)
+        return text.casefold()
 
 # Example usage
 if __name__ == "__main__":
@@ -274,3 +358,6 @@ if __name__ == "__main__":
     # Rainbow text
     rainbow = stylish.create_rainbow_text("Rainbow")
     print(f"Rainbow: {rainbow}")
+    
+    # Normalize styled text back for filters
+    print(f"Normalized: {stylish.normalize(styled)}")
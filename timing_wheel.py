@@ -0,0 +1,342 @@
+"""
+timing_wheel.py - Hierarchical Timing Wheel Scheduler
+Delayed and recurring bot actions with O(1) insert/cancel, batched firing and persistence
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from telegram.error import TelegramError
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"NTW1"
+SNAPSHOT_VERSION = 1
+
+class Timer:
+    """A pending action (handle returned by schedule)"""
+
+    __slots__ = ("deadline", "action", "payload", "interval", "key", "bucket")
+
+    def __init__(self, deadline: int, action: str, payload, interval: int, key: Optional[str]):
+        self.deadline = deadline
+        self.action = action
+        self.payload = payload
+        self.interval = interval
+        self.key = key
+        self.bucket = None
+
+    @property
+    def active(self) -> bool:
+        return self.bucket is not None
+
+    def __repr__(self):
+        return f"Timer({self.action!r}, tick={self.deadline}, key={self.key!r})"
+
+Handler = Callable[[List[Timer]], Awaitable[None]]
+
+class TimingWheel:
+    """
+    Hashed hierarchical timing wheel
+
+    Level 0 has one slot per tick; each higher level has slots 256 times
+    wider. A timer goes into the lowest level whose span covers its delay
+    and moves down a level when that level's slot comes round (cascade),
+    so insert and cancel are a set add/discard and each tick only touches
+    the timers due in it. Due timers are grouped by action and each
+    action handler gets the whole batch in one call. Actions are named
+    and payloads JSON-able, which is what lets pending timers be saved
+    and rescheduled after a restart.
+    """
+
+    def __init__(self, tick: float = 0.5, bits: int = 8, levels: int = 4,
+                 path: str = "DATA_STORAGE/timers.bin"):
+        self.tick = tick
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.levels = levels
+        self.max_delay_ticks = (1 << (bits * levels)) - 1
+        self.path = path
+        self.current = 0  # last processed tick
+        self.handlers: Dict[str, Handler] = {}
+        self.stats = {"scheduled": 0, "cancelled": 0, "fired": 0, "batches": 0, "errors": 0}
+
+        self._wheels = [[set() for _ in range(1 << bits)] for _ in range(levels)]
+        self._keys: Dict[str, Timer] = {}
+        self._count = 0
+        self._epoch = time.monotonic()
+        self._task = None
+        self._running = set()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Timer]:
+        for wheel in self._wheels:
+            for bucket in wheel:
+                yield from bucket
+
+    def register(self, action: str, handler: Handler):
+        """Handler for an action: async handler(timers) gets every timer due in a tick"""
+        self.handlers[action] = handler
+
+    def _now_tick(self) -> int:
+        return int((time.monotonic() - self._epoch) / self.tick)
+
+    def _place(self, timer: Timer):
+        """Put a timer into the lowest level whose span covers its delay"""
+        # delta is 0 only when cascading into the slot about to fire
+        delta = timer.deadline - self.current
+        level, shift = 0, 0
+        while delta >> (shift + self.bits) and level < self.levels - 1:
+            level += 1
+            shift += self.bits
+        bucket = self._wheels[level][(timer.deadline >> shift) & self.mask]
+        bucket.add(timer)
+        timer.bucket = bucket
+
+    def schedule(self, action: str, delay: float, payload=None, interval: Optional[float] = None,
+                 key: Optional[str] = None) -> Timer:
+        """
+        Run action after delay seconds (then every interval seconds if set)
+
+        A key makes the timer replaceable and cancellable by name, e.g.
+        "unmute:<chat>:<user>"; scheduling the same key again replaces it.
+        """
+        ticks = max(1, -(-int(delay * 1000) // int(self.tick * 1000)))
+        if ticks > self.max_delay_ticks:
+            raise ValueError(f"delay {delay}s is beyond the wheel's range")
+        interval_ticks = max(1, round(interval / self.tick)) if interval else 0
+
+        if key is not None:
+            self.cancel(key)
+        # Deadlines count from the wall-clock tick, not the last processed one
+        timer = Timer(max(self.current, self._now_tick()) + ticks, action, payload,
+                      interval_ticks, key)
+        self._place(timer)
+        if key is not None:
+            self._keys[key] = timer
+        self._count += 1
+        self.stats["scheduled"] += 1
+        return timer
+
+    def cancel(self, timer) -> bool:
+        """Cancel by handle or key"""
+        if not isinstance(timer, Timer):
+            timer = self._keys.get(timer)
+            if timer is None:
+                return False
+        if timer.bucket is None:
+            return False
+        timer.bucket.discard(timer)
+        timer.bucket = None
+        if timer.key is not None and self._keys.get(timer.key) is timer:
+            del self._keys[timer.key]
+        self._count -= 1
+        self.stats["cancelled"] += 1
+        return True
+
+    def get(self, key: str) -> Optional[Timer]:
+        """Pending timer with this key"""
+        return self._keys.get(key)
+
+    def remaining(self, timer: Timer) -> float:
+        """Seconds until a timer fires"""
+        return max(0.0, (timer.deadline - self._now_tick()) * self.tick)
+
+    def _cascade(self, level: int) -> int:
+        """Move the current slot of a level down; returns the slot index"""
+        index = (self.current >> (self.bits * level)) & self.mask
+        bucket = self._wheels[level][index]
+        if bucket:
+            self._wheels[level][index] = set()
+            for timer in bucket:
+                self._place(timer)
+        return index
+
+    def advance(self, to_tick: int) -> Dict[str, List[Timer]]:
+        """Process ticks up to to_tick and return due timers grouped by action"""
+        due: Dict[str, List[Timer]] = {}
+        if not self._count:
+            self.current = max(self.current, to_tick)
+            return due
+
+        while self.current < to_tick:
+            self.current += 1
+            index = self.current & self.mask
+            level = 1
+            while index == 0 and level < self.levels:
+                index = self._cascade(level)
+                level += 1
+
+            slot = self.current & self.mask
+            bucket = self._wheels[0][slot]
+            if not bucket:
+                continue
+            self._wheels[0][slot] = set()
+            for timer in bucket:
+                timer.bucket = None
+                due.setdefault(timer.action, []).append(timer)
+                if timer.interval:
+                    timer.deadline = self.current + timer.interval
+                    self._place(timer)
+                else:
+                    self._count -= 1
+                    if timer.key is not None and self._keys.get(timer.key) is timer:
+                        del self._keys[timer.key]
+            if not self._count:
+                self.current = to_tick
+        return due
+
+    def dispatch(self, due: Dict[str, List[Timer]]):
+        """Run one handler task per action batch"""
+        for action, timers in due.items():
+            self.stats["fired"] += len(timers)
+            handler = self.handlers.get(action)
+            if handler is None:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ No handler for {len(timers)} '{action}' timers")
+                continue
+            self.stats["batches"] += 1
+            task = asyncio.create_task(self._fire(action, handler, timers))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, action: str, handler: Handler, timers: List[Timer]):
+        try:
+            await handler(timers)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Timer action '{action}' failed for {len(timers)} timers: {e}")
+
+    def start(self):
+        """Start ticking (overdue restored timers fire on the first tick)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            delay = self._epoch + (self.current + 1) * self.tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # A lagging loop catches up here: several ticks, one batch per action
+            self.dispatch(self.advance(self._now_tick()))
+
+    def dumps(self) -> bytes:
+        """Pending timers with wall-clock deadlines (zlib-compressed JSON)"""
+        now_tick, now = self._now_tick(), time.time()
+        actions: Dict[str, int] = {}
+        rows = []
+        for timer in self:
+            index = actions.setdefault(timer.action, len(actions))
+            rows.append([round(now + (timer.deadline - now_tick) * self.tick, 2), index,
+                         timer.interval * self.tick, timer.key, timer.payload])
+        body = json.dumps({"version": SNAPSHOT_VERSION, "saved_at": now,
+                           "actions": list(actions), "timers": rows},
+                          ensure_ascii=False, separators=(",", ":"))
+        return SNAPSHOT_MAGIC + zlib.compress(body.encode(), 1)
+
+    def loads(self, data: bytes) -> int:
+        """Reschedule saved timers (overdue ones fire on the next tick)"""
+        if data[:4] != SNAPSHOT_MAGIC:
+            raise ValueError("not a timer snapshot")
+        snapshot = json.loads(zlib.decompress(data[4:]))
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported timer snapshot version {snapshot.get('version')}")
+
+        now, actions = time.time(), snapshot["actions"]
+        for deadline, index, interval, key, payload in snapshot["timers"]:
+            self.schedule(actions[index], max(0.0, deadline - now), payload,
+                          interval=interval or None, key=key)
+        return len(snapshot["timers"])
+
+    def save(self, path: Optional[str] = None):
+        """Write pending timers atomically"""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(self.dumps())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"❌ Failed to save timers: {e}")
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Load pending timers if a snapshot exists"""
+        path = path or self.path
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "rb") as f:
+                restored = self.loads(f.read())
+        except Exception as e:
+            logger.error(f"❌ Failed to load timers: {e}")
+            return 0
+        logger.info(f"⏰ Restored {restored} pending timers")
+        return restored
+
+    async def close(self):
+        """Stop ticking, let fired batches finish and save pending timers"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._running:
+            await asyncio.wait(self._running, timeout=5)
+        self.save()
+
+def register_bot_actions(wheel: TimingWheel, bot, concurrency: int = 20):
+    """
+    Built-in actions:
+    delete_message {chat_id, message_id}     - welcome auto-delete
+    unmute         {chat_id, user_id}        - end of a timed mute
+    send_message   {chat_id, text, ...}      - rules reminders (use interval)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def each(timers: List[Timer], call):
+        async def run(timer):
+            async with semaphore:
+                try:
+                    await call(timer.payload)
+                except TelegramError as e:
+                    logger.debug(f"Timer {timer.action} {timer.payload}: {e}")
+        await asyncio.gather(*(run(timer) for timer in timers))
+
+    async def delete_messages(timers: List[Timer]):
+        await each(timers, lambda p: bot.delete_message(p["chat_id"], p["message_id"]))
+
+    async def unmute(timers: List[Timer]):
+        # One getChat per chat restores the group's default permissions
+        by_chat: Dict[int, List[Timer]] = {}
+        for timer in timers:
+            by_chat.setdefault(timer.payload["chat_id"], []).append(timer)
+        for chat_id, chat_timers in by_chat.items():
+            try:
+                permissions = (await bot.get_chat(chat_id)).permissions
+            except TelegramError as e:
+                logger.warning(f"⚠️ Cannot unmute in {chat_id}: {e}")
+                continue
+            await each(chat_timers, lambda p: bot.restrict_chat_member(
+                p["chat_id"], p["user_id"], permissions=permissions))
+
+    async def send_messages(timers: List[Timer]):
+        await each(timers, lambda p: bot.send_message(
+            p["chat_id"], p["text"], parse_mode=p.get("parse_mode")))
+
+    wheel.register("delete_message", delete_messages)
+    wheel.register("unmute", unmute)
+    wheel.register("send_message", send_messages)
+
+def create_scheduler(settings: Optional[Dict] = None,
+                     path: str = "DATA_STORAGE/timers.bin") -> TimingWheel:
+    """Create wheel from bot_settings['scheduler'] and load pending timers"""
+    settings = settings or {}
+    wheel = TimingWheel(tick=settings.get("tick", 0.5), path=settings.get("path", path))
+    wheel.load()
+    return wheel
@@ -0,0 +1,311 @@
+"""
+user_state.py - Compact Per-User State Store
+Column-oriented array tables indexed by user id, with idle eviction and snapshots
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import Dict, Iterator, Optional, Tuple
+
+from telegram import Update
+from telegram.ext import TypeHandler
+
+logger = logging.getLogger(__name__)
+
+# Column name -> array typecode (I: uint32 seconds, d: float seconds, H/B: counters)
+DEFAULT_FIELDS = {
+    "last_seen": "I",
+    "message_count": "I",
+    "flood_window_start": "d",
+    "flood_count": "H",
+    "cooldown_until": "d",
+    "warnings": "B",
+    "welcomed_at": "I",
+    "joins": "H"
+}
+
+SNAPSHOT_MAGIC = b"NUS1"
+ENCRYPTED_MAGIC = b"NUE1"
+SNAPSHOT_VERSION = 1
+
+def type_bounds(typecode: str) -> Tuple[int, int]:
+    """Smallest and largest value of an integer array typecode"""
+    bits = array(typecode).itemsize * 8
+    if typecode in "BHILQ":
+        return 0, 2 ** bits - 1
+    return -2 ** (bits - 1), 2 ** (bits - 1) - 1
+
+class UserStateStore:
+    """
+    Shared per-user state for flood control, cooldowns, welcomes and analysis
+
+    Every field is one typed array (a column) and a user is a row number,
+    so a tracked user costs a few dozen bytes of column data plus one dict
+    slot, instead of a dict of boxed values. Evicted rows are filled by
+    moving the last row into the hole, which keeps columns dense. With a
+    Fernet key the snapshot file is compressed and encrypted, since it
+    maps user ids to their cooldowns and flood counters.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, str]] = None,
+                 path: str = "DATA_STORAGE/user_state.bin", idle_ttl: float = 7 * 86400,
+                 fernet=None):
+        self.fields = dict(fields or DEFAULT_FIELDS)
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.fernet = fernet
+        self._index: Dict[int, int] = {}
+        self._ids = array("q")
+        self._columns = {name: array(code) for name, code in self.fields.items()}
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._index
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def _row(self, user_id: int) -> int:
+        """Row of a user, appending a zeroed row if new (seen now, so not evicted at once)"""
+        row = self._index.get(user_id)
+        if row is None:
+            row = self._index[user_id] = len(self._ids)
+            self._ids.append(user_id)
+            for column in self._columns.values():
+                column.append(0)
+            self._columns["last_seen"][row] = int(time.time())
+        return row
+
+    def get(self, user_id: int, field: str, default=0):
+        """Field value (default for untracked users)"""
+        row = self._index.get(user_id)
+        if row is None:
+            return default
+        return self._columns[field][row]
+
+    def set(self, user_id: int, field: str, value):
+        """Set a field, tracking the user if needed"""
+        self._columns[field][self._row(user_id)] = value
+
+    def incr(self, user_id: int, field: str, delta: int = 1) -> int:
+        """Increment a counter and return the new value"""
+        column = self._columns[field]
+        row = self._row(user_id)
+        try:
+            column[row] += delta
+        except OverflowError:
+            # Counters saturate at their type's range
+            column[row] = type_bounds(column.typecode)[1 if delta > 0 else 0]
+        return column[row]
+
+    def touch(self, user_id: int, now: Optional[float] = None):
+        """Mark activity (keeps the user from idle eviction)"""
+        self.set(user_id, "last_seen", int(now or time.time()))
+
+    def record(self, user_id: int) -> Dict:
+        """All fields of a user as a dict (for analysis commands)"""
+        row = self._index.get(user_id)
+        if row is None:
+            return {}
+        return {name: column[row] for name, column in self._columns.items()}
+
+    def flood_hit(self, user_id: int, window: float, limit: int, now: Optional[float] = None) -> bool:
+        """Count a message in the user's flood window; True when over limit"""
+        now = now or time.time()
+        row = self._row(user_id)
+        starts, counts = self._columns["flood_window_start"], self._columns["flood_count"]
+        if now - starts[row] > window:
+            starts[row] = now
+            counts[row] = 0
+        if counts[row] < 0xFFFF:
+            counts[row] += 1
+        return counts[row] > limit
+
+    def on_cooldown(self, user_id: int, now: Optional[float] = None) -> float:
+        """Seconds of cooldown left (0 when free)"""
+        remaining = self.get(user_id, "cooldown_until", 0.0) - (now or time.time())
+        return remaining if remaining > 0 else 0.0
+
+    def start_cooldown(self, user_id: int, seconds: float, now: Optional[float] = None):
+        """Put a user on cooldown"""
+        self.set(user_id, "cooldown_until", (now or time.time()) + seconds)
+
+    def remove(self, user_id: int) -> bool:
+        """Drop a user by moving the last row into its slot"""
+        row = self._index.pop(user_id, None)
+        if row is None:
+            return False
+
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._index[moved] = row
+            for column in self._columns.values():
+                column[row] = column[last]
+        self._ids.pop()
+        for column in self._columns.values():
+            column.pop()
+        return True
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Drop users not seen for idle_ttl seconds"""
+        cutoff = (now or time.time()) - self.idle_ttl
+        last_seen = self._columns["last_seen"]
+        keep = [row for row in range(len(self._ids)) if last_seen[row] >= cutoff]
+        evicted = len(self._ids) - len(keep)
+        if not evicted:
+            return 0
+
+        if evicted < len(self._ids) // 8:
+            for user_id in [self._ids[row] for row in set(range(len(self._ids))) - set(keep)]:
+                self.remove(user_id)
+        else:
+            # Many idle users: rebuild the columns in one pass
+            self._ids = array("q", (self._ids[row] for row in keep))
+            self._columns = {name: array(column.typecode, (column[row] for row in keep))
+                             for name, column in self._columns.items()}
+            self._index = {user_id: row for row, user_id in enumerate(self._ids)}
+
+        logger.info(f"🧹 Evicted {evicted} idle users ({len(self._ids)} tracked)")
+        return evicted
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the store"""
+        total = sys.getsizeof(self._index) + sys.getsizeof(self._ids)
+        total += sum(sys.getsizeof(column) for column in self._columns.values())
+        # User id keys above the small-int cache are separate int objects
+        total += sum(sys.getsizeof(user_id) for user_id in self._index)
+        return total
+
+    def dumps(self) -> bytes:
+        """Binary snapshot: magic, JSON header, then raw id and column arrays (native byte order)"""
+        header = json.dumps({
+            "version": SNAPSHOT_VERSION,
+            "rows": len(self._ids),
+            "fields": self.fields,
+            "saved_at": time.time()
+        }).encode()
+        parts = [SNAPSHOT_MAGIC, struct.pack("<I", len(header)), header, self._ids.tobytes()]
+        parts.extend(self._columns[name].tobytes() for name in self.fields)
+        return b"".join(parts)
+
+    def loads(self, data: bytes):
+        """Replace contents from a snapshot (new fields start at zero, dropped fields are ignored)"""
+        if data[:4] != SNAPSHOT_MAGIC:
+            raise ValueError("not a user state snapshot")
+        (header_size,) = struct.unpack_from("<I", data, 4)
+        offset = 8 + header_size
+        header = json.loads(data[8:offset])
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {header.get('version')}")
+
+        rows = header["rows"]
+        ids = array("q")
+        ids.frombytes(data[offset:offset + rows * ids.itemsize])
+        offset += rows * ids.itemsize
+
+        columns = {}
+        for name, code in header["fields"].items():
+            column = array(code)
+            column.frombytes(data[offset:offset + rows * column.itemsize])
+            offset += rows * column.itemsize
+            if name in self.fields:
+                wanted = self.fields[name]
+                if code != wanted:
+                    column = array(wanted, (v if wanted in "fd" else int(v) for v in column))
+                columns[name] = column
+
+        self._ids = ids
+        self._index = {user_id: row for row, user_id in enumerate(ids)}
+        self._columns = {
+            name: columns.get(name) or array(code, bytes(rows * array(code).itemsize))
+            for name, code in self.fields.items()
+        }
+
+    def save(self, path: Optional[str] = None):
+        """Write snapshot atomically (encrypted when the store has a key)"""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        try:
+            data = self.dumps()
+            if self.fernet is not None:
+                data = ENCRYPTED_MAGIC + self.fernet.encrypt(zlib.compress(data, 1))
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"❌ Failed to save user state: {e}")
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Load snapshot if present"""
+        path = path or self.path
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:4] == ENCRYPTED_MAGIC:
+                if self.fernet is None:
+                    raise ValueError("snapshot is encrypted and no key is configured")
+                data = zlib.decompress(self.fernet.decrypt(data[4:]))
+            # A plaintext snapshot from before encryption loads once and is rewritten encrypted
+            self.loads(data)
+        except Exception as e:
+            logger.error(f"❌ Failed to load user state: {e}")
+            return False
+        logger.info(f"👥 Restored state for {len(self._ids)} users")
+        return True
+
+    async def on_update(self, update, context):
+        """Track activity of every update's user"""
+        user = update.effective_user
+        if user is None:
+            return
+        self.touch(user.id)
+        if update.message:
+            self.incr(user.id, "message_count")
+
+    def register(self, app, group: int = -3):
+        """Observe all updates before feature handlers"""
+        app.add_handler(TypeHandler(Update, self.on_update), group=group)
+
+    def start(self, interval: float = 3600.0):
+        """Evict idle users periodically"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._evict_loop(interval))
+
+    async def _evict_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    async def close(self):
+        """Stop eviction and write a snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.save()
+
+def create_user_state(settings: Optional[Dict] = None, fernet=None) -> UserStateStore:
+    """Create store from bot_settings['user_state'] and load its snapshot"""
+    settings = settings or {}
+    store = UserStateStore(
+        path=settings.get("path", "DATA_STORAGE/user_state.bin"),
+        idle_ttl=settings.get("idle_days", 7) * 86400,
+        fernet=fernet
+    )
+    store.load()
+    return store
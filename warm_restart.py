@@ -0,0 +1,140 @@
+"""
+warm_restart.py - Warm Restart Snapshots
+In-memory state is written encrypted on shutdown and restored before updates flow
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Dict
+
+from cryptography.fernet import InvalidToken
+
+from SETUP_CONFIG.crypto_vault import vault
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"NWR1"
+SNAPSHOT_VERSION = 1
+
+class WarmRestart:
+    """
+    Snapshot registered warmable components
+
+    A warmable has export_state() -> bytes and import_state(bytes). All
+    sections are packed into one versioned container, zlib-compressed and
+    encrypted with the vault's Fernet key. Snapshots older than max_age
+    are ignored, and a component that fails to restore starts cold
+    without affecting the others.
+    """
+
+    def __init__(self, path: str = "DATA_STORAGE/warm_state.bin", fernet=None,
+                 max_age: float = 6 * 3600.0):
+        self.path = path
+        self.fernet = fernet or vault.fernet
+        self.max_age = max_age
+        self.components: Dict[str, object] = {}
+
+    def register(self, name: str, component):
+        """Add a warmable component under a stable section name"""
+        if not (hasattr(component, "export_state") and hasattr(component, "import_state")):
+            raise TypeError(f"{name} does not implement export_state/import_state")
+        self.components[name] = component
+
+    def dumps(self) -> bytes:
+        """Encrypted snapshot of every component"""
+        sections = []
+        for name, component in self.components.items():
+            try:
+                data = component.export_state()
+            except Exception as e:
+                logger.error(f"❌ Failed to export {name} state: {e}")
+                continue
+            encoded = name.encode()
+            sections.append(struct.pack("<BI", len(encoded), len(data)) + encoded + data)
+
+        header = json.dumps({"version": SNAPSHOT_VERSION, "created_at": time.time(),
+                             "sections": len(sections)}).encode()
+        body = struct.pack("<I", len(header)) + header + b"".join(sections)
+        return SNAPSHOT_MAGIC + self.fernet.encrypt(zlib.compress(body, 1))
+
+    def loads(self, data: bytes) -> Dict[str, bytes]:
+        """Decrypt and unpack sections (empty when stale or from another version)"""
+        if data[:4] != SNAPSHOT_MAGIC:
+            raise ValueError("not a warm restart snapshot")
+        body = zlib.decompress(self.fernet.decrypt(data[4:]))
+
+        (header_size,) = struct.unpack_from("<I", body)
+        offset = 4 + header_size
+        header = json.loads(body[4:offset])
+        if header.get("version") != SNAPSHOT_VERSION:
+            logger.warning(f"⚠️ Ignoring warm snapshot version {header.get('version')}")
+            return {}
+        age = time.time() - header.get("created_at", 0)
+        if age > self.max_age:
+            logger.info(f"🧊 Warm snapshot is {age / 60:.0f} min old, starting cold")
+            return {}
+
+        sections = {}
+        for _ in range(header["sections"]):
+            name_size, data_size = struct.unpack_from("<BI", body, offset)
+            offset += 5
+            name = body[offset:offset + name_size].decode()
+            offset += name_size
+            sections[name] = body[offset:offset + data_size]
+            offset += data_size
+        return sections
+
+    def save(self) -> int:
+        """Write snapshot atomically, returning its size"""
+        if not self.components or self.fernet is None:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            data = self.dumps()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"❌ Failed to save warm snapshot: {e}")
+            return 0
+
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(f"💾 Warm snapshot saved ({len(data)} bytes, {elapsed:.1f} ms)")
+        return len(data)
+
+    def restore(self) -> Dict[str, bool]:
+        """Import every section that has a registered component"""
+        if self.fernet is None or not os.path.exists(self.path):
+            return {}
+
+        started = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                sections = self.loads(f.read())
+        except (InvalidToken, ValueError, zlib.error, struct.error) as e:
+            logger.error(f"❌ Unreadable warm snapshot, starting cold: {e or type(e).__name__}")
+            return {}
+
+        restored = {}
+        for name, component in self.components.items():
+            if name not in sections:
+                continue
+            try:
+                component.import_state(sections[name])
+                restored[name] = True
+            except Exception as e:
+                restored[name] = False
+                logger.error(f"❌ Failed to restore {name} state: {e}")
+
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(f"♨️ Warm restart: {sum(restored.values())}/{len(restored)} components "
+                    f"restored in {elapsed:.1f} ms")
+        return restored